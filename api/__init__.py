@@ -9,6 +9,7 @@ from .chat import router as chat_router
 from .threads import router as threads_router
 from .embeddings import router as embeddings_router
 from .retrieval import router as retrieval_router
+from .knowledge_base import router as knowledge_base_router
 
 __all__ = [
     "auth_router",
@@ -18,4 +19,5 @@ __all__ = [
     "threads_router",
     "embeddings_router",
     "retrieval_router",
+    "knowledge_base_router",
 ]
@@ -7,17 +7,19 @@ import uuid
 import logging
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 
 from database.db import get_db
 from database.models import Users
+from utils.google_certs import verify_google_id_token
 from utils.auth import (
-    safe_hash_password,
-    safe_verify_password,
     create_access_token,
+    hash_password_async,
+    needs_rehash,
+    verify_password_async,
     Token,
 )
 
@@ -51,15 +53,38 @@ class LoginReq(BaseModel):
     password: str
 
 
+async def _authenticate(db: AsyncSession, email: str, password: str):
+    """
+    Look up a user and check the password on the password-hash executor.
+
+    A hash made with an outdated work factor is replaced on success; a failed
+    upgrade is only logged, the login itself still succeeds.
+    """
+    user = (await db.execute(select(Users).where(Users.email == email))).scalar_one_or_none()
+    if not user or not await verify_password_async(password, user.password):
+        return None
+
+    if needs_rehash(user.password):
+        try:
+            user.password = await hash_password_async(password)
+            await db.commit()
+            logger.info(f"🔐 Upgraded password hash for user {user.id}")
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"⚠️ Password rehash failed for user {user.id}: {e}")
+    return user
+
+
 @router.post("/google", response_model=TokenResponse)
-def login_with_google(payload: GoogleLoginReq, db: Session = Depends(get_db)):
+async def login_with_google(payload: GoogleLoginReq, db: AsyncSession = Depends(get_db)):
     """
     Login with Google ID token.
     If user doesn't exist, create a new account automatically.
     """
     try:
-        idinfo = id_token.verify_oauth2_token(
-            payload.googleIdToken, google_requests.Request(), os.getenv("GOOGLE_CLIENT_ID")
+        # Local signature check against cached certs; the threadpool only matters on a cold cache
+        idinfo = await run_in_threadpool(
+            verify_google_id_token, payload.googleIdToken, os.getenv("GOOGLE_CLIENT_ID")
         )
         email = idinfo.get("email")
         name = idinfo.get("name", "")
@@ -68,14 +93,14 @@ def login_with_google(payload: GoogleLoginReq, db: Session = Depends(get_db)):
         if not email:
             raise HTTPException(status_code=400, detail="Invalid Google token: missing email")
 
-        user = db.query(Users).filter(Users.email == email).first()
+        user = (await db.execute(select(Users).where(Users.email == email))).scalar_one_or_none()
         if not user:
             random_password = uuid.uuid4().hex
-            hashed_password = safe_hash_password(random_password)
+            hashed_password = await hash_password_async(random_password)
             user = Users(email=email, password=hashed_password)
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
 
         token_data = {"sub": str(user.id)}
         access_token = create_access_token(token_data)
@@ -98,12 +123,12 @@ def login_with_google(payload: GoogleLoginReq, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(body: LoginReq, db: Session = Depends(get_db)):
+async def login(body: LoginReq, db: AsyncSession = Depends(get_db)):
     """
     Login with email and password
     """
-    user = db.query(Users).filter(Users.email == body.email).first()
-    if not user or not safe_verify_password(body.password, user.password):
+    user = await _authenticate(db, body.email, body.password)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     # Create access token
@@ -120,14 +145,14 @@ def login(body: LoginReq, db: Session = Depends(get_db)):
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     OAuth2 compatible token login, get an access token for future requests.
     This endpoint is used by Swagger UI for authorization.
     """
-    user = db.query(Users).filter(Users.email == form_data.username).first()
-    if not user or not safe_verify_password(form_data.password, user.password):
+    user = await _authenticate(db, form_data.username, form_data.password)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -6,21 +6,25 @@ import uuid
 import logging
 from typing import List
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
 from database.db import get_db
-from database.models import ChatMessage, ChatThread
+from database.models import ChatMessage
+from services.chat_service import ChatService, chat_counts
+from services.message_persister import get_message_persister
+from services.conversation_summary import get_conversation_summarizer, summary_messages
 from utils.auth import get_current_user
 from utils.timezone_utils import get_vietnam_time
 from utils.helpers import serialize_conversation_history
 from utils.role_enum import RoleEnum
 from config.timeout_config import timeout_config
+from config.chat_config import chat_config
 from contextlib import contextmanager
 from datetime import datetime
 import threading
 
-from core.flows import MedFlow
+from core.flows import MedFlow, create_oqa_orthodontist_flow
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -49,7 +53,7 @@ def get_oqa_flow():
     global _oqa_flow
     if _oqa_flow is None:
         try:
-            # _oqa_flow = create_oqa_orthodontist_flow()
+            _oqa_flow = create_oqa_orthodontist_flow()
             logger.info("✅ OQA orthodontist flow created successfully")
         except Exception as e:
             logger.error(f"❌ Failed to create OQA flow: {str(e)}")
@@ -123,7 +127,7 @@ def flow_timeout(timeout_seconds: int = None):
 async def chat(
     request: ConversationRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -147,20 +151,16 @@ async def chat(
                 detail="session_id (thread_id) is required"
             )
 
-        # Verify that the thread belongs to the current user
-        thread = db.query(ChatThread).filter(
-            ChatThread.id == thread_id,
-            ChatThread.user_id == user_id
-        ).first()
+        # Verify that the thread belongs to the current user and load its recent history + rolling summary
+        context = await ChatService(db).get_thread_context(thread_id, user_id)
 
-        if not thread:
+        if context is None:
             raise HTTPException(
                 status_code=404,
                 detail="Thread not found or you don't have permission to access it"
             )
 
- 
-        recent_messages = sorted(thread.messages, key=lambda m: m.timestamp, reverse=True)[:8][::-1]
+        thread = context.thread
 
         # Validate and normalize role
         role_name = request.role
@@ -186,8 +186,17 @@ async def chat(
             api_role=request.role
         )
 
+        # MedFlow gets the rolling summary plus only the messages newer than it;
+        # the OQA flow keeps reading the recent messages verbatim
+        use_summary = chat_config.ROLLING_SUMMARY_ENABLED and role_name != RoleEnum.ORTHODONTIST.value
+        if use_summary:
+            unsummarized = context.unsummarized()
+            history_messages = context.unsummarized(chat_config.SUMMARY_RECENT_MESSAGES)
+        else:
+            history_messages = context.messages
+
         # Serialize conversation history for the flow
-        conversation_history = serialize_conversation_history(recent_messages)
+        conversation_history = serialize_conversation_history(history_messages)
 
         # Prepare shared data for the flow
         shared = {
@@ -199,6 +208,10 @@ async def chat(
             "user_id": user_id,
             "session_id": request.session_id,
         }
+        if use_summary and context.summary:
+            # Only IngestQuery reads it (into formatted_conversation_history); context_summary stays
+            # the per-turn summary written by the decision node
+            shared["conversation_summary"] = context.summary
 
         # Run chat flow with timeout protection
         try:
@@ -269,20 +282,33 @@ async def chat(
             input_type=input_type
         )
 
+        if chat_config.WRITE_BEHIND_ENABLED:
+            # Batched background commit; the next history load on this thread still sees the turn
+            get_message_persister().submit(thread_id, [user_message, bot_message], get_vietnam_time())
+            if use_summary:
+                get_conversation_summarizer().schedule(
+                    thread_id, context.summary, summary_messages(unsummarized + [user_message, bot_message]), bot_message.id
+                )
+            return response
+
         # Single transaction: create user_message, create bot_message, update thread timestamp
         try:
             db.add(user_message)
             db.add(bot_message)
 
-            # Update thread's updated_at timestamp
-            thread = db.query(ChatThread).filter(ChatThread.id == thread_id).first()
-            if thread:
-                thread.updated_at = get_vietnam_time()
+            # Update thread's updated_at timestamp (thread is still attached to this session)
+            thread.updated_at = get_vietnam_time()
 
-            db.commit()
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise e
+        chat_counts.adjust("messages", thread_id, 2)
+        if use_summary:
+            # Off the critical path: the fold runs after the response is sent
+            get_conversation_summarizer().schedule(
+                thread_id, context.summary, summary_messages(unsummarized + [user_message, bot_message]), bot_message.id
+            )
 
         return response
 
@@ -0,0 +1,75 @@
+"""
+Knowledge base admin endpoints - hot reload of the in-memory indexes
+"""
+
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+
+from config.kb_config import kb_config
+from utils.auth import Principal, get_current_user
+from utils.timezone_utils import get_vietnam_time
+from utils.knowledge_base.kb_reload import get_reload_status, request_reload
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(prefix="/api/knowledge-base", tags=["knowledge-base"])
+
+
+def require_kb_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """Only accounts listed in KB_ADMIN_EMAILS may rebuild the indexes."""
+    if (current_user.email or "").lower() not in kb_config.KB_ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Knowledge base reload requires an admin account",
+        )
+    return current_user
+
+
+# Pydantic models
+class ReloadStatusResponse(BaseModel):
+    state: str = Field(..., description="idle | running | succeeded | failed")
+    generation: int = Field(..., description="Generation number of the KB index being served")
+    started_at: Optional[str] = Field(None, description="When the last reload started")
+    finished_at: Optional[str] = Field(None, description="When the last reload finished")
+    error: Optional[str] = Field(None, description="Error message of the last failed reload")
+    accepted: Optional[bool] = Field(None, description="Whether this request started a new reload")
+    timestamp: str = Field(..., description="Response timestamp")
+
+
+@router.post("/reload", response_model=ReloadStatusResponse, status_code=202)
+async def reload_knowledge_base(admin: Principal = Depends(require_kb_admin)):
+    """
+    Rebuild the BM25 KB and OQA indexes from the CSV files in the background
+
+    The current indexes keep serving requests until the new ones are fully built,
+    then both are swapped in atomically and dependent caches are invalidated.
+    Poll `GET /api/knowledge-base/reload` for the result.
+
+    Only the worker serving this request reloads immediately; other workers
+    reload on their next file-watcher poll (KB_WATCH_INTERVAL_SECONDS > 0).
+    """
+    accepted = request_reload()
+    if accepted:
+        logger.info(f"🔄 Knowledge base reload scheduled by {admin.email}")
+    else:
+        logger.info("⏳ Knowledge base reload already running")
+    return ReloadStatusResponse(
+        **get_reload_status(),
+        accepted=accepted,
+        timestamp=get_vietnam_time().isoformat(),
+    )
+
+
+@router.get("/reload", response_model=ReloadStatusResponse)
+async def get_knowledge_base_reload_status(current_user: Principal = Depends(get_current_user)):
+    """
+    Get the status of the last knowledge base reload (in the worker serving this request)
+    """
+    return ReloadStatusResponse(
+        **get_reload_status(),
+        timestamp=get_vietnam_time().isoformat(),
+    )
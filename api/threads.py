@@ -4,17 +4,18 @@ Clean and refactored chat API endpoints for thread and message management
 
 import logging
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from database.db import get_db
-from utils.auth import get_current_user
-from database.models import Users
+from utils.auth import Principal, get_current_user
 from services.chat_service import ChatService
 from schemas.chat_schemas import (
     ThreadSchema,
     ThreadWithMessagesSchema,
     ThreadMessagesResponse,
+    ThreadListResponse,
+    ThreadSummaryListResponse,
     CreateThreadRequest,
     RenameThreadRequest,
     SendMessageRequest,
@@ -27,12 +28,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/threads", tags=["chat"])
 
 
-def get_current_user_id(current_user: Users = Depends(get_current_user)) -> int:
+def get_current_user_id(current_user: Principal = Depends(get_current_user)) -> int:
     """Extract user ID from authenticated user"""
     return current_user.id
 
 
-def get_chat_service(db: Session = Depends(get_db)) -> ChatService:
+def get_chat_service(db: AsyncSession = Depends(get_db)) -> ChatService:
     """Dependency to get chat service instance"""
     return ChatService(db)
 
@@ -50,7 +51,7 @@ async def get_threads(
     """
     try:
         logger.info(f"Getting threads for user {user_id}")
-        threads = chat_service.get_user_threads(user_id)
+        threads = await chat_service.get_user_threads(user_id)
         logger.info(f"Retrieved {len(threads)} threads for user {user_id}")
         return threads
     
@@ -62,6 +63,77 @@ async def get_threads(
         )
 
 
+@router.get("/page", response_model=ThreadListResponse)
+async def get_threads_page(
+    cursor: Optional[str] = None,
+    limit: int = None,
+    include_total: bool = False,
+    chat_service: ChatService = Depends(get_chat_service),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Get one page of the current user's threads (cursor pagination)
+    
+    Args:
+        cursor: `next_cursor` from the previous page (omit for the first page)
+        limit: Number of threads per page (default: 50, max: 200)
+        include_total: Also return the (cached) total number of threads
+    
+    Returns threads ordered by most recently updated first.
+    Requires authentication via JWT token.
+    """
+    try:
+        logger.info(f"Getting thread page for user {user_id}, limit {limit}")
+        result = await chat_service.get_user_threads_page(user_id, cursor, limit, include_total)
+        logger.info(f"Retrieved {len(result.threads)} threads for user {user_id}")
+        return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting thread page for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve threads"
+        )
+
+
+@router.get("/summary", response_model=ThreadSummaryListResponse)
+async def get_thread_summaries(
+    cursor: Optional[str] = None,
+    limit: int = None,
+    chat_service: ChatService = Depends(get_chat_service),
+    user_id: int = Depends(get_current_user_id),
+):
+    """
+    Get the current user's threads with last-message previews (sidebar)
+    
+    Each thread carries its latest message snippet, that message's role and
+    the thread's message count, so the sidebar needs one request instead of
+    one per thread.
+    
+    Args:
+        cursor: `next_cursor` from the previous page (omit for the first page)
+        limit: Number of threads per page (default: 50, max: 200)
+    
+    Requires authentication via JWT token.
+    """
+    try:
+        logger.info(f"Getting thread summaries for user {user_id}, limit {limit}")
+        result = await chat_service.get_thread_summaries(user_id, cursor, limit)
+        logger.info(f"Retrieved {len(result.threads)} thread summaries for user {user_id}")
+        return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting thread summaries for user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve thread summaries"
+        )
+
+
 @router.post("/", response_model=ThreadSchema, status_code=status.HTTP_201_CREATED)
 async def create_thread(
     request: CreateThreadRequest,
@@ -76,7 +148,7 @@ async def create_thread(
     """
     try:
         logger.info(f"Creating thread '{request.name}' for user {user_id}")
-        thread = chat_service.create_thread(user_id, request.name)
+        thread = await chat_service.create_thread(user_id, request.name)
         logger.info(f"Created thread {thread.id} for user {user_id}")
         return thread
     
@@ -93,6 +165,8 @@ async def get_thread_messages(
     thread_id: str,
     page: int = 1,
     limit: int = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     chat_service: ChatService = Depends(get_chat_service),
     user_id: int = Depends(get_current_user_id),
 ):
@@ -101,8 +175,10 @@ async def get_thread_messages(
     
     Args:
         thread_id: The thread identifier
-        page: Page number for pagination (default: 1)
+        page: Page number for pagination (default: 1; ignored when `cursor` is set)
         limit: Number of messages per page (default: 50, max: 200)
+        cursor: `next_cursor` from the previous page; prefer it over `page` for deep pages
+        include_total: Also return the (cached) total number of messages
     
     Returns messages in chronological order with pagination info.
     Only accessible by the thread owner.
@@ -110,7 +186,9 @@ async def get_thread_messages(
     """
     try:
         logger.info(f"Getting messages for thread {thread_id}, page {page}, limit {limit}")
-        result = chat_service.get_thread_messages_paginated(thread_id, user_id, page, limit)
+        result = await chat_service.get_thread_messages_paginated(
+            thread_id, user_id, page, limit, cursor=cursor, include_total=include_total
+        )
         logger.info(f"Retrieved {len(result.messages)} messages for thread {thread_id}")
         return result
     
@@ -140,7 +218,7 @@ async def get_thread(
     """
     try:
         logger.info(f"Getting thread {thread_id} with all messages")
-        result = chat_service.get_thread_with_messages(thread_id, user_id)
+        result = await chat_service.get_thread_with_messages(thread_id, user_id)
         logger.info(f"Retrieved thread {thread_id} with {result.total_messages} messages")
         return result
     
@@ -170,7 +248,7 @@ async def rename_thread(
     """
     try:
         logger.info(f"Renaming thread {thread_id} to '{request.name}'")
-        result = chat_service.rename_thread(thread_id, user_id, request.name)
+        result = await chat_service.rename_thread(thread_id, user_id, request.name)
         logger.info(f"Renamed thread {thread_id}")
         return result
     
@@ -199,7 +277,7 @@ async def delete_thread(
     """
     try:
         logger.info(f"Deleting thread {thread_id}")
-        chat_service.delete_thread(thread_id, user_id)
+        await chat_service.delete_thread(thread_id, user_id)
         logger.info(f"Deleted thread {thread_id}")
         return None
     
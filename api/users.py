@@ -3,14 +3,17 @@ User management API endpoints
 """
 
 import logging
-from typing import List
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, Field
 
-from database.db import get_db
+from database.db import get_db, get_sync_db
 from database.models import Users
-from utils.auth import safe_hash_password, get_current_user
+from services.user_purge_service import get_purge_job, start_user_purge
+from utils.auth import get_current_user, hash_password_async, principal_cache
 from utils.timezone_utils import get_vietnam_time
 
 # Configure logger
@@ -36,11 +39,22 @@ class UserCreate(BaseModel):
 class DeleteUserResponse(BaseModel):
     message: str
     deleted_user: UserOut
+    purge_job_id: str
     timestamp: str
 
 
+class PurgeJobResponse(BaseModel):
+    job_id: str
+    user_id: int
+    state: str = Field(..., description="queued | running | succeeded | failed")
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    deleted: Optional[Dict[str, int]] = Field(None, description="Memories/messages/threads/users removed")
+    error: Optional[str] = None
+
+
 @router.post("", response_model=UserOut, status_code=201)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
+async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new user account
 
@@ -48,19 +62,20 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)):
     - **password**: Password (min 6 characters)
     """
     # Duplicate check
-    if db.query(Users).filter(Users.email == payload.email).first():
+    if (await db.execute(select(Users).where(Users.email == payload.email))).scalar_one_or_none():
         raise HTTPException(status_code=409, detail="Email already exists")
 
-    hashed = safe_hash_password(payload.password)
+    # bcrypt runs on the password-hash executor, not the event loop or the shared threadpool
+    hashed = await hash_password_async(payload.password)
     user = Users(email=payload.email, password=hashed)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return UserOut(id=user.id, email=user.email)
 
 
 @router.get("", response_model=List[UserOut])
-def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_sync_db)):
     """
     Get all users with pagination
 
@@ -85,12 +100,15 @@ def get_current_user_info(current_user = Depends(get_current_user)):
     return UserOut(id=current_user.id, email=current_user.email)
 
 
-@router.delete("/{user_id}", response_model=DeleteUserResponse)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+@router.delete("/{user_id}", response_model=DeleteUserResponse, status_code=202)
+def delete_user(user_id: int, db: Session = Depends(get_sync_db)):
     """
     Delete user by ID
 
     - **user_id**: The ID of the user to delete
+
+    The account, its chat threads/messages and its stored memories are purged
+    by a background job. Poll `GET /api/users/purge-jobs/{purge_job_id}` for the result.
     """
     user = db.query(Users).filter(Users.id == user_id).first()
     if not user:
@@ -99,11 +117,25 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     # Store user info before deletion
     deleted_user_info = UserOut(id=user.id, email=user.email)
 
-    db.delete(user)
-    db.commit()
+    # Stop serving the cached principal now; the purge job invalidates again once the row is gone
+    principal_cache.invalidate(user_id)
+    job = start_user_purge(user_id)
+    logger.info(f"🗑️ User {user_id} purge scheduled (job {job['job_id']})")
 
     return DeleteUserResponse(
-        message=f"User {user_id} deleted successfully",
+        message=f"User {user_id} scheduled for deletion",
         deleted_user=deleted_user_info,
+        purge_job_id=job["job_id"],
         timestamp=get_vietnam_time().isoformat(),
     )
+
+
+@router.get("/purge-jobs/{job_id}", response_model=PurgeJobResponse)
+def get_user_purge_job(job_id: str):
+    """
+    Get the status of a user purge job started by `DELETE /api/users/{user_id}`
+    """
+    job = get_purge_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return PurgeJobResponse(**job)
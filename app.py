@@ -50,6 +50,17 @@ app = FastAPI(
 async def startup_event():
     """Load knowledge base and initialize components at startup"""
     logger.info("🚀 Starting Medical Conversation API...")
+
+    # Index migrations (advisory-locked, so workers take turns); disable when a deploy step
+    # runs `python -m database.migrate`
+    if os.getenv("DB_MIGRATE_ON_STARTUP", "true").lower() == "true":
+        try:
+            from database.db import engine
+            from database.migrate import apply_migrations
+            logger.info(f"✅ Database migrations applied: {apply_migrations(engine)}")
+        except Exception as e:
+            logger.error(f"❌ Failed to apply database migrations: {e}")
+
     logger.info("🔄 Loading knowledge base...")
 
     try:
@@ -80,6 +91,14 @@ async def startup_event():
         logger.error(f"❌ Failed to preload OQA index: {e}")
         logger.info("⚠️  OQA will be lazy-loaded on first request")
 
+    # Watch KB CSVs for edits (disabled unless KB_WATCH_INTERVAL_SECONDS > 0)
+    try:
+        from utils.knowledge_base.kb_reload import start_kb_watcher
+        if start_kb_watcher():
+            logger.info("👀 Knowledge base file watcher started")
+    except Exception as e:
+        logger.error(f"❌ Failed to start knowledge base watcher: {e}")
+
     # Preload embedding models for Qdrant retrieval
     logger.info("🔄 Preloading embedding models for Qdrant...")
     try:
@@ -90,9 +109,61 @@ async def startup_event():
         logger.error(f"❌ Failed to preload embedding models: {e}")
         logger.info("⚠️  Models will be lazy-loaded on first request")
 
+    # Verify/create Qdrant collections once; the registry caches the result for the process
+    logger.info("🔄 Verifying Qdrant collections...")
+    try:
+        from utils.knowledge_base import memory_retrieval  # registers the user_memory schema
+        from utils.knowledge_base.qdrant_schema import schema_registry
+        status = schema_registry.verify_all(memory_retrieval.QDRANT_URL)
+        missing = [name for name, ok in status.items() if not ok]
+        if missing:
+            logger.warning(f"⚠️  Qdrant collections unavailable: {missing}")
+        else:
+            logger.info(f"✅ Qdrant collections ready: {list(status)}")
+        if status.get(memory_retrieval.MEMORY_COLLECTION_NAME):
+            from utils.knowledge_base.qdrant_schema import get_qdrant_client
+            memory_retrieval.ensure_memory_payload_indexes(get_qdrant_client(memory_retrieval.QDRANT_URL))
+    except Exception as e:
+        logger.error(f"❌ Failed to verify Qdrant collections: {e}")
+        logger.info("⚠️  Collections will be verified on first use")
+
+    # Periodic dedup/compaction (MEMORY_COMPACTION_INTERVAL_SECONDS) and TTL purge (MEMORY_PURGE_INTERVAL_SECONDS)
+    try:
+        from utils.knowledge_base.memory_compaction import start_memory_compaction_worker, start_memory_purge_worker
+        if start_memory_compaction_worker():
+            logger.info("🧹 User memory compaction worker started")
+        if start_memory_purge_worker():
+            logger.info("🧹 Expired memory purge worker started")
+    except Exception as e:
+        logger.error(f"❌ Failed to start memory maintenance workers: {e}")
+
+    # Google sign-in certs: warm the cache and start its background refresher
+    try:
+        from utils.google_certs import get_google_cert_cache
+        get_google_cert_cache().get_certs()
+        logger.info("🔑 Google signing certs cached")
+    except Exception as e:
+        logger.error(f"❌ Failed to prefetch Google signing certs: {e}")
+        logger.info("⚠️  Certs will be fetched on first Google login")
+
     logger.info("🎉 All startup tasks completed!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Finish rolling summary updates and commit chat turns still queued in the write-behind persister"""
+    try:
+        from services.conversation_summary import drain_conversation_summaries
+        await drain_conversation_summaries()
+    except Exception as e:
+        logger.error(f"❌ Failed to finish conversation summaries: {e}")
+    try:
+        from services.message_persister import flush_message_persister
+        await flush_message_persister()
+    except Exception as e:
+        logger.error(f"❌ Failed to flush queued chat messages: {e}")
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -142,7 +213,7 @@ async def root():
 
 
 # Include routers
-from api import auth_router, users_router, health_router, chat_router, threads_router, embeddings_router,retrieval_router
+from api import auth_router, users_router, health_router, chat_router, threads_router, embeddings_router,retrieval_router, knowledge_base_router
 
 app.include_router(auth_router)
 app.include_router(users_router)
@@ -151,6 +222,7 @@ app.include_router(chat_router)
 app.include_router(threads_router)
 app.include_router(embeddings_router)
 app.include_router(retrieval_router)
+app.include_router(knowledge_base_router)
 
 if __name__ == "__main__":
     # Get configuration from environment
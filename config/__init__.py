@@ -6,14 +6,20 @@ from .chat_config import ChatConfig, chat_config
 from .logging_config import LoggingConfig, logging_config
 from .api_config import APIConfig, api_config
 from .timeout_config import TimeoutConfig, timeout_config
+from .kb_config import KBConfig, kb_config
+from .memory_config import MemoryConfig, memory_config
 
 __all__ = [
     "ChatConfig",
     "LoggingConfig",
     "APIConfig",
     "TimeoutConfig",
+    "KBConfig",
+    "MemoryConfig",
     "chat_config",
     "logging_config",
     "api_config",
     "timeout_config",
+    "kb_config",
+    "memory_config",
 ]
@@ -20,6 +20,22 @@ class APIConfig:
     # Security
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+    # Authenticated-user cache: JWT is still verified per request, the user row is not re-read
+    # (0 TTL = always read the user row)
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+    # Password hashing: bcrypt work factor (log2 rounds) and the dedicated executor size.
+    # Hashes with a different cost are upgraded on the next successful login.
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+    # Google ID-token verification: signing certs are cached per their Cache-Control
+    # max-age and refreshed in the background this many seconds before they expire
+    GOOGLE_CERTS_URL: str = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+    GOOGLE_CERTS_REFRESH_MARGIN_SECONDS: int = int(os.getenv("GOOGLE_CERTS_REFRESH_MARGIN_SECONDS", "300"))
+    GOOGLE_CERTS_DEFAULT_MAX_AGE_SECONDS: int = int(os.getenv("GOOGLE_CERTS_DEFAULT_MAX_AGE_SECONDS", "3600"))
+
 
 # Global config instance
 api_config = APIConfig()
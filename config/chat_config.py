@@ -14,6 +14,24 @@ class ChatConfig:
     MAX_PAGE_SIZE: int = 200
     MIN_PAGE_SIZE: int = 1
 
+    # Cached COUNT(*) for thread/message totals (pagination no longer counts on every page)
+    COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("CHAT_COUNT_CACHE_TTL_SECONDS", "60"))
+    COUNT_CACHE_MAX_ENTRIES: int = int(os.getenv("CHAT_COUNT_CACHE_MAX_ENTRIES", "10000"))
+
+    # Write-behind persistence of chat turns: /api/chat returns before the commit and a
+    # background writer commits turns from many requests together. Uncommitted turns are only
+    # visible to the worker that queued them: run several workers behind sticky sessions
+    WRITE_BEHIND_ENABLED: bool = os.getenv("CHAT_WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_BEHIND_BATCH_SIZE: int = int(os.getenv("CHAT_WRITE_BEHIND_BATCH_SIZE", "64"))
+    WRITE_BEHIND_MAX_DELAY_MS: int = int(os.getenv("CHAT_WRITE_BEHIND_MAX_DELAY_MS", "50"))
+
+    # Rolling conversation summary: each turn is folded into a per-thread summary in the
+    # background; the next turn sends the summary plus only the newer messages. Off by default:
+    # it adds one LLM call per turn and fold chaining is per process (see services.conversation_summary)
+    ROLLING_SUMMARY_ENABLED: bool = os.getenv("CHAT_ROLLING_SUMMARY_ENABLED", "false").lower() == "true"
+    SUMMARY_MAX_CHARS: int = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1200"))
+    SUMMARY_RECENT_MESSAGES: int = int(os.getenv("CHAT_SUMMARY_RECENT_MESSAGES", "2"))
+
     # Message settings
     MAX_MESSAGE_LENGTH: int = 10000
     MAX_THREAD_NAME_LENGTH: int = 255
@@ -24,11 +42,34 @@ class ChatConfig:
     # Knowledge base settings
     MAX_KB_ITEMS: int = 6  # Maximum number of KB items to include in compose prompt
 
+    # Prompt token budgets (estimated tokens) per LLM node; sections past the budget are
+    # trimmed in priority order query > KB > memory > history (utils.llm.prompt_builder)
+    PROMPT_TOKEN_BUDGET_DEFAULT: int = int(os.getenv("PROMPT_TOKEN_BUDGET_DEFAULT", "3000"))
+    PROMPT_TOKEN_BUDGETS = {
+        "decide_action": int(os.getenv("PROMPT_TOKEN_BUDGET_DECIDE_ACTION", "3000")),
+        "rag_agent": int(os.getenv("PROMPT_TOKEN_BUDGET_RAG_AGENT", "2000")),
+        "query_creation": int(os.getenv("PROMPT_TOKEN_BUDGET_QUERY_CREATION", "1200")),
+        "compose_answer": int(os.getenv("PROMPT_TOKEN_BUDGET_COMPOSE_ANSWER", "4000")),
+        "memory_manager": int(os.getenv("PROMPT_TOKEN_BUDGET_MEMORY_MANAGER", "2500")),
+        "oqa_compose": int(os.getenv("PROMPT_TOKEN_BUDGET_OQA_COMPOSE", "5000")),
+    }
+
+    # Provider-side caching of static prompt prefixes (persona, instructions, topic catalog);
+    # prefixes shorter than PROMPT_CACHE_MIN_TOKENS are sent inline
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+    PROMPT_CACHE_TTL_SECONDS: int = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))
+    PROMPT_CACHE_MIN_TOKENS: int = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+
     @classmethod
     def get_welcome_message(cls) -> str:
         """Get welcome message from environment or use default"""
         return os.getenv("WELCOME_MESSAGE", cls.DEFAULT_WELCOME_MESSAGE)
 
+    @classmethod
+    def get_prompt_budget(cls, node: str) -> int:
+        """Token budget for a node's prompt (default budget for unknown nodes)"""
+        return cls.PROMPT_TOKEN_BUDGETS.get(node, cls.PROMPT_TOKEN_BUDGET_DEFAULT)
+
 
 # Global config instance
 chat_config = ChatConfig()
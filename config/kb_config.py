@@ -0,0 +1,33 @@
+"""
+Knowledge base configuration settings
+"""
+
+import os
+
+
+class KBConfig:
+    """Configuration for the in-process knowledge base indexes"""
+
+    # Directory holding the role CSVs and the OQA dataset
+    KB_DIR: str = os.getenv("KB_DIR", "medical_knowledge_base")
+
+    # Poll interval for the CSV file watcher; 0 disables the watcher (reload via API only)
+    KB_WATCH_INTERVAL_SECONDS: int = int(os.getenv("KB_WATCH_INTERVAL_SECONDS", "0"))
+
+    # Accounts allowed to trigger POST /api/knowledge-base/reload (comma-separated emails; empty = nobody)
+    KB_ADMIN_EMAILS: frozenset = frozenset(
+        e.strip().lower() for e in os.getenv("KB_ADMIN_EMAILS", "").split(",") if e.strip()
+    )
+
+    # A verify-only Qdrant collection found missing is re-checked at most this often (0 = every call)
+    QDRANT_MISSING_COLLECTION_TTL_SECONDS: float = float(os.getenv("QDRANT_MISSING_COLLECTION_TTL_SECONDS", "10"))
+
+    # Optional dense (MiniLM) index over OQA question+context, fused with BM25 in retrieve_oqa
+    OQA_DENSE_ENABLED: bool = os.getenv("OQA_DENSE_ENABLED", "false").lower() == "true"
+
+    # Weight of the dense cosine score in the hybrid OQA score (0 = BM25 only, 1 = dense only)
+    OQA_DENSE_WEIGHT: float = float(os.getenv("OQA_DENSE_WEIGHT", "0.5"))
+
+
+# Global config instance
+kb_config = KBConfig()
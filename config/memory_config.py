@@ -0,0 +1,66 @@
+"""
+User memory configuration settings
+"""
+
+import os
+
+
+class MemoryConfig:
+    """Configuration for the user memory store (Qdrant `user_memory` collection)"""
+
+    # Vector profile for a newly created memory collection:
+    #   "full" - dense + sparse + ColBERT multivectors, reranked inside Qdrant
+    #   "lite" - dense + sparse only, candidates reranked client-side (far smaller points)
+    # Existing collections keep the profile they were created with.
+    MEMORY_VECTOR_PROFILE: str = os.getenv("MEMORY_VECTOR_PROFILE", "full").lower()
+
+    # Client-side rerank for "lite" collections: "dense" (re-score stored MiniLM vectors)
+    # or "colbert" (embed the candidates with ColBERT on the fly)
+    MEMORY_LITE_RERANK: str = os.getenv("MEMORY_LITE_RERANK", "dense").lower()
+
+    # In-process per-user hot cache of memory texts + dense vectors
+    MEMORY_CACHE_ENABLED: bool = os.getenv("MEMORY_CACHE_ENABLED", "true").lower() == "true"
+
+    # LRU bounds for the cache (whole users are evicted)
+    MEMORY_CACHE_MAX_USERS: int = int(os.getenv("MEMORY_CACHE_MAX_USERS", "2000"))
+    MEMORY_CACHE_MAX_BYTES: int = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Users with at most this many memories are scored locally instead of via Qdrant
+    MEMORY_CACHE_SMALL_SET: int = int(os.getenv("MEMORY_CACHE_SMALL_SET", "64"))
+
+    # Cached entries are reloaded after this long, bounding staleness across workers
+    MEMORY_CACHE_TTL_SECONDS: int = int(os.getenv("MEMORY_CACHE_TTL_SECONDS", "300"))
+
+    # Per-user memory counts (let RetrieveFromMemory skip users with no memories)
+    MEMORY_COUNT_MAX_USERS: int = int(os.getenv("MEMORY_COUNT_MAX_USERS", "50000"))
+    # Zero counts are re-checked sooner: a memory written by another worker must not stay
+    # invisible for the full TTL (0 disables the separate expiry)
+    MEMORY_COUNT_ZERO_TTL_SECONDS: int = int(os.getenv("MEMORY_COUNT_ZERO_TTL_SECONDS", "30"))
+
+    # Users with at most this many memories are searched with the raw query (no LLM rewrite)
+    MEMORY_RAW_QUERY_MAX_COUNT: int = int(os.getenv("MEMORY_RAW_QUERY_MAX_COUNT", "8"))
+
+    # Retention: memories older than this are hidden from retrieval and purged (0 = keep forever)
+    MEMORY_TTL_DAYS: float = float(os.getenv("MEMORY_TTL_DAYS", "0"))
+
+    # Recency weighting: score *= (1 - w) + w * 0.5 ** (age / half_life)  (w = 0 disables)
+    # Off by default: a positive weight changes memory ranking for every user
+    MEMORY_RECENCY_WEIGHT: float = float(os.getenv("MEMORY_RECENCY_WEIGHT", "0"))
+    MEMORY_RECENCY_HALF_LIFE_DAYS: float = float(os.getenv("MEMORY_RECENCY_HALF_LIFE_DAYS", "90"))
+
+    # Background compaction (TTL purge + dedup): 0 disables the worker. Each pass takes a Postgres
+    # advisory lock, so only one uvicorn worker/replica compacts at a time
+    MEMORY_COMPACTION_INTERVAL_SECONDS: int = int(os.getenv("MEMORY_COMPACTION_INTERVAL_SECONDS", "0"))
+
+    # Purge of memories past MEMORY_TTL_DAYS, independent of compaction (0 disables; no-op without a TTL)
+    MEMORY_PURGE_INTERVAL_SECONDS: int = int(os.getenv("MEMORY_PURGE_INTERVAL_SECONDS", "3600"))
+
+    # Memories at least this cosine-similar to a newer one are merged into it (the older one is removed)
+    MEMORY_DEDUP_SIMILARITY: float = float(os.getenv("MEMORY_DEDUP_SIMILARITY", "0.92"))
+
+    # Hard cap on memories kept per user by compaction (oldest dropped first; 0 = no cap)
+    MEMORY_MAX_PER_USER: int = int(os.getenv("MEMORY_MAX_PER_USER", "200"))
+
+
+# Global config instance
+memory_config = MemoryConfig()
@@ -7,7 +7,7 @@ from .flows import MedFlow, create_oqa_orthodontist_flow
 
 __all__ = [
     "MedFlow",
-    # "create_oqa_orthodontist_flow",
+    "create_oqa_orthodontist_flow",
     # "OQAIngestDefaults",
     # "OQAClassifyEN",
     # "OQARetrieve",
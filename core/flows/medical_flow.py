@@ -10,6 +10,10 @@ from ..nodes import (
     RetrieveFromKBWithoutDemuc,
     TopicClassifyAgent
 )
+from ..nodes import (
+    OQAIngestDefaults, OQAClassifyEN, OQARetrieve, OQAComposeAnswerVIWithSources,
+    OQAClarify, OQAChitChat
+)
 from ..nodes import (
     IngestQuery, DecideSummarizeConversationToRetriveOrDirectlyAnswer, RagAgent, ComposeAnswer,
     FallbackNode,QueryCreatingForRetrievalAgent
@@ -92,6 +96,28 @@ class MedFlow(AsyncFlow):
         super().__init__(start=ingest)
 
 
+@trace_flow(flow_name="OQAFlow")
+class OQAFlow(AsyncFlow):
+    """Orthodontist (ORTHODONTIST role) flow over the English OQA dataset."""
+    def __init__(self):
+        ingest = OQAIngestDefaults()
+        classify = OQAClassifyEN()
+        retrieve = OQARetrieve()
+        compose = OQAComposeAnswerVIWithSources()
+        clarify = OQAClarify()
+        chitchat = OQAChitChat()
+
+        # ============= FLOW DEFINITION =============
+        ingest >> classify
+        classify - "chitchat" >> chitchat
+        classify - "retrieve_kb" >> retrieve
+
+        # Low retrieval score -> ask the user to rephrase instead of composing
+        retrieve - "default" >> compose
+        retrieve - "clarify" >> clarify
+
+        super().__init__(start=ingest)
+
+
 def create_oqa_orthodontist_flow():
-    from core.pocketflow import AsyncFlow
-    return AsyncFlow(start=None)
+    return OQAFlow()
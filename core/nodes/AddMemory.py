@@ -1,11 +1,13 @@
 # Core framework import
-from core.pocketflow import AsyncParallelBatchNode
+from core.pocketflow import AsyncNode
 
 # Standard library imports
+import asyncio
 import logging
+from typing import Any, Dict, List
 
 # Local imports
-from utils.knowledge_base.memory_retrieval import save_user_memory
+from utils.knowledge_base.memory_retrieval import save_user_memories
 
 # Configure logging for this module with Vietnam timezone
 from utils.timezone_utils import setup_vietnam_logging
@@ -20,66 +22,106 @@ else:
     logger.setLevel(getattr(logging, logging_config.LOG_LEVEL.upper()))
 
 
-class AddMemory(AsyncParallelBatchNode):
+def build_memory_write_items(user_id, insert_operations, update_operations) -> List[Dict[str, Any]]:
+    """Flatten MemoryManager insert/update operations into one list of write items."""
+    items = [
+        {"op": "insert", "index": i, "user_id": user_id, "memory_id": None, "content": op.get("content")}
+        for i, op in enumerate(insert_operations or [], 1)
+    ]
+    items += [
+        {"op": "update", "index": i, "user_id": user_id, "memory_id": op.get("memory_id"), "content": op.get("content")}
+        for i, op in enumerate(update_operations or [], 1)
+    ]
+    return items
+
+
+async def write_memory_batch(user_id, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate write items and persist the valid ones with a single bulk call
+    (one embedding batch per model + one upsert). Returns one result per item.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    valid: List[int] = []
+    for pos, item in enumerate(items):
+        base = {"op": item["op"], "index": item["index"]}
+        if item["op"] == "update":
+            base["memory_id"] = item.get("memory_id")
+        content = item.get("content")
+        if not user_id:
+            results[pos] = {**base, "success": False, "reason": "Missing user_id"}
+        elif item["op"] == "update" and not item.get("memory_id"):
+            results[pos] = {**base, "success": False, "reason": "Missing memory_id"}
+        elif not content or not content.strip():
+            results[pos] = {**base, "success": False, "reason": "Empty content"}
+        else:
+            valid.append(pos)
+
+    if valid:
+        entries = [{"query": items[pos]["content"], "point_id": items[pos].get("memory_id")} for pos in valid]
+        # Run synchronous bulk save in executor to avoid blocking
+        loop = asyncio.get_running_loop()
+        point_ids = await loop.run_in_executor(None, lambda: save_user_memories(user_id, entries))
+        for pos in valid:
+            item = items[pos]
+            base = {"op": item["op"], "index": item["index"]}
+            if item["op"] == "update":
+                base["memory_id"] = item["memory_id"]
+            if point_ids is not None:
+                results[pos] = {**base, "success": True, "content": item["content"][:100]}
+            else:
+                reason = "Update operation failed" if item["op"] == "update" else "Save operation failed"
+                results[pos] = {**base, "success": False, "reason": reason}
+
+    return [results[pos] for pos in range(len(items))]
+
+
+class AddMemory(AsyncNode):
     """
     AddMemory - Worker node that executes INSERT operations.
     Creates new memory entries based on decisions from MemoryManager.
+    Pending UPDATE operations ride along in the same bulk write, so all
+    memory writes of a turn cost one embedding batch and one upsert.
     """
 
     async def prep_async(self, shared):
         user_id = shared.get("user_id")
         memory_operations = shared.get("memory_operations", {})
         insert_operations = memory_operations.get("insert", [])
+        update_operations = memory_operations.get("update", [])
 
-        logger.info(f"➕ [AddMemory] PREP - User ID: {user_id}, {len(insert_operations)} insert operation(s)")
+        logger.info(f"➕ [AddMemory] PREP - User ID: {user_id}, {len(insert_operations)} insert, {len(update_operations)} update operation(s)")
 
-        # If no insert operations, return empty list to skip execution
-        if not insert_operations:
-            logger.info(f"➕ [AddMemory] PREP - No insert operations, skipping")
+        # If no write operations, return empty list to skip execution
+        if not insert_operations and not update_operations:
+            logger.info(f"➕ [AddMemory] PREP - No insert/update operations, skipping")
             return []
 
         logger.info(f"➕ [AddMemory] PREP - Memory operations from shared: {memory_operations}")
-        logger.info(f"➕ [AddMemory] PREP - Insert operations: {insert_operations}")
 
-        # Return list of items for batch processing (each item is a dict with operation data)
-        batch_items = [{"user_id": user_id, "content": op.get("content"), "index": i}
-                       for i, op in enumerate(insert_operations, 1)]
-
-        logger.info(f"➕ [AddMemory] PREP - Returning {len(batch_items)} batch items")
+        batch_items = build_memory_write_items(user_id, insert_operations, update_operations)
+        logger.info(f"➕ [AddMemory] PREP - Returning {len(batch_items)} write items for one bulk write")
         return batch_items
 
-    async def exec_async(self, item):
-        """Execute a single INSERT operation (called in parallel for each item)"""
-        user_id = item["user_id"]
-        content = item["content"]
-        index = item["index"]
-
-        if not user_id:
-            logger.warning(f"➕ [AddMemory] EXEC [{index}] - Missing user_id")
-            return {"index": index, "success": False, "reason": "Missing user_id"}
-
-        if not content or not content.strip():
-            logger.warning(f"➕ [AddMemory] EXEC [{index}] - Empty content, skipping")
-            return {"index": index, "success": False, "reason": "Empty content"}
-
-        # Run synchronous save_user_memory in executor to avoid blocking
-        import asyncio
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(None, save_user_memory, user_id, content)
-
-        if success:
-            logger.info(f"➕ [AddMemory] EXEC [{index}] - INSERT successful - '{content[:50]}...'")
-            return {"index": index, "success": True, "content": content[:100]}
-        else:
-            logger.error(f"➕ [AddMemory] EXEC [{index}] - INSERT failed - '{content[:50]}...'")
-            return {"index": index, "success": False, "reason": "Save operation failed"}
-
-    async def exec_fallback_async(self, item, exc):
-        """Fallback when INSERT operation fails after max retries"""
-        index = item.get("index", 0)
-        content = item.get("content", "")
-        logger.error(f"➕ [AddMemory] FALLBACK [{index}] - Failed after {self.max_retries} retries: {exc}")
-        return {"index": index, "success": False, "reason": f"Failed after {self.max_retries} retries", "content": content[:50]}
+    async def exec_async(self, items):
+        """Execute all INSERT (and pending UPDATE) operations as one bulk write"""
+        if not items:
+            return []
+        results = await write_memory_batch(items[0]["user_id"], items)
+        for r in results:
+            if r.get("success"):
+                logger.info(f"➕ [AddMemory] EXEC [{r['op']} {r['index']}] - successful - '{r.get('content', '')[:50]}...'")
+            else:
+                logger.error(f"➕ [AddMemory] EXEC [{r['op']} {r['index']}] - failed: {r.get('reason')}")
+        return results
+
+    async def exec_fallback_async(self, items, exc):
+        """Fallback when the bulk write fails after max retries"""
+        logger.error(f"➕ [AddMemory] FALLBACK - Failed after {self.max_retries} retries: {exc}")
+        return [
+            {"op": item["op"], "index": item["index"], "success": False,
+             "reason": f"Failed after {self.max_retries} retries", "content": (item.get("content") or "")[:50]}
+            for item in (items or [])
+        ]
 
     async def post_async(self, shared, prep_res, exec_res):
         # Handle None exec_res (unhandled exceptions)
@@ -88,25 +130,40 @@ class AddMemory(AsyncParallelBatchNode):
             shared["add_memory_result"] = {"success": False, "inserted": 0, "total": 0, "results": [], "error": "Unhandled exception"}
             return "default"
 
-        # exec_res is a list of results from all parallel executions
+        # exec_res is a list of results from the bulk write
         if not exec_res:
             logger.info(f"➕ [AddMemory] POST - No operations executed")
             shared["add_memory_result"] = {"success": True, "inserted": 0, "total": 0, "results": []}
             return "default"
 
-        success_count = sum(1 for r in exec_res if r.get("success"))
-        total = len(exec_res)
+        insert_results = [r for r in exec_res if r.get("op") == "insert"]
+        update_results = [r for r in exec_res if r.get("op") == "update"]
+
+        success_count = sum(1 for r in insert_results if r.get("success"))
+        total = len(insert_results)
 
         result = {
             "success": success_count > 0,
             "inserted": success_count,
             "total": total,
-            "results": exec_res
+            "results": insert_results
         }
 
         # Store results in shared state
         shared["add_memory_result"] = result
 
-        logger.info(f"➕ [AddMemory] POST - Completed: {success_count}/{total} successful (parallel execution)")
+        # Updates were written in the same batch; UpdateMemory sees this and skips
+        if update_results:
+            updated = sum(1 for r in update_results if r.get("success"))
+            shared["update_memory_result"] = {
+                "success": updated > 0,
+                "updated": updated,
+                "total": len(update_results),
+                "results": update_results,
+                "batched_with_insert": True,
+            }
+
+        logger.info(f"➕ [AddMemory] POST - Completed: {success_count}/{total} inserts, "
+                    f"{len(update_results)} update(s) in the same bulk write")
 
         return "default"
@@ -7,8 +7,9 @@ import logging
 # Third-party imports
 from utils.knowledge_base.qdrant_retrieval import get_full_qa_by_ids
 from utils.role_enum import RoleEnum, PERSONA_BY_ROLE
-from utils.helpers import format_kb_qa_list
-from utils.llm import call_llm
+from utils.helpers import format_kb_qa_items
+from utils.llm import call_llm_with_prefix
+from utils.llm.prompt_builder import PromptBuilder, dedupe_kb_hits, PRIORITY_KB, PRIORITY_MEMORY, PRIORITY_QUERY
 from utils.parsing import parse_yaml_with_schema
 from utils.llm.call_llm import APIOverloadException
 from config.timeout_config import timeout_config
@@ -27,6 +28,28 @@ else:
     logger.setLevel(getattr(logging, logging_config.LOG_LEVEL.upper()))
 
 
+# Same text for every call with the same role: served from the provider's context cache
+COMPOSE_ANSWER_PREFIX = """
+Hay cung cấp tri thức y khoa dựa trên cơ sở tri thức do bác sĩ biên soạn.
+User là :{audience}
+
+Lưu ý quan trọng:
+1) Phong cách: {tone}.
+2) Kết thúc bằng một dòng tóm lược bắt đầu bằng "👉 Tóm lại,".
+
+```yaml
+explanation: |
+  <viết câu trả lời trực tiếp vào vấn đề dựa vào thông tin từ danh sách Q&A đã retrieve; KHÔNG bắt đầu bằng Chào bạn; dùng **nhấn mạnh** cho các từ khoá quan trọng>
+  👉 Tóm lại, <tóm lược ngắn gọn>
+suggestion_questions:
+  - "Câu hỏi gợi ý 1"
+  - "Câu hỏi gợi ý 2"
+  - "Câu hỏi gợi ý 3"
+```
+Chú ý suggestion_questions là list, KHÔNG có dấu |.
+"""
+
+
 class ComposeAnswer(Node):
     def prep(self, shared):
         # Role to collection mapping
@@ -97,46 +120,40 @@ class ComposeAnswer(Node):
             role = "patient_diabetes"  # Default fallback role
 
         persona = PERSONA_BY_ROLE[role]
-        # Compact KB context
-        relevant_info_from_kb = format_kb_qa_list(retrieved)
+        # Compact KB context (the same Q&A can come back from several collections);
+        # how many Q&As fit is left to the compose_answer token budget
+        kb_items = format_kb_qa_items(dedupe_kb_hits(retrieved))
 
-        # Build memory context
-        memory_context = ""
-        if relevant_memories:
-            memory_list = "\n".join([f"- {m.get('query', '')}" for m in relevant_memories[:3]])
-            memory_context = f"\nThông tin từ các câu hỏi trước đây của người dùng (tham khảo thêm):\n{memory_list}\n"
+        # Memory context
+        memory_items = [f"- {m.get('query', '')}" for m in relevant_memories[:3] if m.get("query")]
 
-        prompt = f"""
-Hay cung cấp tri thức y khoa dựa trên cơ sở tri thức do bác sĩ biên soạn.
-User là :{ persona["audience"] }
+        # Static per-role prefix (cacheable), then the per-call query, Q&As and memories
+        prefix = COMPOSE_ANSWER_PREFIX.format(audience=persona["audience"], tone=persona["tone"])
+        template = """
 Câu hỏi cần trả lời: {query}
 
 Danh sách Q&A đã retrieve:
 {relevant_info_from_kb}
 
 {memory_context}
-
-Lưu ý quan trọng:
-1) Phong cách: { persona["tone"]}.
-2) Kết thúc bằng một dòng tóm lược bắt đầu bằng "👉 Tóm lại,".
-
-```yaml
-explanation: |
-  <viết câu trả lời trực tiếp vào vấn đề dựa vào thông tin từ danh sách Q&A đã retrieve; KHÔNG bắt đầu bằng Chào bạn; dùng **nhấn mạnh** cho các từ khoá quan trọng>
-  👉 Tóm lại, <tóm lược ngắn gọn>
-suggestion_questions:
-  - "Câu hỏi gợi ý 1"
-  - "Câu hỏi gợi ý 2"
-  - "Câu hỏi gợi ý 3"
-```
-
-Trả về chính xác cấu trúc yaml như ở trên (chú ý suggestion_questions là list, KHÔNG có dấu |):
+Trả về chính xác cấu trúc yaml như ở trên:
 """
+        built = (
+            PromptBuilder("compose_answer", template, prefix=prefix)
+            .add("query", query, PRIORITY_QUERY, required=True)
+            .add_items("relevant_info_from_kb", kb_items, PRIORITY_KB, separator="\n\n")
+            .add_items("memory_context", memory_items, PRIORITY_MEMORY,
+                       header="\nThông tin từ các câu hỏi trước đây của người dùng (tham khảo thêm):\n")
+            .build()
+        )
+        prompt = built.text
         # Log prompt with truncation to avoid flooding logs
         logger.info(f"✍️ [ComposeAnswer] EXEC - Full prompt: {prompt}")
 
         # Use proper timeout from config instead of hardcoded 1 second
-        result = call_llm(prompt, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
+        result = call_llm_with_prefix(
+            f"compose_answer:{role}", built.prefix, built.suffix, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT
+        )
         logger.info(f"✍️ [ComposeAnswer] EXEC - LLM response received: {result}")
         # Parse and validate response structure
         parsed_result = parse_yaml_with_schema(
@@ -39,6 +39,7 @@ class DecideSummarizeConversationToRetriveOrDirectlyAnswer(Node):
         from utils.llm import call_llm
         from utils.parsing import parse_yaml_with_schema
         from utils.llm.call_llm import APIOverloadException
+        from utils.llm.prompt_builder import PromptBuilder, PRIORITY_QUERY, PRIORITY_MEMORY, PRIORITY_HISTORY
         from config.timeout_config import timeout_config
         from utils.role_enum import RoleEnum, ROLE_DISPLAY_NAME
 
@@ -49,24 +50,10 @@ class DecideSummarizeConversationToRetriveOrDirectlyAnswer(Node):
 
         user_role_name = ROLE_DISPLAY_NAME.get(RoleEnum(role))
 
-        # Build conversation history context if available
-        history_context = ""
-        if formatted_history:
-            history_context = f"""
-Lịch sử hội thoại gần đây:
-{formatted_history}
-"""
-
-        # Build memory context if available
-        memory_context = ""
-        if relevant_memories:
-            memory_list = "\n".join([f"- {m.get('query', '')}" for m in relevant_memories[:5]]) # Top 5 memories
-            memory_context = f"""
-Các vấn đề người dùng từng quan tâm/hỏi trước đây (Context bộ nhớ):
-{memory_list}
-"""
+        history_lines = formatted_history.splitlines() if formatted_history else []
+        memory_items = [f"- {m.get('query', '')}" for m in relevant_memories[:5] if m.get("query")]  # Top 5 memories
 
-        prompt = f"""Bạn là bot trợ lý y tế, chỉ trao đổi quanh chủ đề y tế.
+        template = """Bạn là bot trợ lý y tế, chỉ trao đổi quanh chủ đề y tế.
 {history_context}
 {memory_context}
 
@@ -94,6 +81,17 @@ context_summary: |
 
 Trả về YAML như mẫu :
 """
+        prompt = (
+            PromptBuilder("decide_action", template)
+            .add("query", query, PRIORITY_QUERY, required=True)
+            .add("user_role_name", user_role_name, required=True)
+            .add_items("memory_context", memory_items, PRIORITY_MEMORY,
+                       header="\nCác vấn đề người dùng từng quan tâm/hỏi trước đây (Context bộ nhớ):\n")
+            .add_items("history_context", history_lines, PRIORITY_HISTORY,
+                       header="\nLịch sử hội thoại gần đây:\n", keep_newest=True)
+            .build()
+            .text
+        )
         logger.info(f"[DecideSummarizeConversationToRetriveOrDirectlyAnswer] prompt: {prompt}")
 
         resp = call_llm(prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
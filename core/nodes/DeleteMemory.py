@@ -84,10 +84,10 @@ class DeleteMemory(AsyncNode):
         if memory_ids_to_delete:
             # Run synchronous delete_user_memory in executor to avoid blocking
             import asyncio
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
             success = await loop.run_in_executor(
                 None,
-                lambda: delete_user_memory(point_ids=memory_ids_to_delete)
+                lambda: delete_user_memory(point_ids=memory_ids_to_delete, user_id=user_id)
             )
 
             if success:
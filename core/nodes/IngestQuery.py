@@ -24,11 +24,13 @@ class IngestQuery(Node):
         role = shared.get("role", "")
         user_input = shared.get("input", "")
         conversation_history = shared.get("conversation_history", [])
+        conversation_summary = shared.get("conversation_summary", "")
         logger.info(f"🔍 [IngestQuery] PREP - Role: {role}, Users Input: {user_input}")
         return {
             "role": role,
             "user_input": user_input,
-            "conversation_history": conversation_history
+            "conversation_history": conversation_history,
+            "conversation_summary": conversation_summary
         }
 
     def exec(self, inputs):
@@ -40,6 +42,12 @@ class IngestQuery(Node):
         # Format conversation history (toàn bộ, không truncate)
         formatted_history = self._format_conversation_history(conversation_history)
 
+        # Rolling summary of older turns (history then only holds the newer messages); this is
+        # the only place it enters the prompts
+        conversation_summary = inputs.get("conversation_summary", "")
+        if conversation_summary:
+            formatted_history = f"Tóm tắt hội thoại trước: {conversation_summary}\n{formatted_history}".rstrip()
+
         result = {
             "role": role,
             "query": user_input.strip(),
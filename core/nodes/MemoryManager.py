@@ -54,6 +54,7 @@ class MemoryManager(AsyncNode):
         from utils.llm import call_llm
         from utils.parsing import parse_yaml_with_schema
         from utils.llm.call_llm import APIOverloadException
+        from utils.llm.prompt_builder import PromptBuilder, PRIORITY_QUERY, PRIORITY_MEMORY, PRIORITY_HISTORY
         from config.timeout_config import timeout_config
         from utils.role_enum import RoleEnum, ROLE_DISPLAY_NAME
 
@@ -83,27 +84,21 @@ class MemoryManager(AsyncNode):
         # Format existing memories for the prompt
         vietnameseRole = ROLE_DISPLAY_NAME.get(RoleEnum(role), "Người dùng") if role else "Người dùng"
 
-        memories_context = ""
-        if relevant_memories:
-            memories_list = []
-            for i, mem in enumerate(relevant_memories[:10], 1):  # Show top 10
-                memories_list.append(
-                    f"  - ID: {mem.get('id')}\n"
-                    f"    Nội dung: {mem.get('query', '')}\n"
-                    f"    Score: {mem.get('score', 0):.3f}"
-                )
-            memories_context = f"\n# CÁC MEMORY ĐÃ TỒN TẠI (Top 10):\n" + "\n".join(memories_list)
-        else:
-            memories_context = "\n# CÁC MEMORY ĐÃ TỒN TẠI: Không có memory nào."
-
-        prompt = f"""
+        memory_items = [
+            f"  - ID: {mem.get('id')}\n"
+            f"    Nội dung: {mem.get('query', '')}\n"
+            f"    Score: {mem.get('score', 0):.3f}"
+            for mem in relevant_memories[:10]  # Show top 10
+        ]
+
+        template = """
 # NHIỆM VỤ:
 Bạn là Memory Manager - hệ thống quản lý bộ nhớ thông minh về *NGƯỜI DÙNG* mục tiêu cho cá nhân hoá. Phân tích hội thoại và quyết định các thao tác cần thực hiện.
 
 # BỐI CẢNH HỘI THOẠI:
 - Tóm tắt hội thoại trước: {context_summary}
 - Người dùng ({vietnameseRole}): "{query}"
-- AI trả lời: "{ai_response[:300]}..."
+- AI trả lời: "{ai_response}..."
 {memories_context}
 
 # CÁC THAO TÁC:
@@ -138,6 +133,18 @@ importance: "high"
 
 Trả về duy nhất một block code YAML (nhớ bao gồm field "reason"):
 """
+        prompt = (
+            PromptBuilder("memory_manager", template)
+            .add("query", query, PRIORITY_QUERY, required=True)
+            .add("vietnameseRole", vietnameseRole, required=True)
+            .add("ai_response", ai_response[:300], required=True)
+            .add_items("memories_context", memory_items, PRIORITY_MEMORY,
+                       header="\n# CÁC MEMORY ĐÃ TỒN TẠI (Top 10):\n",
+                       empty="\n# CÁC MEMORY ĐÃ TỒN TẠI: Không có memory nào.")
+            .add("context_summary", context_summary, PRIORITY_HISTORY)
+            .build()
+            .text
+        )
 
         logger.info(f"🎯 [MemoryManager] EXEC - Analyzing operations with LLM")
 
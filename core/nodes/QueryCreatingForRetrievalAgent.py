@@ -47,6 +47,7 @@ class QueryCreatingForRetrievalAgent(Node):
         from utils.llm import call_llm
         from utils.parsing import parse_yaml_with_schema
         from utils.llm.call_llm import APIOverloadException
+        from utils.llm.prompt_builder import PromptBuilder, PRIORITY_QUERY, PRIORITY_HISTORY
         from config.timeout_config import timeout_config
         from utils.role_enum import RoleEnum, ROLE_DISPLAY_NAME
         
@@ -65,7 +66,7 @@ class QueryCreatingForRetrievalAgent(Node):
         reason_final = f"- Lý do cần tạo là: {reason}" if reason else ""
     
         
-        prompt = f"""
+        template = """
 BỐI CẢNH:
 -Tóm tắt hội thoại trước đó: {context_summary}
 - Câu hỏi hiện tại của người dùng: "{current_user_input}"
@@ -83,6 +84,16 @@ retrieval_query: "Câu hỏi đã được viết lại cho rõ ràng hơn"
 reason: "Lý do ngắn gọn về cách tạo query"
 confidence: "high"  # hoặc medium, low
 ```"""
+        prompt = (
+            PromptBuilder("query_creation", template)
+            .add("current_user_input", current_user_input, PRIORITY_QUERY, required=True)
+            .add("reason_final", reason_final, required=True)
+            .add("vietnameseRole", vietnameseRole, required=True)
+            .add("topic_context", topic_context, required=True)
+            .add("context_summary", context_summary, PRIORITY_HISTORY)
+            .build()
+            .text
+        )
 
         try:
             logger.info(f"🔍 [QueryCreatingForRetrievalAgent] EXEC - prompts: '{prompt}")
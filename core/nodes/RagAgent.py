@@ -21,6 +21,21 @@ else:
 # Constants
 MAX_RETRIEVAL_LOOPS = 2  # Maximum number of retrieval attempts before forcing compose_answer
 
+# Instructions shared by every call: served from the provider's context cache
+RAG_AGENT_PREFIX = f"""Bạn là Orchestrator RAG Agent đưa ra quyết định dựa vào thông tin được cung cấp bên dưới.
+
+Tiêu chí đánh giá:
+Chọn một trong các actions sau:
+- create_retrieval_query: Update usser query  không có đầy đủ dấu hoặc viết tắt, hoặc chưa rõ ràng.
+- retrieve_kb: Truy xuất thông tin QA dùng user query, nếu không có câu hỏi đã retrieve nào liên quan tới user query.
+- compose_answer: Chuyển tiếp cho agent khác để soạn trả lời nếu các câu hỏi được truy xuất có liên quan cao, Và bắt buộc  nếu  Retrieve attempts lớn hơn {MAX_RETRIEVAL_LOOPS}.
+
+```yaml
+reason: <nếu chọn create_retrieval_query cân giải thích để agent khác hiểu tại sao và cần update lại như thế nào>
+next_action: <create_retrieval_query | retrieve_kb | compose_answer>
+```
+"""
+
 
 class RagAgent(Node):
     """
@@ -60,9 +75,12 @@ class RagAgent(Node):
         }
 
     def exec(self, inputs):
-        from utils.llm import call_llm
+        from utils.llm import call_llm_with_prefix
         from utils.parsing import parse_yaml_with_schema
         from utils.llm.call_llm import APIOverloadException
+        from utils.llm.prompt_builder import (
+            PromptBuilder, dedupe_texts, PRIORITY_QUERY, PRIORITY_KB, PRIORITY_MEMORY, PRIORITY_HISTORY
+        )
         from config.timeout_config import timeout_config
         
         # Handle hard check fallback from prep()
@@ -77,18 +95,16 @@ class RagAgent(Node):
         action_history = inputs["action_history"]
         relevant_memories = inputs.get("relevant_memories", [])
 
-        conversation_context = f"Hội thoại tóm tắt (Context): {context_summary}" if context_summary else "Hội thoại vừa bắt đầu."
-        current_knowledge = selected_questions if selected_questions else "Chưa có thông tin (Empty)"
-
-        # Build memory context
-        memory_context = ""
-        if relevant_memories:
-            memory_list = "\n".join([f"- {m.get('query', '')}" for m in relevant_memories[:5]])
-            memory_context = f"Lịch sử quan tâm của người dùng (Memory):\n{memory_list}"
+        # Candidate questions from retrieval rounds (often overlapping) or the "nothing yet" note
+        if isinstance(selected_questions, (list, tuple)):
+            knowledge_items = [f"- {q}" for q in dedupe_texts(str(q) for q in selected_questions if q)]
+        else:
+            knowledge_items = [str(selected_questions)] if selected_questions else []
+        memory_items = [f"- {m.get('query', '')}" for m in relevant_memories[:5] if m.get("query")]
 
-        prompt = f"""Bạn là Orchestrator RAG Agent đưa ra quyết định dựa vào thông tin sau.
+        template = """
 User query: "{query}"
-Attempts: {attempts}/{MAX_RETRIEVAL_LOOPS}
+Attempts: {attempts}/{max_loops}
 
 Trạng thái trước đó: {rag_state}
 Thông tin đã tìm được với query: 
@@ -97,24 +113,30 @@ Thông tin đã tìm được với query:
 {conversation_context}
 {memory_context}
 
-Tiêu chí đánh giá:
-Chọn một trong các actions sau:
-- create_retrieval_query: Update usser query  không có đầy đủ dấu hoặc viết tắt, hoặc chưa rõ ràng.
-- retrieve_kb: Truy xuất thông tin QA dùng user query, nếu không có câu hỏi đã retrieve nào liên quan tới user query.
-- compose_answer: Chuyển tiếp cho agent khác để soạn trả lời nếu các câu hỏi được truy xuất có liên quan cao, Và bắt buộc  nếu  Retrieve attempts lớn hơn {MAX_RETRIEVAL_LOOPS}.
-
-```yaml
-reason: <nếu chọn create_retrieval_query cân giải thích để agent khác hiểu tại sao và cần update lại như thế nào>
-next_action: <create_retrieval_query | retrieve_kb | compose_answer>
-```
-
 Trả về chính xác cấu trúc yml trên:
 """
+        built = (
+            PromptBuilder("rag_agent", template, prefix=RAG_AGENT_PREFIX)
+            .add("query", query, PRIORITY_QUERY, required=True)
+            .add("attempts", str(attempts), required=True)
+            .add("max_loops", str(MAX_RETRIEVAL_LOOPS), required=True)
+            .add("rag_state", str(rag_state), required=True)
+            .add_items("current_knowledge", knowledge_items, PRIORITY_KB, empty="Chưa có thông tin (Empty)")
+            .add_items("memory_context", memory_items, PRIORITY_MEMORY,
+                       header="Lịch sử quan tâm của người dùng (Memory):\n")
+            .add("conversation_context",
+                 f"Hội thoại tóm tắt (Context): {context_summary}" if context_summary else "Hội thoại vừa bắt đầu.",
+                 PRIORITY_HISTORY)
+            .build()
+        )
+        prompt = built.text
 
         try:
             logger.info(f"  [RagAgent] EXEC - prompt :{prompt}")
             
-            resp = call_llm(prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
+            resp = call_llm_with_prefix(
+                "rag_agent", built.prefix, built.suffix, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT
+            )
             logger.info(f"  [RagAgent] EXEC - resp :{resp}")
 
             result = parse_yaml_with_schema(
@@ -61,8 +61,7 @@ class RetrieveFromKBWithDemuc(Node):
         role = inputs["role"]
         top_k = inputs["top_k"]
         
-        # Call Qdrant retrieval utility function with cached embeddings
-        from utils.knowledge_base.qdrant_retrieval import retrieve_from_qdrant_with_cached_embeddings
+        from utils.knowledge_base.fused_retrieval import embed_queries, global_kb_searches, search_kb_batch
 
         # Map role to collection name
         collection_name = ROLE_TO_COLLECTION.get(role, "bnrhm")
@@ -71,34 +70,24 @@ class RetrieveFromKBWithDemuc(Node):
         # 1. Search WITH demuc filter on current role's collection (narrow context)
         # 2. Search WITHOUT filters on ALL 4 collections (global context)
         # 3. Combine and deduplicate
-        
-        # NEW: Embed query ONCE and reuse for all searches
+        # The query is embedded once; searches on the same collection share one batch request.
         logger.info(f"📚 [RetrieveFromKBWithDemuc] Embedding query once for reuse...")
-        
+        embeddings = embed_queries([retrieve_query])[0]
+
+        global_searches = global_kb_searches(list(ROLE_TO_COLLECTION.values()), top_k)
+        searches = [{"slot": "filtered", "collection": collection_name, "demuc": demuc, "top_k": top_k}]
+        results_by_slot = search_kb_batch(searches + global_searches, embeddings)
+
         # 1. Filtered search (by demuc only) on current role's collection
-        retrieved_results_filtered, embeddings = retrieve_from_qdrant_with_cached_embeddings(
-            query=retrieve_query,
-            demuc=demuc,
-            chu_de_con=None,  # Ignore sub-topic
-            top_k=top_k,
-            collection_name=collection_name,
-            return_embeddings=True  # Get embeddings for reuse
-        )
-        
-        # 2. Global search across ALL 4 collections (no filters) - REUSE embeddings
+        retrieved_results_filtered = results_by_slot.get("filtered", [])
+
+        # 2. Global search across ALL 4 collections (no filters)
         retrieved_results_global = []
-        for col_role, col_name in ROLE_TO_COLLECTION.items():
-            results, _ = retrieve_from_qdrant_with_cached_embeddings(
-                query=retrieve_query,
-                demuc=None,
-                chu_de_con=None,
-                top_k=top_k // 2 ,  # Get fewer from each collection to balance
-                collection_name=col_name,
-                embeddings=embeddings  # REUSE embeddings instead of re-computing
-            )
+        for search in global_searches:
+            results = results_by_slot.get(search["slot"], [])
             retrieved_results_global.extend(results)
-            logger.info(f"📚 [RetrieveFromKBWithDemuc] Global search from '{col_name}': {len(results)} results")
-        
+            logger.info(f"📚 [RetrieveFromKBWithDemuc] Global search from '{search['collection']}': {len(results)} results")
+
         # 3. Combine results: Filtered first (more relevant), then Global
         retrieved_results = retrieved_results_filtered + retrieved_results_global
         
@@ -5,7 +5,8 @@ from pocketflow import Node
 import logging
 
 # Local imports
-from utils.knowledge_base.memory_retrieval import retrieve_user_memory
+from utils.knowledge_base.memory_retrieval import get_user_memory_count, retrieve_user_memory
+from config.memory_config import memory_config
 
 # Configure logging for this module with Vietnam timezone
 from utils.timezone_utils import setup_vietnam_logging
@@ -57,6 +58,18 @@ class RetrieveFromMemory(Node):
             logger.warning("🧠 [RetrieveFromMemory] EXEC - Missing query, cannot retrieve memories")
             return []
 
+        # Cheap cached count decides how much work this user is worth
+        memory_count = get_user_memory_count(user_id)
+        if memory_count == 0:
+            logger.info(f"🧠 [RetrieveFromMemory] EXEC - User has no memories, skipping query generation")
+            return []
+
+        if memory_count is not None and memory_count <= memory_config.MEMORY_RAW_QUERY_MAX_COUNT:
+            logger.info(f"🧠 [RetrieveFromMemory] EXEC - Only {memory_count} memories, searching with raw query")
+            memories = retrieve_user_memory(user_id=user_id, current_query=query, top_k=10)
+            logger.info(f"🧠 [RetrieveFromMemory] EXEC - Retrieved {len(memories)} memories")
+            return memories
+
         # Generate optimized memory retrieval query using LLM
         vietnameseRole = ROLE_DISPLAY_NAME.get(RoleEnum(role), "Người dùng") if role else "Người dùng"
 
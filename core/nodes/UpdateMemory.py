@@ -1,11 +1,11 @@
 # Core framework import
-from core.pocketflow import AsyncParallelBatchNode
+from core.pocketflow import AsyncNode
 
 # Standard library imports
 import logging
 
 # Local imports
-from utils.knowledge_base.memory_retrieval import save_user_memory
+from .AddMemory import build_memory_write_items, write_memory_batch
 
 # Configure logging for this module with Vietnam timezone
 from utils.timezone_utils import setup_vietnam_logging
@@ -20,11 +20,12 @@ else:
     logger.setLevel(getattr(logging, logging_config.LOG_LEVEL.upper()))
 
 
-class UpdateMemory(AsyncParallelBatchNode):
+class UpdateMemory(AsyncNode):
     """
-    UpdateMemory - Worker node that executes UPDATE operations in parallel.
+    UpdateMemory - Worker node that executes UPDATE operations.
     Updates existing memory entries based on decisions from MemoryManager.
-    Uses AsyncParallelBatchNode for concurrent processing.
+    Normally AddMemory already wrote the updates in its bulk write; this node
+    only writes them (as one bulk call) when it runs on its own.
     """
 
     async def prep_async(self, shared):
@@ -39,94 +40,43 @@ class UpdateMemory(AsyncParallelBatchNode):
             logger.info(f"🔄 [UpdateMemory] PREP - No update operations, skipping")
             return []
 
-        # Return list of items for batch processing
-        batch_items = [
-            {
-                "user_id": user_id,
-                "index": i,
-                "memory_id": op.get("memory_id"),
-                "content": op.get("content")
-            }
-            for i, op in enumerate(update_operations, 1)
-        ]
+        if shared.get("update_memory_result", {}).get("batched_with_insert"):
+            logger.info(f"🔄 [UpdateMemory] PREP - Updates already written in AddMemory's bulk write, skipping")
+            return []
 
+        batch_items = build_memory_write_items(user_id, [], update_operations)
         logger.info(f"🔄 [UpdateMemory] PREP - Returning {len(batch_items)} batch items")
         return batch_items
 
-    async def exec_async(self, item):
-        """Execute a single UPDATE operation"""
-        user_id = item["user_id"]
-        index = item["index"]
-        memory_id = item["memory_id"]
-        content = item["content"]
-
-        if not user_id:
-            logger.warning(f"🔄 [UpdateMemory] EXEC [{index}] - Missing user_id")
-            return {
-                "index": index,
-                "memory_id": memory_id,
-                "success": False,
-                "reason": "Missing user_id"
-            }
-
-        if not memory_id:
-            logger.warning(f"🔄 [UpdateMemory] EXEC [{index}] - Missing memory_id, skipping")
-            return {
-                "index": index,
-                "success": False,
-                "reason": "Missing memory_id"
-            }
-
-        if not content or not content.strip():
-            logger.warning(f"🔄 [UpdateMemory] EXEC [{index}] - Empty content, skipping")
-            return {
-                "index": index,
-                "memory_id": memory_id,
-                "success": False,
-                "reason": "Empty content"
-            }
-
-        # Run synchronous save_user_memory in executor to avoid blocking
-        import asyncio
-        loop = asyncio.get_event_loop()
-        success = await loop.run_in_executor(
-            None,
-            lambda: save_user_memory(user_id=user_id, query=content, point_id=memory_id)
-        )
-
-        if success:
-            logger.info(f"🔄 [UpdateMemory] EXEC [{index}] - UPDATE [{memory_id}] successful - '{content[:50]}...'")
-            return {
-                "index": index,
-                "memory_id": memory_id,
-                "success": True,
-                "content": content[:100]
-            }
-        else:
-            logger.error(f"🔄 [UpdateMemory] EXEC [{index}] - UPDATE [{memory_id}] failed - '{content[:50]}...'")
-            return {
-                "index": index,
-                "memory_id": memory_id,
+    async def exec_async(self, items):
+        """Execute all UPDATE operations as one bulk write"""
+        if not items:
+            return []
+        results = await write_memory_batch(items[0]["user_id"], items)
+        for r in results:
+            if r.get("success"):
+                logger.info(f"🔄 [UpdateMemory] EXEC [{r['index']}] - UPDATE [{r.get('memory_id')}] successful - '{r.get('content', '')[:50]}...'")
+            else:
+                logger.error(f"🔄 [UpdateMemory] EXEC [{r['index']}] - UPDATE [{r.get('memory_id')}] failed: {r.get('reason')}")
+        return results
+
+    async def exec_fallback_async(self, items, exc):
+        """Fallback when UPDATE operations fail after max retries"""
+        logger.error(f"🔄 [UpdateMemory] FALLBACK - Failed after max retries: {exc}")
+        return [
+            {
+                "op": "update",
+                "index": item["index"],
+                "memory_id": item.get("memory_id", ""),
                 "success": False,
-                "reason": "Update operation failed"
+                "reason": f"Failed after max retries",
+                "content": (item.get("content") or "")[:50]
             }
-
-    async def exec_fallback_async(self, item, exc):
-        """Fallback when UPDATE operation fails after max retries"""
-        index = item.get("index", 0)
-        memory_id = item.get("memory_id", "")
-        content = item.get("content", "")
-        logger.error(f"🔄 [UpdateMemory] FALLBACK [{index}] - Failed after max retries: {exc}")
-        return {
-            "index": index,
-            "memory_id": memory_id,
-            "success": False,
-            "reason": f"Failed after max retries",
-            "content": content[:50]
-        }
+            for item in (items or [])
+        ]
 
     async def post_async(self, shared, prep_res, exec_res):
-        """Aggregate results from parallel execution"""
+        """Aggregate results from the bulk write"""
         # Handle None exec_res (unhandled exceptions)
         if exec_res is None:
             logger.error("🔄 [UpdateMemory] POST - exec_res is None, no operations executed")
@@ -134,6 +84,9 @@ class UpdateMemory(AsyncParallelBatchNode):
             return "default"
 
         if not exec_res:
+            if shared.get("update_memory_result", {}).get("batched_with_insert"):
+                # Keep the results AddMemory recorded for the shared bulk write
+                return "default"
             logger.info(f"🔄 [UpdateMemory] POST - No operations executed")
             shared["update_memory_result"] = {"success": True, "updated": 0, "total": 0, "results": []}
             return "default"
@@ -142,7 +95,7 @@ class UpdateMemory(AsyncParallelBatchNode):
         success_count = sum(1 for r in results if r.get("success", False))
         total = len(results)
 
-        logger.info(f"🔄 [UpdateMemory] POST - Completed: {success_count}/{total} successful (parallel)")
+        logger.info(f"🔄 [UpdateMemory] POST - Completed: {success_count}/{total} successful (bulk)")
 
         # Store results in shared state
         result_data = {
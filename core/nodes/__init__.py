@@ -23,15 +23,15 @@ from .QueryCreatingForRetrievalAgent import QueryCreatingForRetrievalAgent
 # Future / optional nodes:
 # from .GreetingResponse import GreetingResponse  # Uncomment when implemented
 
-# OQA nodes remain commented until re-enabled after refactor.
-# from .oqa_nodes import (
-#     OQAIngestDefaults,
-#     OQAClassifyEN,
-#     OQARetrieve,
-#     OQAComposeAnswerVIWithSources,
-#     OQAClarify,
-#     OQAChitChat,
-# )
+# OQA orthodontist nodes (wired in create_oqa_orthodontist_flow)
+from .oqa_nodes import (
+    OQAIngestDefaults,
+    OQAClassifyEN,
+    OQARetrieve,
+    OQAComposeAnswerVIWithSources,
+    OQAClarify,
+    OQAChitChat,
+)
 
 __all__ = [
     # Medical nodes
@@ -47,10 +47,10 @@ __all__ = [
     "QueryCreatingForRetrievalAgent",
     # "GreetingResponse",  # add when implemented
     # OQA nodes
-    # "OQAIngestDefaults",
-    # "OQAClassifyEN",
-    # "OQARetrieve",
-    # "OQAComposeAnswerVIWithSources",
-    # "OQAClarify",
-    # "OQAChitChat",
+    "OQAIngestDefaults",
+    "OQAClassifyEN",
+    "OQARetrieve",
+    "OQAComposeAnswerVIWithSources",
+    "OQAClarify",
+    "OQAChitChat",
 ]
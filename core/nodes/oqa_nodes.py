@@ -1,5 +1,8 @@
+import asyncio
+
 from pocketflow import Node
-from utils.llm import call_llm
+from core.pocketflow import AsyncNode
+from utils.llm import call_llm_async
 from utils.llm.call_llm import APIOverloadException
 from utils.parsing import parse_yaml_with_schema
 from config.timeout_config import timeout_config
@@ -8,6 +11,7 @@ from utils.llm import (
     PROMPT_OQA_COMPOSE_VI_WITH_SOURCES,
     PROMPT_OQA_CHITCHAT,
 )
+from utils.llm.prompt_builder import PromptBuilder, dedupe_kb_hits, PRIORITY_QUERY, PRIORITY_KB, PRIORITY_HISTORY
 from utils.helpers import (
     format_kb_qa_list,
     get_score_threshold,
@@ -17,9 +21,9 @@ from utils.role_enum import (
     PERSONA_BY_ROLE
 )
 from utils.knowledge_base.kb_oqa import (
-    retrieve_oqa,
+    retrieve_oqa_many,
     retrieve_random_oqa,
-    get_references_by_ids,
+    get_parsed_references_by_ids,
     format_references_numbered,
 )
 import logging
@@ -64,9 +68,9 @@ class OQAIngestDefaults(Node):
         return "default"
 
 
-class OQAClassifyEN(Node):
+class OQAClassifyEN(AsyncNode):
     """Classify English input and produce English rag_questions for OQA."""
-    def prep(self, shared):
+    async def prep_async(self, shared):
         logger.info("🧠 [OQAClassify] PREP - Building classification prompt")
         query = shared.get("query", "").strip()
         role = shared.get("role", "orthodontist")
@@ -85,7 +89,7 @@ class OQAClassifyEN(Node):
         logger.info(f"🧠 [OQAClassify] PREP - Query: '{query[:60]}...', Role: {role}, History: {len(lines)} context lines")
         return prompt
 
-    def exec(self, prompt):
+    async def exec_async(self, prompt):
         logger.info("🧠 [OQAClassify] EXEC - Calling LLM for EN classification")
         # Log the exact prompt being sent to LLM
         try:
@@ -93,7 +97,7 @@ class OQAClassifyEN(Node):
         except Exception:
             pass
         try:
-            resp = call_llm(prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
+            resp = await call_llm_async(prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
             logger.info(f"🧠 [OQAClassify] EXEC - Raw classification response length: {len(resp)} chars")
             logger.info(f"🧠 [OQAClassify] EXEC - Full API response:\n{resp}")
             
@@ -116,7 +120,7 @@ class OQAClassifyEN(Node):
             logger.warning(f"🧠 [OQAClassify] EXEC - Classification failed: {e}, defaulting to medical_question")
         return {"type": "medical_question", "rag_questions": []}
 
-    def post(self, shared, prep_res, exec_res):
+    async def post_async(self, shared, prep_res, exec_res):
         logger.info("🧠 [OQAClassify] POST - Saving classification results")
         shared["input_type"] = exec_res.get("type", "medical_question")
         shared["rag_questions"] = exec_res.get("rag_questions", [])
@@ -127,18 +131,21 @@ class OQAClassifyEN(Node):
         return "retrieve_kb"
 
 
-class OQARetrieve(Node):
-    """Retrieve only from OQA vector index using English queries (user + rag)."""
-    def prep(self, shared):
+class OQARetrieve(AsyncNode):
+    """Retrieve only from OQA vector index using English queries (user + rag).
+
+    All rag_questions are scored as one batch off the event loop.
+    """
+    async def prep_async(self, shared):
         logger.info("📚 [OQARetrieve] PREP - Reading query and rag_questions for OQA retrieval")
         query = shared.get("query", "")
         rag_questions = shared.get("rag_questions", [])
         logger.info(f"📚 [OQARetrieve] PREP - User query: '{query[:60]}...', RAG questions: {len(rag_questions) if rag_questions else 0}")
         return query, rag_questions
 
-    def exec(self, inputs):
+    async def exec_async(self, inputs):
         query, rag_questions = inputs
-        logger.info("📚 [OQARetrieve] EXEC - Starting sequential OQA retrieval: user query first, then RAG")
+        logger.info("📚 [OQARetrieve] EXEC - Starting batched OQA retrieval over RAG questions")
         
         queries = []
         # if query:
@@ -147,15 +154,13 @@ class OQARetrieve(Node):
             queries.extend([q for q in rag_questions if q])
 
         aggregated = []
-        best_seen = 0.0
-        for i, q in enumerate(queries):
-            logger.info(f"📚 [OQARetrieve] EXEC - Query {i+1}/{len(queries)}: '{q[:50]}...'")
-            res, sc = retrieve_oqa(q, top_k=5)
-            logger.info(f"📚 [OQARetrieve] EXEC - Retrieved {len(res) if res else 0} results, best score: {sc:.4f}")
-            if res:
+        if queries:
+            # BM25 (+ dense) scoring is CPU-bound; run the whole batch in the default executor
+            loop = asyncio.get_running_loop()
+            batch = await loop.run_in_executor(None, lambda: retrieve_oqa_many(queries, top_k=5))
+            for i, (q, (res, sc)) in enumerate(zip(queries, batch)):
+                logger.info(f"📚 [OQARetrieve] EXEC - Query {i+1}/{len(queries)}: '{q[:50]}...' -> {len(res)} results, best score: {sc:.4f}")
                 aggregated.extend(res)
-                if sc and sc > best_seen:
-                    best_seen = sc
 
         # deduplicate by id or question
         seen = {}
@@ -192,7 +197,7 @@ class OQARetrieve(Node):
         logger.info(f"📚 [OQARetrieve] EXEC - Final aggregated: {len(top5)} unique results, top_score={final_score:.4f}")
         return top5, final_score
 
-    def post(self, shared, prep_res, exec_res):
+    async def post_async(self, shared, prep_res, exec_res):
         logger.info("📚 [OQARetrieve] POST - Saving OQA retrieval results")
         items, score = exec_res
         # map to existing formatting function by adapting keys
@@ -211,11 +216,11 @@ class OQARetrieve(Node):
         shared["need_clarify"] = float(score) < get_score_threshold()
         
         logger.info(f"📚 [OQARetrieve] POST - Saved {len(items)} OQA results, score: {score:.4f}, need_clarify: {shared['need_clarify']}")
-        return "default"
+        return "clarify" if shared["need_clarify"] else "default"
 
 
-class OQAComposeAnswerVIWithSources(Node):
-    def prep(self, shared):
+class OQAComposeAnswerVIWithSources(AsyncNode):
+    async def prep_async(self, shared):
         logger.info("✍️ [OQACompose] PREP - Building Vietnamese composition with sources")
         role = shared.get("role", "orthodontist")
         query = shared.get("query", "")
@@ -227,26 +232,28 @@ class OQAComposeAnswerVIWithSources(Node):
         # compact English QA block with topic and id sources
         items = shared.get("oqa_hits", [])
         lines = []
-        for it in items:
+        for it in dedupe_kb_hits(items):
             q = it.get("question", "")
             ctx = it.get("context", "")
             topic = it.get("topic", "")
             src_id = it.get("id", "")
             lines.append(f"Topic: {topic}\nQ: {q}\nContext: {ctx}\nSourceId: {src_id}\n")
-        relevant_info = "\n".join(lines) if lines else "(no retrieved info)"
         formatted_history = format_conversation_history(conversation_history)
-        prompt = PROMPT_OQA_COMPOSE_VI_WITH_SOURCES.format(
-            ai_role=ai_role,
-            audience=audience,
-            tone=tone,
-            query=query,
-            relevant_info_from_kb=relevant_info,
-            conversation_history=formatted_history,
+        prompt = (
+            PromptBuilder("oqa_compose", PROMPT_OQA_COMPOSE_VI_WITH_SOURCES)
+            .add("ai_role", ai_role, required=True)
+            .add("audience", audience, required=True)
+            .add("tone", tone, required=True)
+            .add("query", query, PRIORITY_QUERY, required=True)
+            .add_items("relevant_info_from_kb", lines, PRIORITY_KB, empty="(no retrieved info)")
+            .add_items("conversation_history", formatted_history.splitlines(), PRIORITY_HISTORY, keep_newest=True)
+            .build()
+            .text
         )
         logger.info(f"✍️ [OQACompose] PREP - Role: {role}, Query: '{query[:50]}...', OQA sources: {len(items)}")
         return prompt
 
-    def exec(self, prompt):
+    async def exec_async(self, prompt):
         logger.info("✍️ [OQACompose] EXEC - Calling LLM for Vietnamese composition with sources")
         # Log the exact prompt being sent to LLM
         try:
@@ -254,7 +261,7 @@ class OQAComposeAnswerVIWithSources(Node):
         except Exception:
             pass
         try:
-            resp = call_llm(prompt, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
+            resp = await call_llm_async(prompt, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
             logger.info(f"✍️ [OQACompose] EXEC - Raw LLM response length: {len(resp)} chars")
             logger.info(f"✍️ [OQACompose] EXEC - Full API response:\n{resp}")
             
@@ -308,8 +315,8 @@ class OQAComposeAnswerVIWithSources(Node):
             reference_ids = result.get("reference_ids", [])
             logger.info(f"✍️ [OQACompose] EXEC - Got {len(reference_ids)} reference IDs: {reference_ids}")
             
-            # Query KB for full references
-            id_to_ref = get_references_by_ids(reference_ids)
+            # Look up pre-parsed (title, link) references by ID
+            id_to_ref = get_parsed_references_by_ids(reference_ids)
             logger.info(f"✍️ [OQACompose] EXEC - Retrieved {len(id_to_ref)} full references from KB")
             
             # Build sources list with required format: [N] TITLE LINK
@@ -341,7 +348,7 @@ class OQAComposeAnswerVIWithSources(Node):
                 "preformatted": True,
             }
 
-    def post(self, shared, prep_res, exec_res):
+    async def post_async(self, shared, prep_res, exec_res):
         logger.info("✍️ [OQACompose] POST - Saving composition results")
         shared["answer_obj"] = exec_res
         shared["explain"] = exec_res.get("explain", "")
@@ -389,10 +396,10 @@ class OQAClarify(Node):
         return "default"
 
 
-class OQAChitChat(Node):
+class OQAChitChat(AsyncNode):
     """Specialized chitchat node for OQA/orthodontist context using LLM."""
     
-    def prep(self, shared):
+    async def prep_async(self, shared):
         logger.info("💬 [OQAChitChat] PREP - Preparing orthodontic chitchat response")
         role = shared.get("role", "orthodontist")
         query = shared.get("query", "")
@@ -400,7 +407,7 @@ class OQAChitChat(Node):
         logger.info(f"💬 [OQAChitChat] PREP - Role: {role}, Query: '{query[:50]}...', History: {len(conversation_history)} messages")
         return role, query, conversation_history
     
-    def exec(self, inputs):
+    async def exec_async(self, inputs):
         role, query, conversation_history = inputs
         logger.info("💬 [OQAChitChat] EXEC - Calling LLM for orthodontic chitchat")
         
@@ -439,7 +446,7 @@ class OQAChitChat(Node):
                 logger.info("💬 [OQAChitChat] PROMPT (len=%d):\n%s", len(prompt) if isinstance(prompt, str) else 0, prompt)
             except Exception:
                 pass
-            resp = call_llm(prompt)
+            resp = await call_llm_async(prompt)
             logger.info(f"💬 [OQAChitChat] EXEC - Raw chitchat response length: {len(resp)} chars")
             logger.info(f"💬 [OQAChitChat] EXEC - Full API response:\n{resp}")
             
@@ -474,7 +481,7 @@ class OQAChitChat(Node):
                 "preformatted": True
             }
     
-    def post(self, shared, prep_res, exec_res):
+    async def post_async(self, shared, prep_res, exec_res):
         logger.info("💬 [OQAChitChat] POST - Saving chitchat response")
         shared["answer_obj"] = exec_res
         shared["explain"] = exec_res.get("explain", "")
@@ -0,0 +1,43 @@
+"""
+Postgres advisory locks for work that must run once across processes
+"""
+
+import hashlib
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for `name` (pg advisory locks take a bigint)."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lock(bind, name: str, blocking: bool = True) -> Iterator[bool]:
+    """
+    Hold the session-level advisory lock `name` on a dedicated connection.
+
+    Every uvicorn worker and replica shares the database, so this is how a
+    boot step or a periodic job runs in one process at a time. With
+    `blocking=False` the context yields False instead of waiting when another
+    process holds the lock. Non-Postgres databases (SQLite in tests and local
+    runs) have no other processes to coordinate with and always yield True.
+    """
+    if bind.dialect.name != "postgresql":
+        yield True
+        return
+
+    key = advisory_lock_key(name)
+    with bind.connect() as conn:
+        if blocking:
+            conn.exec_driver_sql(f"SELECT pg_advisory_lock({key})")
+            acquired = True
+        else:
+            acquired = bool(conn.exec_driver_sql(f"SELECT pg_try_advisory_lock({key})").scalar())
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                conn.exec_driver_sql(f"SELECT pg_advisory_unlock({key})")
+                conn.commit()
@@ -1,16 +1,35 @@
 # db.py
 import os
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.automap import automap_base
 from database.models import Users, ChatThread, ChatMessage, Base as ModelBase
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync Postgres URL (psycopg2/default driver) to the asyncpg driver."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Sync engine: schema bootstrap/reflection, scripts and sync (threadpool) handlers
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
-# Create tables if they don't exist
+# Async engine: request handlers running on the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Create tables if they don't exist; index migrations run once at startup/deploy (database.migrate)
 ModelBase.metadata.create_all(bind=engine)
 
 metadata = MetaData(schema="public")
@@ -24,7 +43,14 @@ Users = Base.classes.users
 ChatThreads = Base.classes.chat_threads
 ChatMessages = Base.classes.chat_messages
 
-def get_db():
+async def get_db():
+    """Async session for `async def` handlers (DB waits no longer block the event loop)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db():
+    """Sync session for plain `def` handlers, which FastAPI runs in its threadpool."""
     db = SessionLocal()
     try:
         yield db
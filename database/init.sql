@@ -30,5 +30,5 @@ CREATE TABLE IF NOT EXISTS chat_messages (
 );
 
 -- Index for faster queries
-CREATE INDEX IF NOT EXISTS idx_messages_thread_id ON chat_messages(thread_id);
-CREATE INDEX IF NOT EXISTS idx_threads_user_id ON chat_threads(user_id);
+CREATE INDEX IF NOT EXISTS idx_messages_thread_timestamp ON chat_messages(thread_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_threads_user_updated ON chat_threads(user_id, updated_at, id);
@@ -0,0 +1,64 @@
+"""
+Idempotent SQL migrations for existing databases
+
+Run them once per deploy with `python -m database.migrate` (and set
+DB_MIGRATE_ON_STARTUP=false), or let app startup apply them; either way a
+Postgres advisory lock makes concurrent workers/replicas take turns.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from database.advisory_lock import advisory_lock
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATIONS_ADVISORY_LOCK = "schema_migrations"
+
+
+def _sql_statements(script: str) -> List[str]:
+    lines = [line for line in script.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def apply_migrations(bind) -> List[str]:
+    """
+    Run the SQL files in database/migrations in name order.
+
+    create_all only creates missing tables, so changes to existing tables
+    (indexes etc.) live here. Every statement is idempotent (IF [NOT] EXISTS),
+    so the whole set is re-run on each deploy. Statements run in autocommit
+    mode, one at a time: index changes use CONCURRENTLY, which Postgres does
+    not allow inside a transaction, so they do not lock chat tables against
+    writes. Other databases (SQLite in tests) get them without CONCURRENTLY.
+    A concurrent build that is interrupted leaves an INVALID index that
+    IF NOT EXISTS skips; drop it and re-run.
+    """
+    postgres = bind.dialect.name == "postgresql"
+    applied = []
+    with advisory_lock(bind, MIGRATIONS_ADVISORY_LOCK):
+        with bind.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                for statement in _sql_statements(path.read_text(encoding="utf-8")):
+                    if not postgres:
+                        statement = statement.replace(" CONCURRENTLY", "")
+                    conn.exec_driver_sql(statement)
+                applied.append(path.name)
+    return applied
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    engine = create_engine(os.environ["DATABASE_URL"])
+    try:
+        logger.info(f"✅ Applied migrations: {apply_migrations(engine)}")
+    finally:
+        engine.dispose()
@@ -0,0 +1,5 @@
+-- Composite index backing the bounded history query
+-- (WHERE thread_id = ? ORDER BY timestamp DESC LIMIT N); it also covers
+-- thread_id-only lookups, so the single-column index becomes redundant.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_thread_timestamp ON chat_messages(thread_id, timestamp);
+DROP INDEX CONCURRENTLY IF EXISTS idx_messages_thread_id;
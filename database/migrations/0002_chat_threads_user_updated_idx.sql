@@ -0,0 +1,4 @@
+-- Keyset pagination of a user's threads orders by (updated_at, id) within
+-- user_id; the composite index also covers user_id-only lookups.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_threads_user_updated ON chat_threads(user_id, updated_at, id);
+DROP INDEX CONCURRENTLY IF EXISTS idx_threads_user_id;
@@ -2,7 +2,7 @@
 Database models for the chat application
 """
 
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text, Boolean, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -21,6 +21,10 @@ class Users(Base):
     
 class ChatThread(Base):
     __tablename__ = "chat_threads"
+    __table_args__ = (
+        # Thread lists are "a user's threads by recency", paginated on (updated_at, id)
+        Index("idx_threads_user_updated", "user_id", "updated_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -34,6 +38,10 @@ class ChatThread(Base):
     
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # History/pagination reads are always "messages of one thread by time"
+        Index("idx_messages_thread_timestamp", "thread_id", "timestamp"),
+    )
     
     id = Column(String(36), primary_key=True)
     thread_id = Column(String(36), ForeignKey("chat_threads.id", ondelete="CASCADE"))
@@ -28,6 +28,14 @@ class ThreadSchema(BaseModel):
     updated_at: str = Field(..., description="Thread last update timestamp")
 
 
+class ThreadSummarySchema(ThreadSchema):
+    """Thread with a preview of its latest message (sidebar)"""
+    message_count: int = Field(..., description="Number of messages in the thread")
+    last_message: Optional[str] = Field(None, description="Snippet of the latest message")
+    last_role: Optional[str] = Field(None, description="Role of the latest message (user/bot)")
+    last_message_at: Optional[str] = Field(None, description="Timestamp of the latest message")
+
+
 class ThreadWithMessagesSchema(ThreadSchema):
     """Thread with messages for detailed responses"""
     messages: List[MessageSchema] = Field(..., description="List of messages")
@@ -54,9 +62,20 @@ class SendMessageRequest(BaseModel):
 
 # Response schemas
 class ThreadListResponse(BaseModel):
-    """Response schema for thread list"""
+    """Response schema for a page of the thread list (most recently updated first)"""
     threads: List[ThreadSchema] = Field(..., description="List of threads")
-    total: int = Field(..., description="Total number of threads")
+    total: Optional[int] = Field(None, description="Total number of threads (only when requested)")
+    limit: int = Field(..., description="Threads per page")
+    has_next: bool = Field(..., description="Whether there are more threads")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
+
+
+class ThreadSummaryListResponse(BaseModel):
+    """Response schema for a page of thread summaries (most recently updated first)"""
+    threads: List[ThreadSummarySchema] = Field(..., description="Threads with last-message previews")
+    limit: int = Field(..., description="Threads per page")
+    has_next: bool = Field(..., description="Whether there are more threads")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page")
 
 
 class ThreadMessagesResponse(BaseModel):
@@ -64,10 +83,11 @@ class ThreadMessagesResponse(BaseModel):
     thread_id: str = Field(..., description="Thread identifier")
     thread_name: str = Field(..., description="Thread name")
     messages: List[MessageSchema] = Field(..., description="List of messages in chronological order")
-    total_messages: int = Field(..., description="Total number of messages")
+    total_messages: Optional[int] = Field(None, description="Total number of messages (cached; omitted when include_total=false)")
     user_id: int = Field(..., description="User ID")
     created_at: str = Field(..., description="Thread creation timestamp")
     updated_at: str = Field(..., description="Thread last update timestamp")
     page: int = Field(..., description="Current page number")
     limit: int = Field(..., description="Messages per page")
     has_next: bool = Field(..., description="Whether there are more messages")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (pass as `cursor`)")
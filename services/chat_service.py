@@ -2,40 +2,234 @@
 Business logic for chat operations
 """
 
+import base64
+import json
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Tuple, Optional
-from sqlalchemy.orm import Session
+from typing import Any, Awaitable, Callable, List, Tuple, Optional
+from sqlalchemy import and_, delete, func, select, true, tuple_
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
+from config.chat_config import chat_config
 from database.models import Users, ChatThread, ChatMessage
+from services.message_persister import get_pending_messages
 from schemas.chat_schemas import (
     MessageSchema, 
     ThreadSchema, 
     ThreadWithMessagesSchema,
-    ThreadMessagesResponse
+    ThreadMessagesResponse,
+    ThreadListResponse,
+    ThreadSummarySchema,
+    ThreadSummaryListResponse
 )
 
 
+class ChatCountCache:
+    """LRU of per-thread message counts and per-user thread counts, adjusted by the writers."""
+
+    def __init__(
+        self,
+        max_entries: int = chat_config.COUNT_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = chat_config.COUNT_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._counts: "OrderedDict[Tuple[str, Any], Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: Any) -> Optional[int]:
+        cache_key = (kind, key)
+        with self._lock:
+            item = self._counts.get(cache_key)
+            if item is None:
+                return None
+            count, loaded_at = item
+            if self.ttl_seconds > 0 and time.monotonic() - loaded_at > self.ttl_seconds:
+                del self._counts[cache_key]
+                return None
+            self._counts.move_to_end(cache_key)
+            return count
+
+    async def get_or_load(self, kind: str, key: Any, loader: Callable[[], Awaitable[int]]) -> int:
+        """Return the cached count, running the COUNT query `loader` on a miss."""
+        count = self.get(kind, key)
+        if count is None:
+            count = await loader()
+            self.set(kind, key, count)
+        return count
+
+    def set(self, kind: str, key: Any, count: int) -> None:
+        cache_key = (kind, key)
+        with self._lock:
+            self._counts[cache_key] = (max(0, int(count)), time.monotonic())
+            self._counts.move_to_end(cache_key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def adjust(self, kind: str, key: Any, delta: int) -> None:
+        """Add `delta` to a known count; unknown keys are counted on their next read."""
+        cache_key = (kind, key)
+        with self._lock:
+            item = self._counts.get(cache_key)
+            if item is not None:
+                self._counts[cache_key] = (max(0, item[0] + delta), item[1])
+
+    def invalidate(self, kind: str, key: Any) -> None:
+        with self._lock:
+            self._counts.pop((kind, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+chat_counts = ChatCountCache()
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    """Opaque keyset cursor for the row (sort_value, id) a page ended on."""
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of `encode_cursor`; malformed cursors are a 400."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        return datetime.fromisoformat(sort_value), str(row_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+@dataclass
+class ThreadContext:
+    """What a chat turn needs from the database: the thread, recent messages and the rolling summary."""
+    thread: ChatThread
+    messages: List[ChatMessage]
+    summary: Optional[str] = None
+    summary_at: Optional[datetime] = None
+
+    def unsummarized(self, keep_last: int = 0) -> List[ChatMessage]:
+        """Messages newer than the summary, and never fewer than the last `keep_last` messages."""
+        if not self.summary or self.summary_at is None:
+            return list(self.messages)
+        newer = [m for m in self.messages if m.timestamp is not None and m.timestamp > self.summary_at]
+        if len(newer) < keep_last:
+            return self.messages[-keep_last:]
+        return newer
+
+
 class ChatService:
-    """Service class for chat-related business logic"""
+    """Service class for chat-related business logic (async session; every DB call is awaited)"""
     
     # Configuration constants
     DEFAULT_PAGE_SIZE = 50
     MAX_PAGE_SIZE = 200
     MIN_PAGE_SIZE = 1
+    HISTORY_WINDOW = 8
+    SNIPPET_LENGTH = 120
     WELCOME_MESSAGE = "Xin chào! Tôi là trợ lý AI của bạn. Rất vui được hỗ trợ bạn - Bạn cần tôi giúp gì hôm nay?"
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_user_threads(self, user_id: int) -> List[ThreadSchema]:
-        """Get all threads for a user"""
-        threads = self.db.query(ChatThread).filter(
-            ChatThread.user_id == user_id
+    async def get_thread_context(
+        self,
+        thread_id: str,
+        user_id: int,
+        limit: int = HISTORY_WINDOW
+    ) -> Optional["ThreadContext"]:
+        """
+        Ownership check, last `limit` messages and the latest rolling summary in one round trip.
+
+        The thread is outer-joined to its newest messages (a
+        `ORDER BY timestamp DESC LIMIT n` subquery served by the
+        (thread_id, timestamp) index), so a thread without messages still
+        yields one row and a foreign/missing thread yields none. The newest
+        `ChatMessage.summary` (see services.conversation_summary) and its
+        timestamp ride along as two scalar subqueries.
+
+        Messages still queued in the write-behind persister are merged in.
+        
+        Returns:
+            ThreadContext, or None if the user does not own the thread
+        """
+        recent_ids = select(ChatMessage.id).where(
+            ChatMessage.thread_id == thread_id
+        ).order_by(
+            ChatMessage.timestamp.desc()
+        ).limit(limit)
+        
+        summarized = aliased(ChatMessage)
+        latest_summary = select(summarized).where(
+            summarized.thread_id == thread_id,
+            summarized.summary.isnot(None)
         ).order_by(
-            ChatThread.updated_at.desc()
-        ).all()
+            summarized.timestamp.desc()
+        ).limit(1).subquery()
+        
+        rows = (await self.db.execute(
+            select(
+                ChatThread,
+                ChatMessage,
+                select(latest_summary.c.summary).scalar_subquery(),
+                select(latest_summary.c.timestamp).scalar_subquery()
+            ).outerjoin(
+                ChatMessage,
+                and_(ChatMessage.thread_id == ChatThread.id, ChatMessage.id.in_(recent_ids))
+            ).where(
+                ChatThread.id == thread_id,
+                ChatThread.user_id == user_id
+            ).order_by(
+                ChatMessage.timestamp.asc()
+            )
+        )).all()
+        
+        if not rows:
+            return None
+        messages = [row[1] for row in rows if row[1] is not None]
+        
+        # Read-your-writes: turns queued by the write-behind persister but not committed yet
+        messages = self._merge_pending(thread_id, messages)[-limit:]
+        thread, _, summary, summary_at = rows[0]
+        return ThreadContext(thread=thread, messages=messages, summary=summary, summary_at=summary_at)
+    
+    async def get_thread_with_recent_history(
+        self,
+        thread_id: str,
+        user_id: int,
+        limit: int = HISTORY_WINDOW
+    ) -> Optional[Tuple[ChatThread, List[ChatMessage]]]:
+        """
+        Ownership check and last `limit` messages in one round trip (see `get_thread_context`).
+
+        Returns:
+            (thread, messages oldest first), or None if the user does not own the thread
+        """
+        context = await self.get_thread_context(thread_id, user_id, limit)
+        if context is None:
+            return None
+        return context.thread, context.messages
+    
+    async def get_user_threads(self, user_id: int) -> List[ThreadSchema]:
+        """Get all threads for a user"""
+        threads = (await self.db.execute(
+            select(ChatThread).where(
+                ChatThread.user_id == user_id
+            ).order_by(
+                ChatThread.updated_at.desc()
+            )
+        )).scalars().all()
         
         return [
             ThreadSchema(
@@ -46,7 +240,91 @@ class ChatService:
             ) for thread in threads
         ]
     
-    def create_thread(self, user_id: int, name: str) -> ThreadSchema:
+    async def get_user_threads_page(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        include_total: bool = False
+    ) -> ThreadListResponse:
+        """
+        Keyset page of a user's threads, most recently updated first.
+
+        Continues strictly after `cursor` on (updated_at, id) DESC, so deep
+        pages cost the same as the first one.
+        """
+        _, limit = self._validate_pagination(1, limit)
+        
+        threads = (await self.db.execute(
+            self._thread_page(select(ChatThread), user_id, cursor, limit)
+        )).scalars().all()
+        
+        has_next = len(threads) > limit
+        threads = threads[:limit]
+        total = None
+        if include_total:
+            total = await chat_counts.get_or_load("threads", user_id, lambda: self._count(
+                select(func.count()).select_from(ChatThread).where(ChatThread.user_id == user_id)
+            ))
+        
+        return ThreadListResponse(
+            threads=[self._format_thread(thread) for thread in threads],
+            total=total,
+            limit=limit,
+            has_next=has_next,
+            next_cursor=encode_cursor(threads[-1].updated_at, threads[-1].id) if has_next else None
+        )
+    
+    async def get_thread_summaries(
+        self,
+        user_id: int,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> ThreadSummaryListResponse:
+        """
+        Sidebar page: each thread with its last message snippet, last role and
+        message count, from a single query (same keyset paging as `get_user_threads_page`).
+
+        On Postgres the last message and the count are LATERAL subqueries, one
+        index probe each per thread; other dialects get the equivalent
+        correlated subqueries.
+        """
+        _, limit = self._validate_pagination(1, limit)
+        
+        rows = (await self.db.execute(
+            self._thread_page(self._thread_summary_select(), user_id, cursor, limit)
+        )).all()
+        
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        
+        summaries = []
+        for thread, snippet, last_role, last_at, message_count in rows:
+            summary = ThreadSummarySchema(
+                **self._format_thread(thread).model_dump(),
+                message_count=message_count or 0,
+                last_message=snippet,
+                last_role=last_role,
+                last_message_at=last_at.isoformat() if last_at else None
+            )
+            # Turns still queued by the write-behind persister (this process only)
+            pending = get_pending_messages(thread.id)
+            if pending:
+                last = pending[-1]
+                summary.message_count += len(pending)
+                summary.last_message = (last.content or "")[:self.SNIPPET_LENGTH]
+                summary.last_role = last.role
+                summary.last_message_at = summary.updated_at = last.timestamp.isoformat()
+            summaries.append(summary)
+        
+        return ThreadSummaryListResponse(
+            threads=summaries,
+            limit=limit,
+            has_next=has_next,
+            next_cursor=encode_cursor(rows[-1][0].updated_at, rows[-1][0].id) if has_next else None
+        )
+    
+    async def create_thread(self, user_id: int, name: str) -> ThreadSchema:
         """Create a new thread with welcome message"""
         thread_id = str(uuid.uuid4())
         now = datetime.now()
@@ -71,7 +349,9 @@ class ChatService:
         
         self.db.add(new_thread)
         self.db.add(welcome_message)
-        self.db.commit()
+        await self.db.commit()
+        chat_counts.adjust("threads", user_id, 1)
+        chat_counts.set("messages", thread_id, 1)
         
         return ThreadSchema(
             id=new_thread.id,
@@ -80,18 +360,20 @@ class ChatService:
             updated_at=new_thread.updated_at.isoformat()
         )
     
-    def get_thread_with_messages(self, thread_id: str, user_id: int) -> ThreadWithMessagesSchema:
+    async def get_thread_with_messages(self, thread_id: str, user_id: int) -> ThreadWithMessagesSchema:
         """Get a specific thread with all messages"""
-        thread = self._get_user_thread(thread_id, user_id)
+        thread = await self._get_user_thread(thread_id, user_id)
         
-        messages = self.db.query(ChatMessage).filter(
-            ChatMessage.thread_id == thread_id
-        ).order_by(
-            ChatMessage.timestamp.asc()
-        ).all()
+        messages = (await self.db.execute(
+            select(ChatMessage).where(
+                ChatMessage.thread_id == thread_id
+            ).order_by(
+                ChatMessage.timestamp.asc()
+            )
+        )).scalars().all()
         
         formatted_messages = [
-            self._format_message(msg) for msg in messages
+            self._format_message(msg) for msg in self._merge_pending(thread_id, list(messages))
         ]
         
         return ThreadWithMessagesSchema(
@@ -104,63 +386,85 @@ class ChatService:
             user_id=user_id
         )
     
-    def get_thread_messages_paginated(
+    async def get_thread_messages_paginated(
         self, 
         thread_id: str, 
         user_id: int, 
         page: int = 1, 
-        limit: int = None
+        limit: int = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> ThreadMessagesResponse:
-        """Get thread messages with pagination"""
+        """
+        Get thread messages in chronological order, one page at a time.
+
+        With `cursor` the page continues strictly after the (timestamp, id) the
+        previous page ended on (keyset); otherwise `page` is served with
+        OFFSET for compatibility. Either way one extra row decides `has_next`
+        and the total comes from the count cache instead of a COUNT per page.
+        """
         # Validate and normalize pagination parameters
         page, limit = self._validate_pagination(page, limit)
         
         # Verify thread ownership
-        thread = self._get_user_thread(thread_id, user_id)
+        thread = await self._get_user_thread(thread_id, user_id)
         
-        # Calculate pagination
-        offset = (page - 1) * limit
+        query = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
+        if cursor:
+            timestamp, message_id = decode_cursor(cursor)
+            query = query.where(tuple_(ChatMessage.timestamp, ChatMessage.id) > tuple_(timestamp, message_id))
+        else:
+            query = query.offset((page - 1) * limit)
         
-        # Get total count
-        total_messages = self.db.query(ChatMessage).filter(
-            ChatMessage.thread_id == thread_id
-        ).count()
+        messages = list((await self.db.execute(
+            query.order_by(
+                ChatMessage.timestamp.asc(),
+                ChatMessage.id.asc()
+            ).limit(limit + 1)
+        )).scalars().all())
         
-        # Get paginated messages
-        messages = self.db.query(ChatMessage).filter(
-            ChatMessage.thread_id == thread_id
-        ).order_by(
-            ChatMessage.timestamp.asc()
-        ).offset(offset).limit(limit).all()
+        # Queued turns are newer than every committed message: they only extend the last page
+        pending = get_pending_messages(thread_id)
+        if pending and len(messages) <= limit:
+            if cursor:
+                pending = [m for m in pending if (m.timestamp, m.id) > (timestamp, message_id)]
+            elif not messages and page > 1:
+                committed = await self._count(
+                    select(func.count()).select_from(ChatMessage).where(ChatMessage.thread_id == thread_id)
+                )
+                pending = pending[max(0, (page - 1) * limit - committed):]
+            messages = self._merge_pending(thread_id, messages, pending)
         
-        # Format messages
-        formatted_messages = [
-            self._format_message(msg) for msg in messages
-        ]
+        has_next = len(messages) > limit
+        messages = messages[:limit]
         
-        # Calculate if there are more messages
-        has_next = (offset + limit) < total_messages
+        total_messages = None
+        if include_total:
+            total_messages = await chat_counts.get_or_load("messages", thread_id, lambda: self._count(
+                select(func.count()).select_from(ChatMessage).where(ChatMessage.thread_id == thread_id)
+            )) + len(get_pending_messages(thread_id))
         
         return ThreadMessagesResponse(
             thread_id=thread.id,
             thread_name=thread.name,
-            messages=formatted_messages,
+            messages=[self._format_message(msg) for msg in messages],
             total_messages=total_messages,
             user_id=user_id,
             created_at=thread.created_at.isoformat(),
             updated_at=thread.updated_at.isoformat(),
             page=page,
             limit=limit,
-            has_next=has_next
+            has_next=has_next,
+            next_cursor=encode_cursor(messages[-1].timestamp, messages[-1].id) if has_next else None
         )
     
-    def rename_thread(self, thread_id: str, user_id: int, new_name: str) -> ThreadSchema:
+    async def rename_thread(self, thread_id: str, user_id: int, new_name: str) -> ThreadSchema:
         """Rename a thread"""
-        thread = self._get_user_thread(thread_id, user_id)
+        thread = await self._get_user_thread(thread_id, user_id)
         
         thread.name = new_name
         thread.updated_at = datetime.now()
-        self.db.commit()
+        await self.db.commit()
         
         return ThreadSchema(
             id=thread.id,
@@ -169,19 +473,25 @@ class ChatService:
             updated_at=thread.updated_at.isoformat()
         )
     
-    def delete_thread(self, thread_id: str, user_id: int) -> None:
+    async def delete_thread(self, thread_id: str, user_id: int) -> None:
         """Delete a thread"""
-        thread = self._get_user_thread(thread_id, user_id)
+        thread = await self._get_user_thread(thread_id, user_id)
         
-        self.db.delete(thread)
-        self.db.commit()
+        # Set-based delete instead of loading the messages collection for the ORM cascade
+        await self.db.execute(delete(ChatMessage).where(ChatMessage.thread_id == thread.id))
+        await self.db.delete(thread)
+        await self.db.commit()
+        chat_counts.adjust("threads", user_id, -1)
+        chat_counts.invalidate("messages", thread_id)
     
-    def _get_user_thread(self, thread_id: str, user_id: int) -> ChatThread:
+    async def _get_user_thread(self, thread_id: str, user_id: int) -> ChatThread:
         """Get thread ensuring user ownership"""
-        thread = self.db.query(ChatThread).filter(
-            ChatThread.id == thread_id,
-            ChatThread.user_id == user_id
-        ).first()
+        thread = (await self.db.execute(
+            select(ChatThread).where(
+                ChatThread.id == thread_id,
+                ChatThread.user_id == user_id
+            )
+        )).scalars().first()
         
         if not thread:
             raise HTTPException(
@@ -191,6 +501,92 @@ class ChatService:
         
         return thread
     
+    def _thread_page(self, query, user_id: int, cursor: Optional[str], limit: int):
+        """Restrict a ChatThread query to one keyset page (+1 row to detect has_next)."""
+        query = query.where(ChatThread.user_id == user_id)
+        if cursor:
+            updated_at, thread_id = decode_cursor(cursor)
+            query = query.where(tuple_(ChatThread.updated_at, ChatThread.id) < tuple_(updated_at, thread_id))
+        return query.order_by(
+            ChatThread.updated_at.desc(),
+            ChatThread.id.desc()
+        ).limit(limit + 1)
+    
+    def _thread_summary_select(self):
+        """SELECT thread, snippet, last role, last timestamp, message count."""
+        if self.db.bind.dialect.name == "postgresql":
+            last = select(
+                ChatMessage.content, ChatMessage.role, ChatMessage.timestamp
+            ).where(
+                ChatMessage.thread_id == ChatThread.id
+            ).order_by(
+                ChatMessage.timestamp.desc(),
+                ChatMessage.id.desc()
+            ).limit(1).lateral("last_message")
+            counted = select(
+                func.count().label("n")
+            ).where(
+                ChatMessage.thread_id == ChatThread.id
+            ).lateral("message_count")
+            return select(
+                ChatThread,
+                func.substr(last.c.content, 1, self.SNIPPET_LENGTH),
+                last.c.role,
+                last.c.timestamp,
+                counted.c.n
+            ).select_from(ChatThread).outerjoin(last, true()).outerjoin(counted, true())
+        
+        last_message = aliased(ChatMessage)
+        last_id = select(ChatMessage.id).where(
+            ChatMessage.thread_id == ChatThread.id
+        ).order_by(
+            ChatMessage.timestamp.desc(),
+            ChatMessage.id.desc()
+        ).limit(1).correlate(ChatThread).scalar_subquery()
+        message_count = select(func.count()).select_from(ChatMessage).where(
+            ChatMessage.thread_id == ChatThread.id
+        ).correlate(ChatThread).scalar_subquery()
+        return select(
+            ChatThread,
+            func.substr(last_message.content, 1, self.SNIPPET_LENGTH),
+            last_message.role,
+            last_message.timestamp,
+            message_count
+        ).outerjoin(last_message, last_message.id == last_id)
+    
+    def _merge_pending(
+        self,
+        thread_id: str,
+        messages: List[ChatMessage],
+        pending: Optional[List[ChatMessage]] = None
+    ) -> List[ChatMessage]:
+        """
+        Add messages queued by the write-behind persister but not committed yet.
+
+        Only this process's queue is visible: with several workers,
+        read-your-writes needs sticky sessions (see services.message_persister).
+        """
+        pending = get_pending_messages(thread_id) if pending is None else pending
+        if not pending:
+            return messages
+        loaded = {message.id for message in messages}
+        return sorted(
+            messages + [message for message in pending if message.id not in loaded],
+            key=lambda message: (message.timestamp, message.id)
+        )
+    
+    async def _count(self, query) -> int:
+        return (await self.db.execute(query)).scalar_one()
+    
+    def _format_thread(self, thread: ChatThread) -> ThreadSchema:
+        """Format a database thread to schema"""
+        return ThreadSchema(
+            id=thread.id,
+            name=thread.name,
+            created_at=thread.created_at.isoformat(),
+            updated_at=thread.updated_at.isoformat()
+        )
+    
     def _format_message(self, message: ChatMessage) -> MessageSchema:
         """Format a database message to schema"""
         return MessageSchema(
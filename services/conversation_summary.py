@@ -0,0 +1,175 @@
+"""
+Incremental rolling summary of a chat thread.
+
+After each MedFlow turn, `RollingSummarizer.schedule` folds the new exchange
+into the thread's previous summary with one short LLM call, outside the
+request, and stores the result in `ChatMessage.summary` of that turn's bot
+message ("summary of the conversation up to here"). The next request reads
+the newest summary together with its recent messages (see
+`ChatService.get_thread_context`) and only sends the messages newer than the
+summary verbatim, instead of re-reading and re-summarizing the whole history.
+
+Updates for the same thread are chained: a fold waits for the previous one
+and starts from its result, skipping messages that result already covers.
+A failed fold keeps the old summary; its messages stay newer than the stored
+summary and are folded again on the next turn. Chaining is per process: two
+workers serving the same thread concurrently can each fold from the same
+older summary, and the later write wins (the next fold still starts from the
+newest stored summary, so at worst one exchange is summarized less fully).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from config.chat_config import chat_config
+from database.models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+SummaryResult = Tuple[str, datetime]
+
+
+def _default_session_factory():
+    from database.db import AsyncSessionLocal
+    return AsyncSessionLocal()
+
+
+def summary_messages(messages: List[ChatMessage]) -> List[Dict[str, Any]]:
+    """Role, content and timestamp of each message (what a fold needs)."""
+    return [
+        {"role": message.role, "content": message.content, "timestamp": message.timestamp}
+        for message in messages
+    ]
+
+
+def build_summary_prompt(previous_summary: Optional[str], messages: List[Dict[str, Any]], max_chars: int) -> str:
+    """Prompt that folds `messages` into `previous_summary`."""
+    lines = []
+    for message in messages:
+        speaker = "Người dùng" if message["role"] == "user" else "Bot"
+        lines.append(f"- {speaker}: {message['content']}")
+    return f"""Bạn cập nhật bản tóm tắt một cuộc hội thoại tư vấn y tế.
+
+Tóm tắt hiện tại:
+{previous_summary or "(chưa có)"}
+
+Các tin nhắn mới:
+{chr(10).join(lines)}
+
+Viết lại bản tóm tắt đã cập nhật bằng tiếng Việt, tối đa {max_chars} ký tự:
+- Giữ các vấn đề, triệu chứng, thông tin cá nhân liên quan và câu hỏi người dùng còn quan tâm
+- Ghi ngắn gọn những gì bot đã tư vấn
+- Bỏ lời chào và chi tiết không cần thiết
+Chỉ trả về nội dung tóm tắt."""
+
+
+async def summarize_with_llm(previous_summary: Optional[str], messages: List[Dict[str, Any]], max_chars: int) -> str:
+    """Default summarizer: one `call_llm_async` request."""
+    from utils.llm.call_llm import call_llm_async
+    return await call_llm_async(build_summary_prompt(previous_summary, messages, max_chars), fast_mode=True)
+
+
+class RollingSummarizer:
+    """Folds new chat turns into per-thread summaries in background tasks."""
+
+    def __init__(
+        self,
+        summarize: Callable[[Optional[str], List[Dict[str, Any]], int], Awaitable[str]] = summarize_with_llm,
+        session_factory: Callable = _default_session_factory,
+        max_chars: int = chat_config.SUMMARY_MAX_CHARS,
+    ) -> None:
+        self._summarize = summarize
+        self._session_factory = session_factory
+        self.max_chars = max_chars
+        self._tails: Dict[str, asyncio.Task] = {}
+
+    def schedule(
+        self,
+        thread_id: str,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, Any]],
+        bot_message_id: str,
+    ) -> asyncio.Task:
+        """
+        Fold `messages` (oldest first, the new turn last) into the thread summary.
+
+        Must be called from the event loop; returns immediately.
+        """
+        previous = self._tails.get(thread_id)
+        task = asyncio.create_task(self._update(previous, previous_summary, messages, bot_message_id))
+        self._tails[thread_id] = task
+        task.add_done_callback(lambda done: self._tails.pop(thread_id, None) if self._tails.get(thread_id) is done else None)
+        return task
+
+    async def drain(self) -> None:
+        """Wait for every scheduled fold (shutdown, tests)."""
+        while self._tails:
+            await asyncio.gather(*list(self._tails.values()), return_exceptions=True)
+
+    async def _update(
+        self,
+        previous: Optional[asyncio.Task],
+        summary: Optional[str],
+        messages: List[Dict[str, Any]],
+        bot_message_id: str,
+    ) -> Optional[SummaryResult]:
+        if previous is not None:
+            try:
+                result = await previous
+            except Exception:
+                result = None
+            if result is not None:
+                summary, covered_until = result
+                messages = [m for m in messages if m["timestamp"] > covered_until]
+        if not messages:
+            return None
+
+        try:
+            folded = (await self._summarize(summary, messages, self.max_chars) or "").strip()
+        except Exception as e:
+            logger.warning(f"⚠️ Rolling summary failed for message {bot_message_id}: {e}")
+            return None
+        if not folded:
+            return None
+        folded = folded[:self.max_chars]
+
+        try:
+            await self._persist(bot_message_id, folded)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to store rolling summary on message {bot_message_id}: {e}")
+            return None
+        return folded, messages[-1]["timestamp"]
+
+    async def _persist(self, bot_message_id: str, summary: str) -> None:
+        statement = update(ChatMessage).where(ChatMessage.id == bot_message_id).values(summary=summary)
+        async with self._session_factory() as session:
+            result = await session.execute(statement)
+            if result.rowcount == 0:
+                # The turn is still queued in the write-behind persister
+                from services.message_persister import flush_message_persister
+                await flush_message_persister()
+                result = await session.execute(statement)
+            await session.commit()
+        if result.rowcount == 0:
+            raise LookupError("bot message not found")
+
+
+_summarizer: Optional[RollingSummarizer] = None
+
+
+def get_conversation_summarizer() -> RollingSummarizer:
+    """Process-wide summarizer used by /api/chat."""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = RollingSummarizer()
+    return _summarizer
+
+
+async def drain_conversation_summaries() -> None:
+    """Finish pending summary updates (called on shutdown)."""
+    if _summarizer is not None:
+        await _summarizer.drain()
@@ -0,0 +1,197 @@
+"""
+Write-behind persistence of chat turns.
+
+With `CHAT_WRITE_BEHIND_ENABLED`, `/api/chat` hands its user/bot messages and
+the thread's new `updated_at` to `MessageWriteBehind` and returns without
+waiting for a commit. A background task drains the queue in batches (up to
+`WRITE_BEHIND_BATCH_SIZE` turns or `WRITE_BEHIND_MAX_DELAY_MS`), inserting all
+messages with one executemany and bumping every thread's `updated_at` with one
+bulk UPDATE by primary key (no re-select), then commits once.
+
+Until a turn is committed its messages stay in `pending_messages`, and the
+ChatService readers (chat history, thread messages, sidebar summaries) merge
+them. That read-your-writes guarantee is per process: the queue lives in the
+worker that accepted the turn, so with several uvicorn workers a user's
+requests must be routed to the same worker (sticky sessions), or write-behind
+left off. Turns still queued when the process dies are lost; `flush()` runs on
+shutdown.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, update
+
+from config.chat_config import chat_config
+from database.models import ChatMessage, ChatThread
+
+logger = logging.getLogger(__name__)
+
+_MAX_ATTEMPTS = 3
+_RETRY_BACKOFF_SECONDS = 0.1
+
+
+def _default_session_factory():
+    from database.db import AsyncSessionLocal
+    return AsyncSessionLocal()
+
+
+def message_row(message: ChatMessage) -> Dict[str, Any]:
+    """Column values of a (transient) ChatMessage."""
+    return {column.key: getattr(message, column.key) for column in ChatMessage.__table__.columns}
+
+
+@dataclass
+class _TurnWrite:
+    thread_id: str
+    rows: List[Dict[str, Any]]
+    updated_at: datetime
+
+
+class MessageWriteBehind:
+    """Batches chat-turn writes from many requests into one commit."""
+
+    def __init__(
+        self,
+        session_factory: Callable = _default_session_factory,
+        batch_size: int = chat_config.WRITE_BEHIND_BATCH_SIZE,
+        max_delay_ms: int = chat_config.WRITE_BEHIND_MAX_DELAY_MS,
+        on_committed: Optional[Callable[[Dict[str, int]], None]] = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max(0, max_delay_ms) / 1000
+        self.on_committed = on_committed
+        self.batches_committed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # thread_id -> message id -> row, for read-your-writes until committed
+        self._pending: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+
+    def submit(self, thread_id: str, messages: List[ChatMessage], updated_at: datetime) -> None:
+        """Queue one turn; must be called from the event loop that runs the writer."""
+        rows = [message_row(m) for m in messages]
+        pending = self._pending.setdefault(thread_id, OrderedDict())
+        for row in rows:
+            pending[row["id"]] = row
+        self._ensure_worker()
+        self._queue.put_nowait(_TurnWrite(thread_id, rows, updated_at))
+
+    def pending_messages(self, thread_id: str) -> List[ChatMessage]:
+        """Messages of `thread_id` that are queued but not committed yet (oldest first)."""
+        return [ChatMessage(**row) for row in self._pending.get(thread_id, {}).values()]
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far is committed (or given up on)."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _ensure_worker(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: List[_TurnWrite]) -> None:
+        committed = batch if await self._write(batch) else []
+        if not committed and len(batch) > 1:
+            # One bad turn (e.g. its thread was deleted while queued) must not cost the
+            # other users their messages: commit turn by turn and drop only the failures
+            logger.warning(f"⚠️ [WriteBehind] Batch of {len(batch)} turns failed, committing turns one by one")
+            committed = [write for write in batch if await self._write([write])]
+
+        if committed:
+            self.batches_committed += 1
+            logger.info(
+                f"💾 [WriteBehind] Committed {sum(len(w.rows) for w in committed)} messages "
+                f"for {len({w.thread_id for w in committed})} threads"
+            )
+        committed_ids = {id(write) for write in committed}
+        added: Dict[str, int] = {}
+        for write in batch:
+            if id(write) not in committed_ids:
+                logger.error(
+                    f"❌ [WriteBehind] Dropped {len(write.rows)} messages of thread {write.thread_id} "
+                    f"after {_MAX_ATTEMPTS} attempts"
+                )
+            else:
+                added[write.thread_id] = added.get(write.thread_id, 0) + len(write.rows)
+            pending = self._pending.get(write.thread_id, {})
+            for row in write.rows:
+                pending.pop(row["id"], None)
+            if not pending:
+                self._pending.pop(write.thread_id, None)
+        if added and self.on_committed:
+            self.on_committed(added)
+
+    async def _write(self, writes: List[_TurnWrite]) -> bool:
+        """Insert the turns' messages and bump their threads in one transaction (with retries)."""
+        rows = [row for write in writes for row in write.rows]
+        updated_at: Dict[str, datetime] = {}
+        for write in writes:
+            current = updated_at.get(write.thread_id)
+            updated_at[write.thread_id] = write.updated_at if current is None else max(current, write.updated_at)
+
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            try:
+                async with self.session_factory() as db:
+                    await db.execute(insert(ChatMessage), rows)
+                    await db.execute(
+                        update(ChatThread),
+                        [{"id": thread_id, "updated_at": ts} for thread_id, ts in updated_at.items()],
+                    )
+                    await db.commit()
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ [WriteBehind] Commit of {len(rows)} messages failed (attempt {attempt}): {e}")
+                await asyncio.sleep(_RETRY_BACKOFF_SECONDS * attempt)
+        return False
+
+
+_persister: Optional[MessageWriteBehind] = None
+
+
+def _adjust_counts(added: Dict[str, int]) -> None:
+    from services.chat_service import chat_counts
+    for thread_id, count in added.items():
+        chat_counts.adjust("messages", thread_id, count)
+
+
+def get_message_persister() -> MessageWriteBehind:
+    """Process-wide write-behind persister (created on first use)."""
+    global _persister
+    if _persister is None:
+        _persister = MessageWriteBehind(on_committed=_adjust_counts)
+    return _persister
+
+
+def get_pending_messages(thread_id: str) -> List[ChatMessage]:
+    """Uncommitted messages of a thread; empty when write-behind was never used."""
+    return _persister.pending_messages(thread_id) if _persister is not None else []
+
+
+async def flush_message_persister() -> None:
+    if _persister is not None:
+        await _persister.flush()
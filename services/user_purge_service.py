@@ -0,0 +1,138 @@
+"""
+Account purge: remove a user and everything derived from them.
+
+The API only checks the user exists and schedules a job; the job deletes the
+user's Qdrant memories with one filter-based delete, then the messages,
+threads and user row with three set-based SQL statements in one transaction.
+Memories go first so a failed job leaves the account in place and can simply
+be retried.
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from database.models import Users, ChatThread, ChatMessage
+from utils.knowledge_base.memory_retrieval import delete_all_user_memories
+from utils.principal_cache import principal_cache
+from utils.timezone_utils import get_vietnam_time
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs are kept for status polling, oldest dropped first
+MAX_TRACKED_JOBS = 500
+
+_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def _default_session_factory() -> Session:
+    from database.db import SessionLocal
+    return SessionLocal()
+
+
+def purge_user(user_id: int, db: Session) -> Dict[str, int]:
+    """
+    Delete a user's memories, messages, threads and account.
+
+    Returns:
+        Row/point counts removed per store
+    """
+    memories = delete_all_user_memories(user_id)
+
+    user_threads = select(ChatThread.id).where(ChatThread.user_id == user_id)
+    try:
+        messages = db.execute(
+            delete(ChatMessage).where(ChatMessage.thread_id.in_(user_threads)),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        threads = db.execute(
+            delete(ChatThread).where(ChatThread.user_id == user_id),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        users = db.execute(
+            delete(Users).where(Users.id == user_id),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    principal_cache.invalidate(user_id)
+
+    return {"memories": memories, "messages": messages, "threads": threads, "users": users}
+
+
+def get_purge_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return a snapshot of a purge job, or None if unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+
+def _run_job(job_id: str, user_id: int, session_factory: Callable[[], Session]) -> None:
+    _update_job(job_id, state="running", started_at=get_vietnam_time().isoformat())
+
+    db = session_factory()
+    try:
+        deleted = purge_user(user_id, db)
+        update = {"state": "succeeded", "deleted": deleted, "error": None}
+        logger.info(f"[UserPurge] ✅ User {user_id} purged: {deleted}")
+    except Exception as e:
+        update = {"state": "failed", "error": str(e)}
+        logger.error(f"[UserPurge] ❌ Purge of user {user_id} failed: {e}")
+    finally:
+        db.close()
+
+    _update_job(job_id, finished_at=get_vietnam_time().isoformat(), **update)
+
+
+def start_user_purge(
+    user_id: int,
+    session_factory: Callable[[], Session] = _default_session_factory,
+    background: bool = True,
+) -> Dict[str, Any]:
+    """
+    Schedule a purge of `user_id` on a daemon thread (or run it inline when
+    `background` is False).
+
+    Returns:
+        Job status dict; poll `get_purge_job(job["job_id"])` for progress
+    """
+    job_id = str(uuid.uuid4())
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "state": "queued",
+            "started_at": None,
+            "finished_at": None,
+            "deleted": None,
+            "error": None,
+        }
+        finished = [jid for jid, job in _jobs.items() if job["state"] in ("succeeded", "failed")]
+        for jid in finished[:max(0, len(_jobs) - MAX_TRACKED_JOBS)]:
+            del _jobs[jid]
+
+    if background:
+        threading.Thread(
+            target=_run_job,
+            args=(job_id, user_id, session_factory),
+            name=f"user-purge-{user_id}",
+            daemon=True,
+        ).start()
+    else:
+        _run_job(job_id, user_id, session_factory)
+    return get_purge_job(job_id)
@@ -0,0 +1,53 @@
+"""
+Tests for the shared sparse BM25 engine (parity with rank_bm25.BM25Okapi)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rank_bm25 import BM25Okapi
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base.bm25 import SparseBM25, tokenize, tokenize_series
+from utils.knowledge_base.kb_oqa import OQAVectorIndex
+
+OQA_CSV = str(project_root / "medical_knowledge_base" / "oqa_v1_dataset.csv")
+
+
+def test_tokenize_series_matches_tokenize():
+    texts = pd.Series(["Sâu răng là gì?", "Niềng-răng (mắc cài)", None, ""])
+    assert tokenize_series(texts) == [tokenize(t) for t in ["Sâu răng là gì?", "Niềng-răng (mắc cài)", "", ""]]
+
+
+def test_scores_match_bm25okapi():
+    corpus = [
+        tokenize("sau rang la gi"),
+        tokenize("nieng rang mac cai sau rang"),
+        tokenize("rang khon moc lech"),
+        tokenize("rang rang rang"),
+        [],
+    ]
+    sparse_bm25 = SparseBM25(corpus)
+    reference = BM25Okapi(corpus)
+    for query in (["sau", "rang"], ["rang", "rang"], ["khon"], ["unknown"], []):
+        np.testing.assert_allclose(sparse_bm25.get_scores(query), reference.get_scores(query), rtol=1e-5, atol=1e-6)
+
+    queries = [["sau", "rang"], [], ["rang", "khon", "khon"]]
+    np.testing.assert_allclose(
+        sparse_bm25.get_scores_batch(queries), np.vstack([sparse_bm25.get_scores(q) for q in queries]), rtol=1e-6
+    )
+
+
+def test_oqa_index_scores_match_bm25okapi():
+    idx = OQAVectorIndex(csv_path=OQA_CSV)
+    docs = idx._df["question"] + "\n" + idx._df["context"] + "\n" + idx._df["topic"]
+    reference = BM25Okapi(tokenize_series(docs))
+    query = tokenize("What causes pain during orthodontic treatment?")
+    np.testing.assert_allclose(idx._bm25.get_scores(query), reference.get_scores(query), rtol=1e-4, atol=1e-5)
+    hits = idx.search("orthodontic pain", top_k=3)
+    assert [h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True)
+    assert set(hits[0]) == {"score", "question", "context", "topic", "id"}
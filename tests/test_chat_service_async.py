@@ -0,0 +1,268 @@
+"""
+Tests for ChatService on an async SQLAlchemy session (aiosqlite stands in for asyncpg)
+"""
+import asyncio
+import sys
+from types import SimpleNamespace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, create_mock_engine, delete, event, func, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Some test modules stub `database` in sys.modules at import time; use the real models here
+for name in ("database", "database.models"):
+    if not getattr(sys.modules.get(name), "__file__", None):
+        sys.modules.pop(name, None)
+
+pytest.importorskip("aiosqlite")
+
+from database.migrate import apply_migrations
+from database.models import Base, Users, ChatMessage
+from services.chat_service import ChatService, chat_counts, decode_cursor, encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def fresh_counts():
+    chat_counts.clear()
+    yield
+    chat_counts.clear()
+
+
+def _run(scenario):
+    """Run `scenario(db, engine)` against a fresh in-memory database."""
+    async def main():
+        engine, factory = await _session_factory()
+        try:
+            async with factory() as db:
+                await scenario(db, engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with factory() as db:
+        db.add_all([Users(id=1, email="a@example.com", password="x"), Users(id=2, email="b@example.com", password="x")])
+        await db.commit()
+    return engine, factory
+
+
+def test_thread_lifecycle():
+    async def scenario(db, engine):
+        service = ChatService(db)
+        thread = await service.create_thread(1, "Răng khôn")
+
+        threads = await service.get_user_threads(1)
+        assert [t.id for t in threads] == [thread.id]
+        assert await service.get_user_threads(2) == []
+
+        full = await service.get_thread_with_messages(thread.id, 1)
+        assert full.total_messages == 1
+        assert full.messages[0].content == ChatService.WELCOME_MESSAGE
+
+        page = await service.get_thread_messages_paginated(thread.id, 1, page=1, limit=10)
+        assert len(page.messages) == 1
+
+        renamed = await service.rename_thread(thread.id, 1, "Niềng răng")
+        assert renamed.name == "Niềng răng"
+
+        with pytest.raises(HTTPException) as exc:
+            await service.get_thread_with_messages(thread.id, 2)
+        assert exc.value.status_code == 404
+
+        await service.delete_thread(thread.id, 1)
+        assert await service.get_user_threads(1) == []
+        remaining = (await db.execute(select(func.count()).select_from(ChatMessage))).scalar_one()
+        assert remaining == 0
+
+    _run(scenario)
+
+
+def test_recent_history_is_bounded_and_one_round_trip():
+    async def scenario(db, engine):
+        service = ChatService(db)
+        thread = await service.create_thread(1, "Lịch sử")
+        base = datetime.now() + timedelta(days=1)  # newer than the welcome message
+        db.add_all([
+            ChatMessage(id=f"m{i:02d}", thread_id=thread.id, role="user", content=f"msg {i}",
+                        timestamp=base + timedelta(minutes=i))
+            for i in range(20)
+        ])
+        await db.commit()
+
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        loaded, messages = await service.get_thread_with_recent_history(thread.id, 1, limit=5)
+        assert len(statements) == 1
+
+        assert loaded.id == thread.id
+        assert [m.content for m in messages] == [f"msg {i}" for i in range(15, 20)]
+
+        assert await service.get_thread_with_recent_history(thread.id, 2) is None
+        assert await service.get_thread_with_recent_history("missing", 1) is None
+
+        empty = await service.create_thread(1, "Trống")
+        await db.execute(delete(ChatMessage).where(ChatMessage.thread_id == empty.id))
+        loaded, messages = await service.get_thread_with_recent_history(empty.id, 1)
+        assert loaded.id == empty.id and messages == []
+
+    _run(scenario)
+
+
+def test_keyset_message_pages_match_offset_pages():
+    async def scenario(db, engine):
+        service = ChatService(db)
+        thread = await service.create_thread(1, "Trang")
+        same_time = datetime.now() + timedelta(days=1)  # ties are broken by id
+        db.add_all([
+            ChatMessage(id=f"m{i:02d}", thread_id=thread.id, role="user", content=f"msg {i}", timestamp=same_time)
+            for i in range(11)
+        ])
+        await db.commit()
+        chat_counts.adjust("messages", thread.id, 11)  # as /api/chat does after its insert
+
+        counts = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: counts.append(statement) if "count(" in statement else None)
+
+        keyset, cursor = [], None
+        while True:
+            page = await service.get_thread_messages_paginated(thread.id, 1, limit=5, cursor=cursor)
+            assert page.total_messages == 12
+            keyset.extend(m.id for m in page.messages)
+            if not page.has_next:
+                assert page.next_cursor is None
+                break
+            cursor = page.next_cursor
+
+        offset = []
+        for number in (1, 2, 3):
+            page = await service.get_thread_messages_paginated(thread.id, 1, page=number, limit=5)
+            offset.extend(m.id for m in page.messages)
+            assert page.has_next == (number < 3)
+
+        assert keyset == offset and len(keyset) == 12
+        assert keyset[1:] == [f"m{i:02d}" for i in range(11)]
+        # create_thread seeded the count and the writer adjusted it: no COUNT(*) per page
+        assert counts == []
+
+        partial = await service.get_thread_messages_paginated(thread.id, 1, limit=5, include_total=False)
+        assert partial.total_messages is None
+
+        with pytest.raises(HTTPException) as exc:
+            await service.get_thread_messages_paginated(thread.id, 1, cursor="not-a-cursor")
+        assert exc.value.status_code == 400
+
+    _run(scenario)
+
+
+def test_keyset_thread_pages_newest_first():
+    async def scenario(db, engine):
+        service = ChatService(db)
+        created = [await service.create_thread(1, f"Thread {i}") for i in range(7)]
+        await service.create_thread(2, "Other user")
+
+        ids, cursor = [], None
+        while True:
+            page = await service.get_user_threads_page(1, cursor=cursor, limit=3, include_total=True)
+            assert page.total == 7
+            ids.extend(t.id for t in page.threads)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert ids == [t.id for t in await service.get_user_threads(1)]
+        assert set(ids) == {t.id for t in created}
+
+        await service.delete_thread(created[0].id, 1)
+        page = await service.get_user_threads_page(1, limit=3, include_total=True)
+        assert page.total == 6
+
+    _run(scenario)
+
+
+def test_thread_summaries_in_one_query():
+    async def scenario(db, engine):
+        service = ChatService(db)
+        first = await service.create_thread(1, "Có tin nhắn")
+        second = await service.create_thread(1, "Trống")
+        await db.execute(delete(ChatMessage).where(ChatMessage.thread_id == second.id))
+        later = datetime.now() + timedelta(days=1)
+        db.add_all([
+            ChatMessage(id="q", thread_id=first.id, role="user", content="x" * 500, timestamp=later),
+            ChatMessage(id="a", thread_id=first.id, role="bot", content="Trả lời", timestamp=later + timedelta(seconds=1)),
+        ])
+        await db.commit()
+
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        page = await service.get_thread_summaries(1, limit=10)
+        assert len(statements) == 1
+
+        by_id = {t.id: t for t in page.threads}
+        assert by_id[first.id].message_count == 3
+        assert by_id[first.id].last_message == "Trả lời"
+        assert by_id[first.id].last_role == "bot"
+        assert by_id[second.id].message_count == 0
+        assert by_id[second.id].last_message is None and by_id[second.id].last_role is None
+        assert [t.id for t in page.threads] == [t.id for t in await service.get_user_threads(1)]
+
+        page = await service.get_thread_summaries(1, limit=1)
+        assert page.has_next and len(page.threads) == 1
+        rest = await service.get_thread_summaries(1, cursor=page.next_cursor, limit=1)
+        assert not rest.has_next and rest.threads[0].id != page.threads[0].id
+
+    _run(scenario)
+
+
+def test_thread_summaries_use_lateral_joins_on_postgres():
+    service = ChatService(SimpleNamespace(bind=create_mock_engine("postgresql://", executor=None)))
+    sql = str(service._thread_summary_select().compile(dialect=postgresql.dialect()))
+    assert sql.count("LATERAL") == 2
+
+
+def test_cursor_round_trip():
+    stamp = datetime(2025, 3, 1, 8, 30, 15, 123456)
+    cursor = encode_cursor(stamp, "abc")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (stamp, "abc")
+
+
+def test_migrations_add_composite_indexes():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE chat_messages (id VARCHAR(36) PRIMARY KEY, thread_id VARCHAR(36), timestamp DATETIME)")
+        conn.exec_driver_sql("CREATE INDEX idx_messages_thread_id ON chat_messages(thread_id)")
+        conn.exec_driver_sql("CREATE TABLE chat_threads (id VARCHAR(36) PRIMARY KEY, user_id INTEGER, updated_at DATETIME)")
+        conn.exec_driver_sql("CREATE INDEX idx_threads_user_id ON chat_threads(user_id)")
+
+    assert apply_migrations(engine)[0] == "0001_chat_messages_thread_timestamp_idx.sql"
+    apply_migrations(engine)  # idempotent
+
+    indexes = {ix["name"]: ix["column_names"] for ix in inspect(engine).get_indexes("chat_messages")}
+    assert indexes == {"idx_messages_thread_timestamp": ["thread_id", "timestamp"]}
+    indexes = {ix["name"]: ix["column_names"] for ix in inspect(engine).get_indexes("chat_threads")}
+    assert indexes == {"idx_threads_user_updated": ["user_id", "updated_at", "id"]}
+
+
+def test_index_migrations_do_not_lock_tables_on_postgres():
+    from database.migrate import MIGRATIONS_DIR, _sql_statements
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        for statement in _sql_statements(path.read_text(encoding="utf-8")):
+            if " INDEX " in statement:
+                assert " INDEX CONCURRENTLY " in statement, statement
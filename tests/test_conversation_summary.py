@@ -0,0 +1,153 @@
+"""
+Tests for the rolling conversation summary (fold chaining, storage and loading)
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Some test modules stub `database` in sys.modules at import time; use the real models here
+for name in ("database", "database.models"):
+    if not getattr(sys.modules.get(name), "__file__", None):
+        sys.modules.pop(name, None)
+
+pytest.importorskip("aiosqlite")
+
+from database.models import Base, Users, ChatMessage
+from services.chat_service import ChatService
+from services.conversation_summary import RollingSummarizer, build_summary_prompt, summary_messages
+
+BASE = datetime.now() + timedelta(days=1)  # newer than the welcome message
+
+
+def _run(scenario):
+    """Run `scenario(factory, engine)` against a fresh in-memory database."""
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+            async with factory() as db:
+                db.add(Users(id=1, email="a@example.com", password="x"))
+                await db.commit()
+            await scenario(factory, engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def _turn(thread_id, index):
+    return [
+        ChatMessage(id=f"u{index}", thread_id=thread_id, role="user", content=f"hỏi {index}",
+                    timestamp=BASE + timedelta(minutes=2 * index)),
+        ChatMessage(id=f"b{index}", thread_id=thread_id, role="bot", content=f"đáp {index}",
+                    timestamp=BASE + timedelta(minutes=2 * index + 1)),
+    ]
+
+
+def test_folds_are_chained_and_stored_on_the_bot_message():
+    calls = []
+
+    async def summarize(previous, messages, max_chars):
+        calls.append((previous, [m["content"] for m in messages]))
+        await asyncio.sleep(0.01)
+        return f"{previous or ''}|{'+'.join(m['content'] for m in messages)}"
+
+    async def scenario(factory, engine):
+        async with factory() as db:
+            thread = await ChatService(db).create_thread(1, "Tóm tắt")
+            first, second = _turn(thread.id, 0), _turn(thread.id, 1)
+            db.add_all(first + second)
+            await db.commit()
+
+        summarizer = RollingSummarizer(summarize=summarize, session_factory=factory)
+        # The second request started before the first fold finished: it still sees no summary
+        summarizer.schedule(thread.id, None, summary_messages(first), "b0")
+        summarizer.schedule(thread.id, None, summary_messages(first + second), "b1")
+        await summarizer.drain()
+
+        assert calls == [(None, ["hỏi 0", "đáp 0"]), ("|hỏi 0+đáp 0", ["hỏi 1", "đáp 1"])]
+        async with factory() as db:
+            stored = dict((await db.execute(select(ChatMessage.id, ChatMessage.summary))).all())
+        assert stored["b0"] == "|hỏi 0+đáp 0"
+        assert stored["b1"] == "|hỏi 0+đáp 0|hỏi 1+đáp 1"
+
+    _run(scenario)
+
+
+def test_failed_fold_keeps_previous_summary():
+    async def summarize(previous, messages, max_chars):
+        raise RuntimeError("overloaded")
+
+    async def scenario(factory, engine):
+        async with factory() as db:
+            thread = await ChatService(db).create_thread(1, "Lỗi")
+            turn = _turn(thread.id, 0)
+            db.add_all(turn)
+            await db.commit()
+
+        summarizer = RollingSummarizer(summarize=summarize, session_factory=factory)
+        task = summarizer.schedule(thread.id, "cũ", summary_messages(turn), "b0")
+        assert await task is None
+        async with factory() as db:
+            assert (await db.get(ChatMessage, "b0")).summary is None
+
+    _run(scenario)
+
+
+def test_context_loads_latest_summary_with_recent_messages():
+    async def scenario(factory, engine):
+        async with factory() as db:
+            service = ChatService(db)
+            thread = await service.create_thread(1, "Ngữ cảnh")
+            turns = [m for i in range(4) for m in _turn(thread.id, i)]
+            turns[3].summary = "tóm tắt đến lượt 1"
+            turns[1].summary = "tóm tắt đến lượt 0"
+            db.add_all(turns)
+            await db.commit()
+
+            statements = []
+            event.listen(engine.sync_engine, "before_cursor_execute",
+                         lambda *args: statements.append(args[2]))
+            context = await service.get_thread_context(thread.id, 1, limit=6)
+            assert len(statements) == 1
+
+            assert context.summary == "tóm tắt đến lượt 1"
+            assert [m.id for m in context.messages] == ["u1", "b1", "u2", "b2", "u3", "b3"]
+            assert [m.id for m in context.unsummarized()] == ["u2", "b2", "u3", "b3"]
+            assert [m.id for m in context.unsummarized(6)] == [m.id for m in context.messages]
+
+            empty = await service.create_thread(1, "Mới")
+            context = await service.get_thread_context(empty.id, 1)
+            assert context.summary is None and len(context.unsummarized(2)) == 1
+
+    _run(scenario)
+
+
+def test_prompt_includes_previous_summary_and_new_messages():
+    prompt = build_summary_prompt("Đau răng hàm", [{"role": "user", "content": "Có nên nhổ?"}], 500)
+    assert "Đau răng hàm" in prompt and "- Người dùng: Có nên nhổ?" in prompt and "500" in prompt
+
+
+def test_rolling_summary_enters_the_flow_once():
+    from core.nodes.IngestQuery import IngestQuery
+
+    shared = {
+        "role": "patient_dental",
+        "input": "Có nên nhổ?",
+        "conversation_history": [{"role": "user", "content": "Đau răng hàm"}],
+        "conversation_summary": "Người dùng đau răng hàm",
+    }
+    IngestQuery().run(shared)
+    assert shared["formatted_conversation_history"].count("Người dùng đau răng hàm") == 1
+    assert "context_summary" not in shared
@@ -0,0 +1,139 @@
+"""
+Tests for fused KB retrieval (one embedding pass, batched per-collection searches)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient, models
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.nodes.RetrieveFromKBWithDemuc import ROLE_TO_COLLECTION, RetrieveFromKBWithDemuc
+from utils.knowledge_base import fused_retrieval, qdrant_schema
+from utils.knowledge_base.memory_retrieval import (
+    DENSE_VECTOR_SIZE,
+    LATE_INTERACTION_VECTOR_SIZE,
+    _create_memory_collection,
+)
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+from utils.role_enum import RoleEnum
+
+URL = fused_retrieval.QDRANT_URL
+WORDS = ["braces", "diabetes", "mint", "implant"]
+
+
+def _vec(text, size):
+    v = np.full(size, 0.01, dtype=np.float32)
+    for i, w in enumerate(WORDS):
+        if w in text:
+            v[i] = 1.0
+    return v
+
+
+class LocalModel:
+    """Keyword embedder recording every call (no model download)."""
+
+    def __init__(self, kind, calls):
+        self.kind, self.calls = kind, calls
+
+    def _one(self, text):
+        if self.kind == "dense":
+            return _vec(text, DENSE_VECTOR_SIZE)
+        if self.kind == "sparse":
+            return SparseEmbedding(values=np.array([1.0]), indices=np.array([len(text)]))
+        return np.vstack([_vec(text, LATE_INTERACTION_VECTOR_SIZE)] * 2)
+
+    def embed(self, texts):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.calls.append(("embed", self.kind, len(texts)))
+        return (self._one(t) for t in texts)
+
+    def query_embed(self, texts):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        self.calls.append(("query", self.kind, len(texts)))
+        return (self._one(t) for t in texts)
+
+
+class CountingClient(QdrantClient):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.batches = []
+        self.queries = 0
+
+    def query_batch_points(self, collection_name, requests, **kwargs):
+        self.batches.append((collection_name, len(requests)))
+        return super().query_batch_points(collection_name, requests, **kwargs)
+
+    def query_points(self, *args, **kwargs):
+        self.queries += 1
+        return super().query_points(*args, **kwargs)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    calls = []
+    client = CountingClient()
+    embedders = (LocalModel("dense", calls), LocalModel("sparse", calls), LocalModel("late", calls))
+    monkeypatch.setattr(fused_retrieval, "_get_embedding_models", lambda: embedders)
+    monkeypatch.setitem(qdrant_schema._clients, URL, client)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+
+    for i, collection in enumerate(ROLE_TO_COLLECTION.values()):
+        _create_memory_collection(client, collection)
+        client.upsert(collection, [
+            models.PointStruct(
+                id=j + 1,
+                vector={
+                    "all-MiniLM-L6-v2": _vec(text, DENSE_VECTOR_SIZE),
+                    "bm25": models.SparseVector(indices=[len(text)], values=[1.0]),
+                    "colbertv2.0": np.vstack([_vec(text, LATE_INTERACTION_VECTOR_SIZE)] * 2).tolist(),
+                },
+                payload={"CAUHOI": text, "DEMUC": demuc},
+            )
+            for j, (text, demuc) in enumerate([
+                (f"{collection} braces care", "orthodontics"),
+                (f"{collection} diabetes diet", "nutrition"),
+                (f"{collection} implant cost", "surgery"),
+            ])
+        ])
+    calls.clear()
+    return calls, client
+
+
+def test_search_kb_batch_groups_requests_per_collection(env):
+    _, client = env
+    embeddings = fused_retrieval.embed_queries(["braces"])[0]
+    searches = [{"slot": "filtered", "collection": "bnrhm", "demuc": "surgery", "top_k": 4}]
+    searches += fused_retrieval.global_kb_searches(list(ROLE_TO_COLLECTION.values()), 4)
+
+    results = fused_retrieval.search_kb_batch(searches, embeddings, URL)
+
+    assert sorted(client.batches) == [("bndtd", 1), ("bnrhm", 2), ("bsnt", 1), ("bsrhm", 1)]
+    assert [r["CAUHOI"] for r in results["filtered"]] == ["bnrhm implant cost"]
+    assert results["global:bsnt"][0]["CAUHOI"] == "bsnt braces care"
+
+
+def test_kb_node_embeds_once_and_batches_per_collection(env):
+    calls, client = env
+    shared = {
+        "query": "braces hurt",
+        "retrieval_query": "braces pain after tightening",
+        "role": RoleEnum.PATIENT_DENTAL.value,
+        "top_k": 4,
+        "demuc": "orthodontics",
+    }
+
+    RetrieveFromKBWithDemuc().run(shared)
+
+    # The rewritten retrieval query is embedded once per model and shared by every search
+    assert sorted(calls) == [("query", "dense", 1), ("query", "late", 1), ("query", "sparse", 1)]
+    # Filtered and global searches go out as one batch per collection
+    assert sorted(client.batches) == [("bndtd", 1), ("bnrhm", 2), ("bsnt", 1), ("bsrhm", 1)]
+    assert client.queries == 0
+    assert shared["retrieved_candidates"][0]["CAUHOI"].endswith("braces care")
+    assert len(shared["retrieved_candidates"]) == 4
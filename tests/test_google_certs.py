@@ -0,0 +1,168 @@
+"""
+Tests for cached Google ID-token verification against a local stand-in cert endpoint
+"""
+import datetime
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt as google_jwt
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.google_certs import GoogleCertCache, cache_lifetime, verify_google_id_token
+
+AUDIENCE = "test-client.apps.googleusercontent.com"
+
+
+def _key_pair():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "stand-in")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class CertEndpoint:
+    """Serves {kid: PEM} with a configurable Cache-Control, counting requests."""
+
+    def __init__(self):
+        self.certs = {}
+        self.cache_control = "public, max-age=3600"
+        self.hits = 0
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                endpoint.hits += 1
+                body = json.dumps(endpoint.certs).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", endpoint.cache_control)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/oauth2/v1/certs"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def endpoint():
+    server = CertEndpoint()
+    yield server
+    server.server.shutdown()
+
+
+def _token(private_pem, kid, **claims):
+    now = int(time.time())
+    payload = {"iss": "https://accounts.google.com", "aud": AUDIENCE, "iat": now, "exp": now + 600,
+               "email": "patient@example.com", **claims}
+    return google_jwt.encode(crypt.RSASigner.from_string(private_pem, kid), payload).decode()
+
+
+def test_login_burst_fetches_certs_once(endpoint):
+    private_pem, cert_pem = _key_pair()
+    endpoint.certs = {"k1": cert_pem}
+    cache = GoogleCertCache(certs_url=endpoint.url)
+
+    for _ in range(20):
+        idinfo = verify_google_id_token(_token(private_pem, "k1"), AUDIENCE, cert_cache=cache)
+        assert idinfo["email"] == "patient@example.com"
+    assert endpoint.hits == 1
+
+    with pytest.raises(ValueError):
+        verify_google_id_token(_token(private_pem, "k1", aud="someone-else"), AUDIENCE, cert_cache=cache)
+    with pytest.raises(ValueError):
+        verify_google_id_token(_token(private_pem, "k1", iss="https://evil.example"), AUDIENCE, cert_cache=cache)
+    assert endpoint.hits == 1
+
+
+def test_expired_certs_and_key_rotation_refetch(endpoint):
+    private_pem, cert_pem = _key_pair()
+    endpoint.certs = {"k1": cert_pem}
+    endpoint.cache_control = "public, max-age=0"
+    cache = GoogleCertCache(certs_url=endpoint.url)
+
+    verify_google_id_token(_token(private_pem, "k1"), AUDIENCE, cert_cache=cache)
+    verify_google_id_token(_token(private_pem, "k1"), AUDIENCE, cert_cache=cache)
+    assert endpoint.hits == 2
+
+    endpoint.cache_control = "public, max-age=3600"
+    rotated_pem, rotated_cert = _key_pair()
+    verify_google_id_token(_token(private_pem, "k1"), AUDIENCE, cert_cache=cache)
+    endpoint.certs = {"k1": cert_pem, "k2": rotated_cert}
+    verify_google_id_token(_token(rotated_pem, "k2"), AUDIENCE, cert_cache=cache)
+    assert endpoint.hits == 4
+
+
+def test_background_refresh_before_expiry(endpoint):
+    _, cert_pem = _key_pair()
+    endpoint.certs = {"k1": cert_pem}
+    endpoint.cache_control = "public, max-age=2"
+    cache = GoogleCertCache(certs_url=endpoint.url, refresh_margin_seconds=1, min_refresh_interval_seconds=0.5)
+    cache.start()
+    try:
+        deadline = time.time() + 5
+        while endpoint.hits < 2 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        cache.stop()
+    assert endpoint.hits >= 2
+    assert cache.get_certs() == {"k1": cert_pem}
+
+
+def test_short_lifetime_does_not_spin_the_refresher():
+    class StubResponse:
+        headers = {"Cache-Control": "public, max-age=100"}  # below the 300s refresh margin
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"k1": "pem"}
+
+    class StubSession:
+        def get(self, url, timeout):
+            return StubResponse()
+
+    cache = GoogleCertCache(certs_url="stub", session=StubSession(), refresh_margin_seconds=300,
+                            min_refresh_interval_seconds=0.2)
+    cache.start()
+    try:
+        time.sleep(0.5)
+    finally:
+        cache.stop()
+    assert 2 <= cache.fetches <= 4
+
+
+def test_cache_lifetime_from_headers():
+    assert cache_lifetime({"Cache-Control": "public, max-age=19800, must-revalidate", "Age": "800"}, 60) == 19000
+    assert cache_lifetime({"Cache-Control": "no-cache"}, 60) == 0
+    assert cache_lifetime({}, 60) == 60
+    expires = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=120)
+    assert 100 < cache_lifetime({"Expires": expires.strftime("%a, %d %b %Y %H:%M:%S GMT")}, 60) <= 120
@@ -0,0 +1,61 @@
+"""
+Tests for the OQA orthodontist index (reference lookups and formatting)
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import kb_oqa
+from utils.knowledge_base.kb_oqa import (
+    OQAVectorIndex,
+    format_references_numbered,
+    get_parsed_references_by_ids,
+)
+
+OQA_CSV = str(project_root / "medical_knowledge_base" / "oqa_v1_dataset.csv")
+
+
+def test_id_hash_map_matches_dataframe():
+    idx = OQAVectorIndex(csv_path=OQA_CSV)
+    assert len(idx._references) == len(idx._df)
+    for doc_id, pos in list(idx._id_to_pos.items())[:50]:
+        first = idx._df.index[idx._df["id"] == doc_id][0]
+        assert pos == first
+    assert idx.get_reference("does-not-exist") is None
+
+
+def test_preparsed_references_format_like_raw_text():
+    idx = OQAVectorIndex(csv_path=OQA_CSV)
+    ids = list(idx._id_to_pos)[:25]
+    raw = {i: idx._df.at[idx._id_to_pos[i], "reference"] for i in ids}
+    parsed = {i: idx.get_reference(i) for i in ids}
+
+    assert format_references_numbered(ids, parsed) == format_references_numbered(ids, raw)
+
+
+def test_parsed_references_by_ids(monkeypatch):
+    monkeypatch.setattr(kb_oqa, "_OQA_INDEX", OQAVectorIndex(csv_path=OQA_CSV))
+    refs = get_parsed_references_by_ids([
+        "a8ef1b09-5acf-477a-a0d5-37ade21bee8f",
+        "does-not-exist",
+        "f7bc3ef3-892f-4cd2-a9b6-c8e14b05b666",
+    ])
+
+    assert refs == {
+        "a8ef1b09-5acf-477a-a0d5-37ade21bee8f": (
+            "Long-term Effectiveness and Treatment Timing for Bionator Therapy",
+            "https://doi.org/10.1043/0003-3219(2003)073<0221:LEATTF>2.0.CO;2",
+        ),
+        "f7bc3ef3-892f-4cd2-a9b6-c8e14b05b666": (
+            "Facial, Cranial and Cervical Pain Associated With Dysfunctions of the Occlusion and Articulations of the Teeth",
+            "https://doi.org/10.1043/0003-3219(1956)026<0121:FCACPA>2.0.CO;2",
+        ),
+    }
+
+
+def test_format_skips_unknown_ids():
+    out = format_references_numbered(["a", "b"], {"b": ("Title", "https://doi.org/1")})
+    assert out == ["[2] Title https://doi.org/1"]
@@ -0,0 +1,116 @@
+"""
+Tests for knowledge base hot reload (atomic swap + cache invalidation)
+"""
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import kb as kb_module
+from utils.knowledge_base import kb_oqa
+from utils.knowledge_base.kb_reload import KBFileWatcher, csv_fingerprint, reload_knowledge_bases
+
+
+def _write_kb(kb_dir: Path, question: str) -> None:
+    pd.DataFrame([{
+        "DEMUC": "BỆNH LÝ RĂNG MIỆNG",
+        "CHUDECON": "Sâu răng",
+        "MASO": "1",
+        "CAUHOI": question,
+        "CAUTRALOI": "Trả lời",
+        "keywords": "",
+        "GIAITHICH": "",
+    }]).to_csv(kb_dir / "bnrhm.csv", index=False, encoding="utf-8-sig")
+    pd.DataFrame([{
+        "question": "What causes orthodontic pain?",
+        "context": "Tooth movement causes inflammation.",
+        "answers": "",
+        "answer_sentence": "",
+        "topic": "pain",
+        "reference": "{'title': 'Pain', 'doi': 'https://doi.org/x'}",
+        "id": "oqa-1",
+    }]).to_csv(kb_dir / "oqa_v1_dataset.csv", index=False)
+
+
+def test_reload_swaps_index_and_invalidates_cache(tmp_path, monkeypatch):
+    _write_kb(tmp_path, "sâu răng là gì")
+    monkeypatch.setattr(kb_module, "_KB_INDEX", kb_module.KnowledgeBaseIndex(kb_dir=str(tmp_path)))
+    monkeypatch.setattr(kb_oqa, "_OQA_INDEX", None)
+
+    before, _ = kb_module.retrieve("sâu răng", role="patient_dental", top_k=1)
+    assert before[0]["cau_hoi"] == "sâu răng là gì"
+    old_generation = kb_module.get_kb_generation()
+
+    _write_kb(tmp_path, "sâu răng có lây không")
+    status = reload_knowledge_bases(kb_dir=str(tmp_path))
+
+    assert status["state"] == "succeeded"
+    assert kb_module.get_kb_generation() == old_generation + 1
+    after, _ = kb_module.retrieve("sâu răng", role="patient_dental", top_k=1)
+    assert after[0]["cau_hoi"] == "sâu răng có lây không"
+    assert kb_oqa.get_oqa_index().search("orthodontic pain", top_k=1)[0]["id"] == "oqa-1"
+
+
+def test_failed_reload_keeps_current_index(tmp_path, monkeypatch):
+    _write_kb(tmp_path, "sâu răng là gì")
+    current = kb_module.KnowledgeBaseIndex(kb_dir=str(tmp_path))
+    monkeypatch.setattr(kb_module, "_KB_INDEX", current)
+
+    status = reload_knowledge_bases(kb_dir=str(tmp_path / "missing"))
+
+    assert status["state"] == "failed"
+    assert kb_module.get_kb() is current
+
+
+def test_watcher_detects_csv_change(tmp_path, monkeypatch):
+    _write_kb(tmp_path, "sâu răng là gì")
+    watcher = KBFileWatcher(kb_dir=str(tmp_path), interval_seconds=1)
+    assert watcher.check_once() is False
+
+    calls = []
+    monkeypatch.setattr(
+        "utils.knowledge_base.kb_reload.reload_knowledge_bases",
+        lambda kb_dir: calls.append(kb_dir) or {"state": "succeeded"},
+    )
+    (tmp_path / "bnrhm.csv").write_text("DEMUC,CAUHOI\nA,B\nC,D\n", encoding="utf-8")
+
+    assert csv_fingerprint(str(tmp_path)) != watcher._fingerprint
+    assert watcher.check_once() is True
+    assert calls == [str(tmp_path)]
+
+
+def test_reload_request_reaches_other_workers_watchers(tmp_path, monkeypatch):
+    from utils.knowledge_base import kb_reload
+    _write_kb(tmp_path, "sâu răng là gì")
+    monkeypatch.setattr(kb_reload, "_served_fingerprint", None)
+    other_worker = KBFileWatcher(kb_dir=str(tmp_path), interval_seconds=1)
+
+    calls = []
+
+    def fake_reload(kb_dir):
+        calls.append(kb_dir)
+        kb_reload._served_fingerprint = csv_fingerprint(kb_dir)
+        return {"state": "succeeded"}
+
+    def fake_start(kb_dir):
+        fake_reload(kb_dir)
+        return True
+
+    monkeypatch.setattr(kb_reload, "start_reload_in_background", fake_start)
+    monkeypatch.setattr(kb_reload, "reload_knowledge_bases", fake_reload)
+
+    assert kb_reload.request_reload(str(tmp_path)) is True
+    assert (tmp_path / kb_reload.RELOAD_MARKER).exists()
+    assert calls == [str(tmp_path)]
+
+    # A watcher in a process that has not reloaded yet picks the marker up
+    kb_reload._served_fingerprint = None
+    assert other_worker.check_once() is True and len(calls) == 2
+    # The requesting worker's own watcher does not reload a second time
+    own_worker = KBFileWatcher(kb_dir=str(tmp_path), interval_seconds=1)
+    own_worker._fingerprint = ()
+    assert own_worker.check_once() is False and len(calls) == 2
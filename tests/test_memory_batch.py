@@ -0,0 +1,104 @@
+"""
+Tests for bulk memory writes (one embedding batch per model + one upsert)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.nodes.AddMemory import AddMemory
+from core.nodes.UpdateMemory import UpdateMemory
+from utils.knowledge_base import memory_retrieval, qdrant_schema
+from utils.knowledge_base.memory_retrieval import MEMORY_COLLECTION_NAME, save_user_memories
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+
+# Default URL the memory functions were bound to; the test swaps in a local client for it
+URL = memory_retrieval.QDRANT_URL
+
+
+class LocalModel:
+    """Deterministic local embedder recording how it is called (no model download)."""
+
+    def __init__(self, kind, calls):
+        self.kind, self.calls = kind, calls
+
+    def embed(self, texts):
+        texts = list(texts)
+        self.calls.append((self.kind, len(texts)))
+        for i, t in enumerate(texts):
+            if self.kind == "dense":
+                yield np.full(memory_retrieval.DENSE_VECTOR_SIZE, (len(t) % 7) + 1.0, dtype=np.float32)
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([len(t)]))
+            else:
+                yield np.ones((2, memory_retrieval.LATE_INTERACTION_VECTOR_SIZE), dtype=np.float32)
+
+
+class CountingClient(QdrantClient):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.upserts = []
+
+    def upsert(self, collection_name, points, **kwargs):
+        self.upserts.append(len(points))
+        return super().upsert(collection_name, points, **kwargs)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    calls = []
+    client = CountingClient()
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense", calls), LocalModel("sparse", calls), LocalModel("late", calls)),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, client)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    return calls, client
+
+
+def test_bulk_save_embeds_once_per_model_and_upserts_once(env):
+    calls, client = env
+    ids = save_user_memories("u1", [{"query": "a"}, {"query": "  "}, {"query": "bb"}, {"query": "ccc"}])
+
+    assert len(ids) == 3
+    assert sorted(calls) == [("dense", 3), ("late", 3), ("sparse", 3)]
+    assert client.upserts == [3]
+    assert client.count(MEMORY_COLLECTION_NAME).count == 3
+
+
+def test_add_and_update_share_one_bulk_write(env):
+    calls, client = env
+    existing = save_user_memories("u1", [{"query": "old"}])[0]
+    calls.clear()
+    client.upserts.clear()
+
+    shared = {
+        "user_id": "u1",
+        "memory_operations": {
+            "insert": [{"content": "likes mint"}, {"content": ""}],
+            "update": [{"memory_id": existing, "content": "new"}, {"content": "no id"}],
+            "delete": [],
+        },
+    }
+
+    async def run():
+        await AddMemory()._run_async(shared)
+        await UpdateMemory()._run_async(shared)
+
+    asyncio.run(run())
+
+    assert client.upserts == [2]
+    assert sorted(calls) == [("dense", 2), ("late", 2), ("sparse", 2)]
+    assert shared["add_memory_result"]["inserted"] == 1
+    assert shared["update_memory_result"]["updated"] == 1
+    assert shared["update_memory_result"]["batched_with_insert"] is True
+    assert client.retrieve(MEMORY_COLLECTION_NAME, [existing])[0].payload["query"] == "new"
@@ -0,0 +1,211 @@
+"""
+Tests for the per-user hot memory cache (local scoring, write-through, LRU bounds)
+and the cached per-user memory counts
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import memory_retrieval, qdrant_schema
+from core.nodes.RetrieveFromMemory import RetrieveFromMemory
+from utils.knowledge_base.memory_cache import CachedUserMemories, UserMemoryCache, UserMemoryCounts
+from utils.knowledge_base.memory_retrieval import (
+    DENSE_VECTOR_SIZE,
+    LATE_INTERACTION_VECTOR_SIZE,
+    delete_user_memory,
+    get_user_memory_count,
+    retrieve_user_memory,
+    save_user_memories,
+)
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+
+URL = memory_retrieval.QDRANT_URL
+WORDS = ["diabetes", "braces", "mint", "coffee"]
+
+
+def _dense(text):
+    v = np.full(DENSE_VECTOR_SIZE, 0.01, dtype=np.float32)
+    for i, w in enumerate(WORDS):
+        if w in text:
+            v[i] = 1.0
+    return v
+
+
+class LocalModel:
+    """Deterministic local embedder (no model download)."""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def embed(self, texts):
+        for t in texts:
+            if self.kind == "dense":
+                yield _dense(t)
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([len(t)]))
+            else:
+                yield np.ones((2, LATE_INTERACTION_VECTOR_SIZE), dtype=np.float32)
+
+    def query_embed(self, text):
+        return self.embed([text])
+
+
+class CountingClient(QdrantClient):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.queries = 0
+        self.scrolls = 0
+        self.counts = 0
+
+    def query_points(self, *args, **kwargs):
+        self.queries += 1
+        return super().query_points(*args, **kwargs)
+
+    def count(self, *args, **kwargs):
+        self.counts += 1
+        return super().count(*args, **kwargs)
+
+    def scroll(self, *args, **kwargs):
+        self.scrolls += 1
+        return super().scroll(*args, **kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = CountingClient()
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense"), LocalModel("sparse"), LocalModel("late")),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, c)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    monkeypatch.setattr(memory_retrieval, "memory_cache", UserMemoryCache(max_users=10, max_bytes=10**7, ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval, "memory_counts", UserMemoryCounts(max_users=10, ttl_seconds=0))
+    return c
+
+
+def test_small_user_is_scored_locally_and_kept_coherent(client):
+    assert retrieve_user_memory("u1", "anything") == []
+    assert client.scrolls == 1 and client.queries == 0
+
+    ids = save_user_memories("u1", [{"query": "has diabetes"}, {"query": "likes mint"}])
+    hits = retrieve_user_memory("u1", "diabetes diet", top_k=1)
+    assert hits[0]["query"] == "has diabetes"
+    assert client.scrolls == 1 and client.queries == 0
+
+    save_user_memories("u1", [{"query": "drinks coffee", "point_id": ids[0]}])
+    delete_user_memory([ids[1]])
+    hits = retrieve_user_memory("u1", "coffee", top_k=5)
+    assert [h["query"] for h in hits] == ["drinks coffee"]
+    assert client.scrolls == 1 and client.queries == 0
+
+
+def test_large_user_falls_back_to_qdrant(client, monkeypatch):
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_CACHE_SMALL_SET", 2)
+    save_user_memories("u2", [{"query": w} for w in WORDS])
+
+    retrieve_user_memory("u2", "braces")
+    retrieve_user_memory("u2", "braces")
+    assert client.scrolls == 1
+    assert client.queries == 2
+
+
+def test_lru_bounds_users_and_bytes():
+    def entry(n):
+        return CachedUserMemories(
+            [f"id{i}" for i in range(n)], ["x"] * n, [0.0] * n, np.ones((n, 8), np.float32), complete=True
+        )
+
+    cache = UserMemoryCache(max_users=2, max_bytes=10**6, ttl_seconds=0)
+    for user in ("a", "b", "c"):
+        cache.put("col", user, entry(1))
+    assert len(cache) == 2 and cache.get("col", "a") is None
+
+    small = UserMemoryCache(max_users=100, max_bytes=entry(3).nbytes * 2, ttl_seconds=0)
+    small.put("col", "a", entry(3))
+    small.put("col", "b", entry(3))
+    small.get("col", "a")
+    small.put("col", "c", entry(3))
+    assert small.get("col", "b") is None
+    assert small.get("col", "a") is not None
+    assert small.total_bytes <= small.max_bytes
+
+
+def test_load_overlapping_a_write_is_not_cached():
+    cache = UserMemoryCache(ttl_seconds=0, small_set=2)
+    stale = CachedUserMemories(["a"], ["old"], [0.0], np.ones((1, 8), np.float32), complete=True)
+
+    def loader():
+        # Another thread saves a memory while the scroll is in flight
+        cache.write_through("col", "u", ["b"], ["new"], np.ones((1, 8), np.float32), 1.0)
+        return stale
+
+    assert cache.get_or_load("col", "u", loader) is stale
+    assert cache.get("col", "u") is None
+    assert cache.get_or_load("col", "u", lambda: stale) is stale
+    assert cache.get("col", "u") is stale
+
+
+def test_entry_growing_past_small_set_leaves_local_search():
+    cache = UserMemoryCache(ttl_seconds=0, small_set=2)
+    cache.put("col", "u", CachedUserMemories(["a"], ["x"], [0.0], np.ones((1, 8), np.float32), complete=True))
+    cache.write_through("col", "u", ["b"], ["y"], np.ones((1, 8), np.float32), 1.0)
+    assert cache.get("col", "u").complete and len(cache.get("col", "u")) == 2
+
+    cache.write_through("col", "u", ["c"], ["z"], np.ones((1, 8), np.float32), 2.0)
+    entry = cache.get("col", "u")
+    assert not entry.complete and len(entry) == 0
+    assert cache.total_bytes == entry.nbytes
+
+
+def test_zero_counts_expire_sooner(monkeypatch):
+    from utils.knowledge_base import memory_cache
+    now = [1000.0]
+    monkeypatch.setattr(memory_cache.time, "monotonic", lambda: now[0])
+    counts = UserMemoryCounts(ttl_seconds=300, zero_ttl_seconds=30)
+    counts.set("col", "empty", 0)
+    counts.set("col", "full", 5)
+
+    now[0] += 31
+    assert counts.get("col", "empty") is None  # re-counted: another worker may have saved one
+    assert counts.get("col", "full") == 5
+
+
+def test_memory_count_is_maintained_by_writers(client, monkeypatch):
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_CACHE_ENABLED", False)
+    assert get_user_memory_count("u3") == 0
+    assert client.counts == 1
+
+    ids = save_user_memories("u3", [{"query": "has braces"}, {"query": "likes mint"}])
+    save_user_memories("u3", [{"query": "wears braces", "point_id": ids[0]}])
+    assert get_user_memory_count("u3") == 2
+
+    delete_user_memory([ids[1]], user_id="u3")
+    assert get_user_memory_count("u3") == 1
+    assert client.counts == 2
+
+
+def test_retrieve_node_skips_llm_rewrite_for_few_memories(client, monkeypatch):
+    import utils.llm
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("memory query rewrite should be skipped")
+
+    monkeypatch.setattr(utils.llm, "call_llm", no_llm)
+    node = RetrieveFromMemory()
+
+    shared = {"user_id": "u4", "query": "braces pain"}
+    node.run(shared)
+    assert shared["relevant_memories"] == []
+
+    save_user_memories("u4", [{"query": "has braces"}])
+    node.run(shared)
+    assert [m["query"] for m in shared["relevant_memories"]] == ["has braces"]
@@ -0,0 +1,142 @@
+"""
+Tests for background dedup/compaction of user memories
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import memory_compaction, memory_retrieval, qdrant_schema
+from utils.knowledge_base.memory_cache import UserMemoryCounts
+from utils.knowledge_base.memory_compaction import run_memory_compaction, select_redundant_memories
+from utils.knowledge_base.memory_retrieval import MEMORY_COLLECTION_NAME, get_user_memory_count, save_user_memories
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+
+URL = memory_retrieval.QDRANT_URL
+TOPICS = ["diabetes", "braces", "mint", "coffee", "smoker"]
+
+
+class LocalModel:
+    """Topic-keyword embedder: texts about the same topic are near-duplicates."""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def embed(self, texts):
+        for t in texts:
+            if self.kind == "dense":
+                v = np.full(memory_retrieval.DENSE_VECTOR_SIZE, 0.001, dtype=np.float32)
+                for i, w in enumerate(TOPICS):
+                    if w in t:
+                        v[i] = 1.0
+                yield v
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([len(t)]))
+            else:
+                yield np.ones((3, memory_retrieval.LATE_INTERACTION_VECTOR_SIZE), dtype=np.float32)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = QdrantClient(":memory:")
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense"), LocalModel("sparse"), LocalModel("late")),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, c)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    monkeypatch.setattr(memory_retrieval, "memory_counts", UserMemoryCounts(ttl_seconds=0))
+    return c
+
+
+def _texts(client, user_id):
+    points, _ = client.scroll(MEMORY_COLLECTION_NAME, limit=100, with_payload=True)
+    return sorted(p.payload["query"] for p in points if p.payload["user_id"] == user_id)
+
+
+def test_select_keeps_newest_of_each_cluster_and_caps():
+    vectors = np.array([[1, 0], [0.99, 0.05], [0, 1], [0.7, 0.7]], dtype=np.float32)
+    timestamps = [1.0, 2.0, 3.0, 0.5]
+
+    selection = select_redundant_memories(vectors, timestamps, 0.95, max_per_user=0)
+    assert selection == {"duplicates": [0], "over_cap": []}
+
+    selection = select_redundant_memories(vectors, timestamps, 0.95, max_per_user=2)
+    assert selection["over_cap"] == [3]
+
+
+def test_compaction_merges_duplicates_and_reports_bytes(client):
+    save_user_memories(1, [{"query": "has diabetes type 2"}, {"query": "likes mint"}])
+    save_user_memories(1, [{"query": "is a diabetes T2 patient"}])
+    save_user_memories(2, [{"query": "coffee lover"}, {"query": "smoker"}])
+    assert get_user_memory_count(1) == 3
+
+    status = run_memory_compaction(URL)
+
+    assert status["state"] == "succeeded"
+    assert status["users_scanned"] == 2
+    assert status["duplicates_removed"] == 1
+    assert status["bytes_reclaimed"] > 3 * memory_retrieval.LATE_INTERACTION_VECTOR_SIZE * 4
+    assert _texts(client, 1) == ["is a diabetes T2 patient", "likes mint"]
+    assert _texts(client, 2) == ["coffee lover", "smoker"]
+    assert get_user_memory_count(1) == 2
+
+
+def test_listed_users_are_compacted_end_to_end(client):
+    save_user_memories(7, [{"query": "has braces"}])
+    save_user_memories(7, [{"query": "wears braces"}])  # newer, so it is the one kept
+    save_user_memories(8, [{"query": "likes mint"}])
+
+    users = memory_compaction.list_memory_users(URL)
+    assert users == [7, 8]  # the payload's int ids, not strings
+
+    stats = memory_compaction.compact_user_memories(users[0], URL)
+    assert stats["scanned"] == 2 and stats["duplicates_removed"] == 1
+    assert _texts(client, 7) == ["wears braces"]
+    assert memory_compaction.compact_user_memories(users[1], URL)["scanned"] == 1
+
+
+def test_compaction_dry_run_and_per_user_cap(client, monkeypatch):
+    save_user_memories(1, [{"query": w} for w in TOPICS])
+
+    status = memory_compaction.compact_user_memories(1, URL, max_per_user=3, dry_run=True)
+    assert status["over_cap_removed"] == 2
+    assert len(_texts(client, 1)) == 5
+
+    memory_compaction.compact_user_memories(1, URL, max_per_user=3)
+    assert len(_texts(client, 1)) == 3
+
+
+def test_worker_pass_is_skipped_while_another_process_holds_the_lock(monkeypatch):
+    from contextlib import contextmanager
+    from sqlalchemy import create_engine
+    from database.advisory_lock import advisory_lock, advisory_lock_key
+
+    runs = []
+    monkeypatch.setattr(memory_compaction, "run_memory_compaction", lambda: runs.append(1))
+    held = {"other": True}
+
+    @contextmanager
+    def lock(name):
+        assert name == "memory_compaction"
+        yield not held["other"]
+
+    worker = memory_compaction.MemoryMaintenanceWorker(
+        "memory_compaction", lambda: memory_compaction.run_memory_compaction(), 60, lock=lock
+    )
+    assert worker.run_once() is False and runs == []
+    held["other"] = False
+    assert worker.run_once() is True and runs == [1]
+
+    # Only Postgres has other processes to coordinate with
+    with advisory_lock(create_engine("sqlite://"), "memory_compaction", blocking=False) as acquired:
+        assert acquired
+    assert advisory_lock_key("memory_compaction") == advisory_lock_key("memory_compaction")
+    assert -2**63 <= advisory_lock_key("memory_compaction") < 2**63
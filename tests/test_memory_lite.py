@@ -0,0 +1,140 @@
+"""
+Tests for the lite (dense+sparse) memory collection profile with client-side rerank
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import memory_retrieval, qdrant_schema
+from utils.knowledge_base.memory_cache import UserMemoryCache, UserMemoryCounts
+from utils.knowledge_base.memory_compaction import _point_nbytes
+from utils.knowledge_base.memory_retrieval import (
+    MEMORY_COLLECTION_NAME,
+    retrieve_user_memory,
+    save_user_memories,
+    uses_late_interaction,
+)
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+
+URL = memory_retrieval.QDRANT_URL
+WORDS = ["diabetes", "braces", "mint", "coffee"]
+TOKENS_PER_TEXT = 24
+
+
+def _word_vector(text, size):
+    v = np.full(size, 0.01, dtype=np.float32)
+    for i, w in enumerate(WORDS):
+        if w in text:
+            v[i] = 1.0
+    return v
+
+
+class LocalModel:
+    """Keyword embedder; the late model emits one token vector per text token."""
+
+    def __init__(self, kind, calls):
+        self.kind, self.calls = kind, calls
+
+    def embed(self, texts):
+        texts = list(texts)
+        self.calls.append(self.kind)
+        for t in texts:
+            if self.kind == "dense":
+                yield _word_vector(t, memory_retrieval.DENSE_VECTOR_SIZE)
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([len(t)]))
+            else:
+                size = memory_retrieval.LATE_INTERACTION_VECTOR_SIZE
+                yield np.vstack([_word_vector(t, size)] + [np.full(size, 0.01, np.float32)] * (TOKENS_PER_TEXT - 1))
+
+    def query_embed(self, text):
+        return self.embed([text])
+
+
+@pytest.fixture
+def env(monkeypatch):
+    calls = []
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense", calls), LocalModel("sparse", calls), LocalModel("late", calls)),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, client)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    monkeypatch.setattr(memory_retrieval, "_late_interaction_collections", {})
+    monkeypatch.setattr(memory_retrieval, "memory_cache", UserMemoryCache(ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval, "memory_counts", UserMemoryCounts(ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_CACHE_ENABLED", False)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_RECENCY_WEIGHT", 0.0)
+    return calls, client
+
+
+def _stored_bytes(client):
+    points, _ = client.scroll(MEMORY_COLLECTION_NAME, limit=100, with_payload=True, with_vectors=True)
+    return sum(_point_nbytes(p) for p in points)
+
+
+@pytest.mark.parametrize("rerank", ["dense", "colbert"])
+def test_lite_profile_stores_no_colbert_and_reranks_client_side(env, monkeypatch, rerank):
+    calls, client = env
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_VECTOR_PROFILE", "lite")
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_LITE_RERANK", rerank)
+
+    save_user_memories("u1", [{"query": f"user {w}"} for w in WORDS])
+    assert not uses_late_interaction()
+    assert "late" not in calls
+    assert "colbertv2.0" not in client.get_collection(MEMORY_COLLECTION_NAME).config.params.vectors
+
+    hits = retrieve_user_memory("u1", "coffee please", top_k=2)
+    assert hits[0]["query"] == "user coffee"
+    assert len(hits) == 2
+    assert ("late" in calls) == (rerank == "colbert")
+
+
+def test_lite_profile_is_an_order_of_magnitude_smaller(env, monkeypatch):
+    _, client = env
+    entries = [{"query": f"user {w}"} for w in WORDS]
+
+    save_user_memories("u1", entries)
+    full_bytes = _stored_bytes(client)
+
+    client.delete_collection(MEMORY_COLLECTION_NAME)
+    qdrant_schema.schema_registry.invalidate(URL, MEMORY_COLLECTION_NAME)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_VECTOR_PROFILE", "lite")
+
+    save_user_memories("u1", entries)
+    assert full_bytes >= 5 * _stored_bytes(client)
+
+
+def test_recreated_collection_profile_is_read_again(env, monkeypatch):
+    _, client = env
+    save_user_memories("u1", [{"query": "user braces"}])
+    assert uses_late_interaction()
+
+    # Deleted behind our back: the "not found" retry recreates it with the current profile
+    client.delete_collection(MEMORY_COLLECTION_NAME)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_VECTOR_PROFILE", "lite")
+    save_user_memories("u1", [{"query": "user mint"}])
+
+    assert not uses_late_interaction()
+    assert retrieve_user_memory("u1", "mint", top_k=5)[0]["query"] == "user mint"
+
+
+def test_existing_full_collection_keeps_colbert_rerank(env, monkeypatch):
+    _, client = env
+    save_user_memories("u1", [{"query": "user braces"}])
+
+    # Flipping the profile later does not change an existing collection
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_VECTOR_PROFILE", "lite")
+    save_user_memories("u1", [{"query": "user mint"}])
+
+    assert uses_late_interaction()
+    assert len(retrieve_user_memory("u1", "mint", top_k=5)) == 2
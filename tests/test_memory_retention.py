@@ -0,0 +1,153 @@
+"""
+Tests for memory retention: TTL filtering/purge and recency-weighted scores
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import memory_retrieval, qdrant_schema
+from utils.knowledge_base.memory_cache import UserMemoryCache, UserMemoryCounts
+from utils.knowledge_base.memory_compaction import run_memory_compaction
+from utils.knowledge_base.memory_retrieval import (
+    MEMORY_COLLECTION_NAME,
+    purge_expired_memories,
+    recency_weight,
+    retrieve_user_memory,
+    save_user_memories,
+)
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+
+URL = memory_retrieval.QDRANT_URL
+DAY = 86400
+
+
+class LocalModel:
+    """Every text embeds the same way, so only recency separates memories."""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def embed(self, texts):
+        for t in texts:
+            if self.kind == "dense":
+                yield np.ones(memory_retrieval.DENSE_VECTOR_SIZE, dtype=np.float32)
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([1]))
+            else:
+                yield np.ones((2, memory_retrieval.LATE_INTERACTION_VECTOR_SIZE), dtype=np.float32)
+
+    def query_embed(self, text):
+        return self.embed([text])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = QdrantClient(":memory:")
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense"), LocalModel("sparse"), LocalModel("late")),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, c)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    monkeypatch.setattr(memory_retrieval, "memory_cache", UserMemoryCache(ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval, "memory_counts", UserMemoryCounts(ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_TTL_DAYS", 30.0)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_RECENCY_WEIGHT", 0.5)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_RECENCY_HALF_LIFE_DAYS", 10.0)
+    return c
+
+
+def _save_aged(client, user_id, ages_days):
+    ids = save_user_memories(user_id, [{"query": f"memory {age}d"} for age in ages_days])
+    for point_id, age in zip(ids, ages_days):
+        client.set_payload(MEMORY_COLLECTION_NAME, {"timestamp": time.time() - age * DAY}, points=[point_id])
+    return ids
+
+
+def test_recency_weight_decays_to_floor(monkeypatch):
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_RECENCY_WEIGHT", 0.5)
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_RECENCY_HALF_LIFE_DAYS", 10.0)
+    now = 1_700_000_000.0
+    assert recency_weight(now, now) == pytest.approx(1.0)
+    assert recency_weight(now - 10 * DAY, now) == pytest.approx(0.75)
+    assert recency_weight(0, now) == pytest.approx(0.5, abs=1e-3)
+
+
+@pytest.mark.parametrize("cache_enabled", [True, False])
+def test_expired_hidden_and_recent_ranked_first(client, monkeypatch, cache_enabled):
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_CACHE_ENABLED", cache_enabled)
+    _save_aged(client, "u1", [20, 1, 45, 5])
+
+    hits = retrieve_user_memory("u1", "anything", top_k=10)
+
+    assert [h["query"] for h in hits] == ["memory 1d", "memory 5d", "memory 20d"]
+    assert hits[0]["score"] > hits[-1]["score"]
+
+
+def test_purge_deletes_expired_with_one_filter_delete(client, monkeypatch):
+    _save_aged(client, "u1", [1, 40])
+    _save_aged(client, "u2", [60, 90])
+
+    deletes = []
+    original = client.delete
+    monkeypatch.setattr(client, "delete", lambda **kw: deletes.append(kw) or original(**kw))
+
+    status = run_memory_compaction(URL)
+
+    assert status["expired_removed"] == 3
+    assert len(deletes) == 1
+    assert client.count(MEMORY_COLLECTION_NAME).count == 1
+    assert purge_expired_memories(URL) == 0
+
+
+def test_wrong_type_payload_index_is_recreated():
+    from types import SimpleNamespace
+    from qdrant_client import models
+
+    class IndexClient:
+        def __init__(self):
+            self.schema = {"user_id": SimpleNamespace(data_type=models.PayloadSchemaType.KEYWORD)}
+            self.calls = []
+
+        def get_collection(self, name):
+            return SimpleNamespace(payload_schema=dict(self.schema))
+
+        def delete_payload_index(self, collection_name, field_name):
+            self.calls.append(("delete", field_name))
+            self.schema.pop(field_name)
+
+        def create_payload_index(self, collection_name, field_name, field_schema):
+            self.calls.append(("create", field_name))
+            self.schema[field_name] = SimpleNamespace(data_type=field_schema)
+
+    c = IndexClient()
+    memory_retrieval.ensure_memory_payload_indexes(c)
+    assert c.calls == [("delete", "user_id"), ("create", "user_id"), ("create", "timestamp")]
+    assert c.schema["user_id"].data_type == models.PayloadSchemaType.INTEGER
+
+    c.calls.clear()
+    memory_retrieval.ensure_memory_payload_indexes(c)
+    assert c.calls == []
+
+
+def test_purge_worker_needs_a_ttl(monkeypatch):
+    from utils.knowledge_base import memory_compaction
+    monkeypatch.setattr(memory_compaction, "_workers", {})
+    monkeypatch.setattr(memory_compaction.MemoryMaintenanceWorker, "start", lambda self: None)
+
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_TTL_DAYS", 0)
+    assert memory_compaction.start_memory_purge_worker(60) is None
+
+    monkeypatch.setattr(memory_retrieval.memory_config, "MEMORY_TTL_DAYS", 30)
+    worker = memory_compaction.start_memory_purge_worker(60)
+    assert worker.name == "memory_purge" and worker.interval_seconds == 60
+    assert memory_compaction.start_memory_purge_worker(0) is None
@@ -0,0 +1,175 @@
+"""
+Tests for write-behind persistence of chat turns (aiosqlite stands in for asyncpg)
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Some test modules stub `database` in sys.modules at import time; use the real models here
+for name in ("database", "database.models"):
+    if not getattr(sys.modules.get(name), "__file__", None):
+        sys.modules.pop(name, None)
+
+pytest.importorskip("aiosqlite")
+
+from database.models import Base, Users, ChatThread, ChatMessage
+from services import message_persister
+from services.chat_service import ChatService
+from services.message_persister import MessageWriteBehind
+
+
+def _turn(thread_id, n, at):
+    return [
+        ChatMessage(id=f"{thread_id}-u{n}", thread_id=thread_id, role="user", content=f"hỏi {n}", timestamp=at),
+        ChatMessage(id=f"{thread_id}-b{n}", thread_id=thread_id, role="bot", content=f"đáp {n}",
+                    timestamp=at + timedelta(seconds=1)),
+    ]
+
+
+def _run(scenario):
+    async def main():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+        start = datetime(2025, 1, 1)
+        async with factory() as db:
+            db.add(Users(id=1, email="a@example.com", password="x"))
+            db.add_all([ChatThread(id=t, user_id=1, name=t, created_at=start, updated_at=start) for t in ("t1", "t2")])
+            await db.commit()
+        try:
+            await scenario(engine, factory)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_turns_from_many_requests_share_one_commit():
+    async def scenario(engine, factory):
+        commits = []
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+        counted = {}
+        persister = MessageWriteBehind(session_factory=factory, batch_size=64, max_delay_ms=50,
+                                       on_committed=counted.update)
+        at = datetime(2025, 1, 2)
+        for n in range(3):
+            persister.submit("t1", _turn("t1", n, at + timedelta(minutes=n)), at + timedelta(minutes=n, seconds=2))
+        persister.submit("t2", _turn("t2", 0, at), at + timedelta(seconds=2))
+
+        assert [m.id for m in persister.pending_messages("t1")] == [
+            "t1-u0", "t1-b0", "t1-u1", "t1-b1", "t1-u2", "t1-b2"
+        ]
+        await persister.flush()
+
+        assert persister.batches_committed == 1 and len(commits) == 1
+        assert persister.pending_messages("t1") == []
+        assert counted == {"t1": 6, "t2": 2}
+        async with factory() as db:
+            assert len((await db.execute(select(ChatMessage))).scalars().all()) == 8
+            threads = {t.id: t.updated_at for t in (await db.execute(select(ChatThread))).scalars()}
+        assert threads == {"t1": at + timedelta(minutes=2, seconds=2), "t2": at + timedelta(seconds=2)}
+
+    _run(scenario)
+
+
+def test_history_reads_its_own_queued_writes(monkeypatch):
+    async def scenario(engine, factory):
+        persister = MessageWriteBehind(session_factory=factory, max_delay_ms=300)
+        monkeypatch.setattr(message_persister, "_persister", persister)
+        async with factory() as db:
+            db.add_all(_turn("t1", 0, datetime(2025, 1, 2)))
+            await db.commit()
+
+            persister.submit("t1", _turn("t1", 1, datetime(2025, 1, 3)), datetime(2025, 1, 3))
+            _, history = await ChatService(db).get_thread_with_recent_history("t1", 1, limit=3)
+            assert [m.id for m in history] == ["t1-b0", "t1-u1", "t1-b1"]
+
+            await persister.flush()
+            _, history = await ChatService(db).get_thread_with_recent_history("t1", 1, limit=10)
+            assert [m.id for m in history] == ["t1-u0", "t1-b0", "t1-u1", "t1-b1"]
+
+    _run(scenario)
+
+
+def test_thread_readers_see_queued_writes(monkeypatch):
+    async def scenario(engine, factory):
+        persister = MessageWriteBehind(session_factory=factory, max_delay_ms=300)
+        monkeypatch.setattr(message_persister, "_persister", persister)
+        async with factory() as db:
+            db.add_all(_turn("t1", 0, datetime(2025, 1, 2)))
+            await db.commit()
+            persister.submit("t1", _turn("t1", 1, datetime(2025, 1, 3)), datetime(2025, 1, 3))
+            service = ChatService(db)
+
+            thread = await service.get_thread_with_messages("t1", 1)
+            assert [m.id for m in thread.messages] == ["t1-u0", "t1-b0", "t1-u1", "t1-b1"]
+
+            first = await service.get_thread_messages_paginated("t1", 1, limit=3, include_total=False)
+            assert [m.id for m in first.messages] == ["t1-u0", "t1-b0", "t1-u1"] and first.has_next
+            rest = await service.get_thread_messages_paginated("t1", 1, limit=3, cursor=first.next_cursor,
+                                                               include_total=False)
+            assert [m.id for m in rest.messages] == ["t1-b1"] and not rest.has_next
+            page_two = await service.get_thread_messages_paginated("t1", 1, page=2, limit=3, include_total=False)
+            assert [m.id for m in page_two.messages] == ["t1-b1"]
+
+            summary = {t.id: t for t in (await service.get_thread_summaries(1)).threads}["t1"]
+            assert summary.message_count == 4
+            assert (summary.last_message, summary.last_role) == ("đáp 1", "bot")
+
+        await persister.flush()
+
+    _run(scenario)
+
+
+def test_failed_batches_are_retried_then_dropped(monkeypatch):
+    async def scenario(engine, factory):
+        attempts = []
+
+        def broken_factory():
+            attempts.append(1)
+            raise RuntimeError("db down")
+
+        monkeypatch.setattr(message_persister, "_RETRY_BACKOFF_SECONDS", 0)
+        persister = MessageWriteBehind(session_factory=broken_factory, max_delay_ms=0)
+        persister.submit("t1", _turn("t1", 0, datetime(2025, 1, 2)), datetime(2025, 1, 2))
+        await persister.flush()
+
+        assert len(attempts) == 3
+        assert persister.batches_committed == 0
+        assert persister.pending_messages("t1") == []
+
+    _run(scenario)
+
+
+def test_one_bad_turn_does_not_drop_the_batch(monkeypatch):
+    async def scenario(engine, factory):
+        monkeypatch.setattr(message_persister, "_RETRY_BACKOFF_SECONDS", 0)
+        at = datetime(2025, 1, 2)
+        async with factory() as db:
+            db.add(_turn("t2", 0, at)[0])  # the queued t2 turn will collide with this row
+            await db.commit()
+
+        counted = {}
+        persister = MessageWriteBehind(session_factory=factory, max_delay_ms=50, on_committed=counted.update)
+        persister.submit("t1", _turn("t1", 0, at), at)
+        persister.submit("t2", _turn("t2", 0, at), at)
+        persister.submit("t1", _turn("t1", 1, at + timedelta(minutes=1)), at + timedelta(minutes=1))
+        await persister.flush()
+
+        assert counted == {"t1": 4}
+        assert persister.pending_messages("t2") == []
+        async with factory() as db:
+            ids = set((await db.execute(select(ChatMessage.id))).scalars())
+        assert ids == {"t1-u0", "t1-b0", "t1-u1", "t1-b1", "t2-u0"}
+
+    _run(scenario)
@@ -0,0 +1,100 @@
+"""
+Tests for the optional dense OQA index (memory-mapped .npy + hybrid fusion)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base.kb_oqa import OQAVectorIndex
+from utils.knowledge_base.oqa_dense import dense_index_path
+
+# Toy "semantic" space: synonyms share a dimension, so paraphrases embed close
+_CONCEPTS = {
+    "pain": 0, "ache": 0, "sore": 0, "hurt": 0,
+    "braces": 1, "brackets": 1, "aligners": 1,
+    "whitening": 2, "bleach": 2,
+}
+
+
+class ConceptEncoder:
+    """Deterministic local encoder so tests never download a model."""
+
+    name = "test-concepts"
+
+    def __init__(self):
+        self.document_calls = 0
+
+    def _vec(self, text):
+        v = np.zeros(len(set(_CONCEPTS.values())), dtype=np.float32)
+        for tok in text.lower().replace("?", " ").split():
+            if tok in _CONCEPTS:
+                v[_CONCEPTS[tok]] += 1.0
+        return v
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        return np.vstack([self._vec(t) for t in texts])
+
+    def embed_queries(self, texts):
+        return np.vstack([self._vec(t) for t in texts])
+
+
+def _write_csv(path: Path, rows):
+    pd.DataFrame([
+        {"question": q, "context": c, "answers": "", "answer_sentence": "", "topic": "t", "reference": "", "id": f"id-{i}"}
+        for i, (q, c) in enumerate(rows)
+    ]).to_csv(path, index=False)
+
+
+ROWS = [
+    ("Why do braces cause pain?", "Tooth movement triggers inflammation."),
+    ("Is whitening safe?", "Peroxide bleach can cause sensitivity."),
+    ("How long is treatment?", "Usually one to three years."),
+]
+
+
+def test_dense_index_is_built_once_then_memory_mapped(tmp_path):
+    csv = tmp_path / "oqa.csv"
+    _write_csv(csv, ROWS)
+    encoder = ConceptEncoder()
+
+    OQAVectorIndex(csv_path=str(csv), dense=True, encoder=encoder)
+    assert Path(dense_index_path(str(csv))).is_file()
+    assert encoder.document_calls == 1
+
+    idx = OQAVectorIndex(csv_path=str(csv), dense=True, encoder=encoder)
+    assert encoder.document_calls == 1
+    assert isinstance(idx._dense.vectors, np.memmap)
+
+    # Editing the CSV invalidates the on-disk index
+    _write_csv(csv, ROWS + [("Do aligners hurt?", "Mild soreness for a few days.")])
+    idx = OQAVectorIndex(csv_path=str(csv), dense=True, encoder=encoder)
+    assert encoder.document_calls == 2
+    assert len(idx._dense) == 4
+
+
+def test_hybrid_search_finds_paraphrase(tmp_path):
+    csv = tmp_path / "oqa.csv"
+    _write_csv(csv, ROWS)
+    idx = OQAVectorIndex(csv_path=str(csv), dense=True, encoder=ConceptEncoder())
+
+    # No keyword overlap with the first row: BM25 alone scores everything 0
+    assert idx.search("sore brackets", top_k=1, dense_weight=0)[0]["score"] == 0.0
+    hit = idx.search("sore brackets", top_k=1, dense_weight=0.5)[0]
+    assert hit["id"] == "id-0"
+    assert 0.0 < hit["score"] <= 1.0
+
+
+def test_dense_disabled_is_bm25_only(tmp_path):
+    csv = tmp_path / "oqa.csv"
+    _write_csv(csv, ROWS)
+    idx = OQAVectorIndex(csv_path=str(csv), dense=False)
+    assert not idx.has_dense
+    assert not Path(dense_index_path(str(csv))).exists()
+    assert idx.search("whitening", top_k=1)[0]["id"] == "id-1"
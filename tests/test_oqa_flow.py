@@ -0,0 +1,76 @@
+"""
+Tests for the async OQA orthodontist flow (wiring + batched retrieval)
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.flows import create_oqa_orthodontist_flow
+from core.nodes import oqa_nodes
+from utils.knowledge_base.kb_oqa import get_oqa_index, retrieve_oqa, retrieve_oqa_many
+
+CLASSIFY_YAML = """```yaml
+type: medical_question
+confidence: high
+rag_questions:
+  - What causes pain during orthodontic treatment?
+  - How long does orthodontic pain last?
+```"""
+
+
+def _fake_llm(responses, calls):
+    async def call_llm_async(prompt, **kwargs):
+        calls.append(prompt)
+        return responses.pop(0)
+    return call_llm_async
+
+
+def test_retrieve_many_matches_single_queries():
+    queries = ["orthodontic pain", "", "retention after braces"]
+    batch = retrieve_oqa_many(queries, top_k=3)
+    assert batch[1] == ([], 0.0)
+    for q, (res, score) in zip(queries, batch):
+        if q:
+            assert (res, score) == retrieve_oqa(q, top_k=3)
+
+
+def test_oqa_flow_classifies_retrieves_and_composes(monkeypatch):
+    get_oqa_index()
+    hit_id = retrieve_oqa("What causes pain during orthodontic treatment?", top_k=1)[0][0]["id"]
+    compose_yaml = f"""```yaml
+explanation: Đau do răng di chuyển.
+reference_ids:
+  - {hit_id}
+suggestion_questions:
+  - Đau kéo dài bao lâu?
+```"""
+    calls = []
+    monkeypatch.setattr(oqa_nodes, "call_llm_async", _fake_llm([CLASSIFY_YAML, compose_yaml], calls))
+
+    shared = {"role": "orthodontist", "input": "Why do braces hurt?", "conversation_history": []}
+    asyncio.run(create_oqa_orthodontist_flow().run_async(shared))
+
+    assert len(calls) == 2
+    assert shared["input_type"] == "medical_question"
+    assert 0 < len(shared["oqa_hits"]) <= 5
+    assert shared["need_clarify"] is False
+    assert "**Nguồn tham khảo:**" in shared["explain"]
+    assert shared["suggestion_questions"] == ["Đau kéo dài bao lâu?"]
+
+
+def test_oqa_flow_routes_chitchat(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        oqa_nodes, "call_llm_async",
+        _fake_llm(["```yaml\ntype: chitchat\n```", "Xin chào!"], calls),
+    )
+    shared = {"role": "orthodontist", "input": "hello", "conversation_history": []}
+    asyncio.run(create_oqa_orthodontist_flow().run_async(shared))
+
+    assert shared["input_type"] == "chitchat"
+    assert shared["explain"] == "Xin chào!"
+    assert "oqa_hits" not in shared
@@ -0,0 +1,66 @@
+"""
+Tests for bcrypt hashing on the dedicated password executor
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config.api_config import api_config
+from utils import password_hashing
+from utils.password_hashing import (
+    hash_password,
+    hash_password_async,
+    needs_rehash,
+    verify_password,
+    verify_password_async,
+)
+
+
+@pytest.fixture(autouse=True)
+def cheap_rounds(monkeypatch):
+    monkeypatch.setattr(api_config, "BCRYPT_ROUNDS", 4)
+
+
+def test_hash_uses_configured_work_factor_and_truncates():
+    hashed = hash_password("mật khẩu")
+    assert hashed.startswith("$2b$04$")
+    assert verify_password("mật khẩu", hashed)
+    assert not verify_password("wrong", hashed)
+    assert not verify_password("anything", "not-a-hash")
+
+    long_password = "x" * 100
+    assert verify_password("x" * 72 + "ignored", hash_password(long_password))
+
+
+def test_needs_rehash_when_work_factor_changes(monkeypatch):
+    hashed = hash_password("secret", rounds=5)
+    assert needs_rehash(hashed)
+    assert not needs_rehash(hash_password("secret"))
+    assert not needs_rehash("not-a-hash")
+
+
+def test_async_helpers_run_on_dedicated_executor(monkeypatch):
+    threads = []
+    original = password_hashing.verify_password
+
+    def recording_verify(password, hashed):
+        threads.append(threading.current_thread().name)
+        return original(password, hashed)
+
+    monkeypatch.setattr(password_hashing, "verify_password", recording_verify)
+
+    async def scenario():
+        hashed = await hash_password_async("secret")
+        results = await asyncio.gather(*(verify_password_async("secret", hashed) for _ in range(4)))
+        return results
+
+    assert asyncio.run(scenario()) == [True] * 4
+    assert threads and all(name.startswith("password-hash") for name in threads)
+    assert password_hashing.get_password_executor()._max_workers == max(1, api_config.PASSWORD_HASH_WORKERS)
@@ -0,0 +1,47 @@
+"""
+Tests for the authenticated-user (principal) cache
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils import principal_cache as principal_cache_module
+from utils.principal_cache import Principal, PrincipalCache
+
+
+def test_hit_until_ttl_then_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(max_entries=10, ttl_seconds=30)
+
+    cache.put(Principal(id=1, email="a@example.com"))
+    now[0] += 29
+    assert cache.get(1) == Principal(id=1, email="a@example.com")
+    now[0] += 2
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = PrincipalCache(max_entries=2, ttl_seconds=30)
+    cache.put(Principal(id=1, email="a@example.com"))
+    cache.put(Principal(id=2, email="b@example.com"))
+    cache.get(1)
+    cache.put(Principal(id=3, email="c@example.com"))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_invalidate_and_disabled_cache():
+    cache = PrincipalCache(max_entries=10, ttl_seconds=30)
+    cache.put(Principal(id=1, email="a@example.com"))
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    disabled = PrincipalCache(max_entries=10, ttl_seconds=0)
+    disabled.put(Principal(id=1, email="a@example.com"))
+    assert disabled.get(1) is None
@@ -0,0 +1,76 @@
+"""
+Tests for token-budgeted prompt assembly
+"""
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.llm.call_llm import estimate_tokens
+from utils.llm.prompt_builder import (
+    PromptBuilder,
+    PRIORITY_HISTORY,
+    PRIORITY_KB,
+    PRIORITY_MEMORY,
+    PRIORITY_QUERY,
+    dedupe_kb_hits,
+    truncate_to_tokens,
+)
+
+TEMPLATE = "Q: {query}\nKB:\n{kb}\nMEM:\n{memory}\nHIST:\n{history}\n"
+
+
+def _builder(budget):
+    return (
+        PromptBuilder("test", TEMPLATE, budget=budget)
+        .add("query", "câu hỏi " * 20, PRIORITY_QUERY, required=True)
+        .add_items("kb", [f"kb item {i} " * 10 for i in range(5)], PRIORITY_KB)
+        .add_items("memory", [f"memory {i} " * 10 for i in range(5)], PRIORITY_MEMORY, empty="(none)")
+        .add_items("history", [f"line {i} " * 10 for i in range(5)], PRIORITY_HISTORY, keep_newest=True)
+    )
+
+
+def test_everything_fits_a_large_budget():
+    built = _builder(10000).build()
+    assert built.trimmed == {}
+    assert "kb item 4" in built.text and "memory 4" in built.text and "line 0" in built.text
+    assert built.tokens == estimate_tokens(built.text)
+
+
+def test_sections_are_trimmed_by_priority():
+    full = _builder(10000).build().tokens
+    built = _builder(full - 30).build()
+    # History goes first, oldest lines first
+    assert set(built.trimmed) == {"history"}
+    assert "line 4" in built.text and "line 0" not in built.text
+    assert built.tokens <= full - 30
+
+    built = _builder(120).build()
+    assert "câu hỏi" in built.text  # the query is never cut
+    assert "kb item 0" in built.text
+    assert "memory 0" not in built.text and "(none)" in built.text
+    assert built.trimmed["history"] == 5 and built.trimmed["memory"] == 5
+
+
+def test_text_sections_are_cut_to_fit():
+    built = (
+        PromptBuilder("test", "{query}|{summary}", budget=40)
+        .add("query", "hỏi", required=True)
+        .add("summary", "tóm tắt dài " * 100, PRIORITY_HISTORY, keep_tail=True)
+        .build()
+    )
+    assert built.trimmed == {"summary": -1}
+    assert built.tokens <= 40 and built.text.startswith("hỏi|…")
+    assert truncate_to_tokens("abc", 0) == ""
+
+
+def test_duplicate_qas_are_dropped_keeping_the_first():
+    hits = [
+        {"id": 1, "CAUHOI": "Niềng răng có đau không?", "CAUTRALOI": "a"},
+        {"id": 2, "CAUHOI": "niềng răng có đau không", "CAUTRALOI": "b"},
+        {"id": 1, "CAUHOI": "Khác", "CAUTRALOI": "c"},
+        {"id": 3, "question": "Other?", "CAUTRALOI": "d"},
+    ]
+    assert [hit["CAUTRALOI"] for hit in dedupe_kb_hits(hits)] == ["a", "d"]
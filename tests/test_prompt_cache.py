@@ -0,0 +1,158 @@
+"""
+Tests for provider-side prompt prefix caching (fake caches client)
+"""
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+pytest.importorskip("google.genai")
+
+from utils.llm.prompt_builder import PromptBuilder
+from utils.llm.prompt_cache import PromptPrefixCache, prefix_fingerprint
+
+PREFIX = "Hướng dẫn cố định cho vai trò. " * 20
+
+
+class FakeCaches:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.created = []
+        self.deleted = []
+
+    def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("model does not support caching")
+        self.created.append((model, config.contents[0], config.display_name, config.ttl))
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    def delete(self, name):
+        self.deleted.append(name)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(caches, clock, min_tokens=10):
+    client = SimpleNamespace(caches=caches)
+    return PromptPrefixCache(lambda: client, enabled=True, ttl_seconds=600, min_tokens=min_tokens, clock=clock)
+
+
+def test_prefix_is_registered_once_and_reused():
+    caches, clock = FakeCaches(), Clock()
+    cache = _cache(caches, clock)
+
+    assert cache.lookup("compose_answer:patient_dental", PREFIX, "gemini-x") == "cachedContents/1"
+    assert cache.lookup("compose_answer:patient_dental", PREFIX, "gemini-x") == "cachedContents/1"
+    assert caches.created == [("gemini-x", PREFIX, "compose_answer:patient_dental", "600s")]
+
+    # Near expiry the prefix is registered again
+    clock.now += 600 - 30
+    assert cache.lookup("compose_answer:patient_dental", PREFIX, "gemini-x") == "cachedContents/2"
+
+
+def test_changed_prefix_replaces_the_stale_cache():
+    caches, clock = FakeCaches(), Clock()
+    cache = _cache(caches, clock)
+
+    cache.lookup("classify_demuc:patient_dental", PREFIX, "gemini-x")
+    assert cache.lookup("classify_demuc:patient_dental", PREFIX + "DEMUC mới", "gemini-x") == "cachedContents/2"
+    assert caches.deleted == ["cachedContents/1"]
+    assert prefix_fingerprint("gemini-x", PREFIX) != prefix_fingerprint("gemini-y", PREFIX)
+
+
+def test_short_or_refused_prefixes_are_sent_inline():
+    caches, clock = FakeCaches(), Clock()
+    assert _cache(caches, clock, min_tokens=10_000).lookup("rag_agent", PREFIX, "gemini-x") is None
+    assert caches.created == []
+
+    failing = FakeCaches(fail=True)
+    cache = _cache(failing, clock)
+    assert cache.lookup("rag_agent", PREFIX, "gemini-x") is None
+    failing.fail = False
+    assert cache.lookup("rag_agent", PREFIX, "gemini-x") is None  # still cooling down
+    clock.now += 301
+    assert cache.lookup("rag_agent", PREFIX, "gemini-x") == "cachedContents/1"
+
+
+def test_builder_keeps_the_prefix_verbatim():
+    built = (
+        PromptBuilder("test", "Q: {query}\n{kb}", budget=10_000, prefix=PREFIX)
+        .add("query", "đau răng", required=True)
+        .add_items("kb", ["a", "b"], 1)
+        .build()
+    )
+    assert built.text.startswith(PREFIX)
+    assert built.suffix == "Q: đau răng\na\nb"
+
+
+
+def _client_error(code, status):
+    import requests
+    from google.genai import errors
+
+    response = requests.Response()
+    response.status_code = code
+    response._content = ('{"error": {"code": %d, "status": "%s", "message": "x"}}' % (code, status)).encode()
+    return (errors.ServerError if code >= 500 else errors.ClientError)(code, response)
+
+
+def _prefix_call(monkeypatch, error, use_async, invalidated, inline):
+    """call_llm_with_prefix(_async) against a cached prefix the provider answers with `error`"""
+    import asyncio
+    llm = sys.modules["utils.llm.call_llm"]
+
+    def generate(**kwargs):
+        raise error
+
+    async def agenerate(**kwargs):
+        raise error
+
+    async def inline_async(prompt, *args):
+        inline.append(prompt)
+        return "inline"
+
+    cache = SimpleNamespace(lookup=lambda key, prefix, model: "cachedContents/1", invalidate=invalidated.append)
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setattr("utils.llm.prompt_cache.get_prompt_prefix_cache", lambda: cache)
+    monkeypatch.setattr(llm.genai, "Client", lambda api_key: SimpleNamespace(
+        models=SimpleNamespace(generate_content=generate),
+        aio=SimpleNamespace(models=SimpleNamespace(generate_content=agenerate)),
+    ))
+    monkeypatch.setattr(llm, "call_llm", lambda prompt, *args: inline.append(prompt) or "inline")
+    monkeypatch.setattr(llm, "call_llm_async", inline_async)
+    if use_async:
+        return asyncio.run(llm.call_llm_with_prefix_async("rag_agent", PREFIX, "Q"))
+    return llm.call_llm_with_prefix("rag_agent", PREFIX, "Q")
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_missing_cached_prefix_is_resent_inline(monkeypatch, use_async):
+    import utils.llm.call_llm  # noqa: F401
+
+    for code, status in [(404, "NOT_FOUND"), (400, "INVALID_ARGUMENT")]:
+        invalidated, inline = [], []
+        result = _prefix_call(monkeypatch, _client_error(code, status), use_async, invalidated, inline)
+        assert (result, invalidated, inline) == ("inline", ["rag_agent"], [PREFIX + "Q"])
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_overload_errors_propagate_and_keep_the_cache(monkeypatch, use_async):
+    import utils.llm.call_llm  # noqa: F401
+
+    for code, status in [(429, "RESOURCE_EXHAUSTED"), (503, "UNAVAILABLE")]:
+        invalidated, inline = [], []
+        error = _client_error(code, status)
+        with pytest.raises(type(error)):
+            _prefix_call(monkeypatch, error, use_async, invalidated, inline)
+        assert invalidated == [] and inline == []
@@ -0,0 +1,91 @@
+"""
+Tests for the process-level Qdrant collection registry
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient, models
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.knowledge_base import qdrant_schema
+from utils.knowledge_base.memory_retrieval import MEMORY_COLLECTION_NAME, _create_memory_collection
+from utils.knowledge_base.qdrant_schema import CollectionRegistry, run_with_collection
+
+URL = "test-memory-qdrant"
+
+
+class CountingClient(QdrantClient):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.exists_calls = 0
+
+    def collection_exists(self, collection_name, **kwargs):
+        self.exists_calls += 1
+        return super().collection_exists(collection_name, **kwargs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    c = CountingClient()
+    monkeypatch.setitem(qdrant_schema._clients, URL, c)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    return c
+
+
+def _count(client):
+    return client.count(MEMORY_COLLECTION_NAME).count
+
+
+def test_collection_is_created_and_verified_once(client):
+    registry = qdrant_schema.schema_registry
+    registry.register(MEMORY_COLLECTION_NAME, _create_memory_collection)
+
+    assert registry.verify_all(URL) == {MEMORY_COLLECTION_NAME: True}
+    assert client.collection_exists(MEMORY_COLLECTION_NAME)
+    client.exists_calls = 0
+
+    for _ in range(5):
+        assert run_with_collection(URL, MEMORY_COLLECTION_NAME, _count) == 0
+    assert client.exists_calls == 0
+
+
+def test_not_found_triggers_recreate_and_retry(client):
+    qdrant_schema.schema_registry.register(MEMORY_COLLECTION_NAME, _create_memory_collection)
+    assert run_with_collection(URL, MEMORY_COLLECTION_NAME, _count) == 0
+
+    client.delete_collection(MEMORY_COLLECTION_NAME)
+    assert run_with_collection(URL, MEMORY_COLLECTION_NAME, _count) == 0
+    assert client.collection_exists(MEMORY_COLLECTION_NAME)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_verify_only_collection_is_not_created(client, monkeypatch):
+    clock = Clock()
+    registry = CollectionRegistry(missing_ttl_seconds=10, clock=clock)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", registry)
+    registry.register("bnrhm")
+
+    assert registry.verify_all(URL) == {"bnrhm": False}
+    client.exists_calls = 0
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            run_with_collection(URL, "bnrhm", lambda c: c.count("bnrhm"))
+    assert client.exists_calls == 0  # the missing result is cached
+
+    client.create_collection("bnrhm", vectors_config=models.VectorParams(size=4, distance=models.Distance.COSINE))
+    with pytest.raises(RuntimeError):
+        run_with_collection(URL, "bnrhm", lambda c: c.count("bnrhm"))
+    clock.now += 10
+    assert run_with_collection(URL, "bnrhm", lambda c: c.count("bnrhm").count) == 0
+    assert client.exists_calls == 1
@@ -0,0 +1,126 @@
+"""
+Tests for the bulk user purge job (Qdrant filter delete + set-based SQL cascade)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastembed import SparseEmbedding
+from qdrant_client import QdrantClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Some test modules stub `database` in sys.modules at import time; use the real models here
+for name in ("database", "database.models"):
+    if not getattr(sys.modules.get(name), "__file__", None):
+        sys.modules.pop(name, None)
+
+from database.models import Base, Users, ChatThread, ChatMessage
+from services.user_purge_service import get_purge_job, start_user_purge
+from utils.knowledge_base import memory_retrieval, qdrant_schema
+from utils.knowledge_base.memory_cache import UserMemoryCache, UserMemoryCounts
+from utils.knowledge_base.memory_retrieval import MEMORY_COLLECTION_NAME, save_user_memories
+from utils.knowledge_base.qdrant_schema import CollectionRegistry
+from utils.principal_cache import Principal, principal_cache
+
+URL = memory_retrieval.QDRANT_URL
+
+
+class LocalModel:
+    def __init__(self, kind):
+        self.kind = kind
+
+    def embed(self, texts):
+        for t in texts:
+            if self.kind == "dense":
+                yield np.ones(memory_retrieval.DENSE_VECTOR_SIZE, dtype=np.float32)
+            elif self.kind == "sparse":
+                yield SparseEmbedding(values=np.array([1.0]), indices=np.array([len(t)]))
+            else:
+                yield np.ones((2, memory_retrieval.LATE_INTERACTION_VECTOR_SIZE), dtype=np.float32)
+
+
+class DeleteCountingClient(QdrantClient):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.deletes = []
+
+    def delete(self, collection_name, points_selector, **kwargs):
+        self.deletes.append(points_selector)
+        return super().delete(collection_name, points_selector, **kwargs)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    client = DeleteCountingClient()
+    monkeypatch.setattr(
+        memory_retrieval, "_get_embedding_models",
+        lambda: (LocalModel("dense"), LocalModel("sparse"), LocalModel("late")),
+    )
+    monkeypatch.setitem(qdrant_schema._clients, URL, client)
+    monkeypatch.setattr(qdrant_schema, "schema_registry", CollectionRegistry())
+    monkeypatch.setattr(memory_retrieval, "memory_cache", UserMemoryCache(ttl_seconds=0))
+    monkeypatch.setattr(memory_retrieval, "memory_counts", UserMemoryCounts(ttl_seconds=0))
+    principal_cache.clear()
+
+    engine = create_engine("sqlite://")
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, sql, *a: statements.append(sql))
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    with Session() as db:
+        for uid in (1, 2):
+            db.add(Users(id=uid, email=f"u{uid}@x.com", password="x"))
+            for t in range(3):
+                thread_id = f"t{uid}-{t}"
+                db.add(ChatThread(id=thread_id, user_id=uid, name="n"))
+                for m in range(4):
+                    db.add(ChatMessage(id=f"{thread_id}-{m}", thread_id=thread_id, role="user", content="hi"))
+        db.commit()
+
+    save_user_memories(1, [{"query": f"fact {i}"} for i in range(5)])
+    save_user_memories(2, [{"query": "other user fact"}])
+    statements.clear()
+    client.deletes.clear()
+    return client, Session, statements
+
+
+def test_purge_removes_everything_for_one_user_in_bulk(env):
+    client, Session, statements = env
+    principal_cache.put(Principal(id=1, email="a@example.com"))
+    principal_cache.put(Principal(id=2, email="b@example.com"))
+
+    job = start_user_purge(1, session_factory=Session, background=False)
+
+    assert job["state"] == "succeeded"
+    assert principal_cache.get(1) is None
+    assert principal_cache.get(2) is not None
+    assert job["deleted"] == {"memories": 5, "messages": 12, "threads": 3, "users": 1}
+    assert len(client.deletes) == 1
+    assert sum(s.startswith("DELETE") for s in statements) == 3
+
+    with Session() as db:
+        assert db.query(Users).count() == 1
+        assert db.query(ChatThread).count() == 3
+        assert db.query(ChatMessage).count() == 12
+    points, _ = client.scroll(MEMORY_COLLECTION_NAME, limit=10, with_payload=True)
+    assert [p.payload["user_id"] for p in points] == [2]
+    assert get_purge_job(job["job_id"])["state"] == "succeeded"
+
+
+def test_failed_memory_delete_leaves_account_for_retry(env, monkeypatch):
+    client, Session, _ = env
+    monkeypatch.setattr(client, "count", lambda *a, **kw: (_ for _ in ()).throw(RuntimeError("qdrant down")))
+
+    job = start_user_purge(1, session_factory=Session, background=False)
+
+    assert job["state"] == "failed"
+    assert "qdrant down" in job["error"]
+    with Session() as db:
+        assert db.query(Users).filter(Users.id == 1).count() == 1
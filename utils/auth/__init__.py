@@ -9,6 +9,8 @@ from .auth import (
     get_current_user,
     Token,
 )
+from utils.principal_cache import Principal, principal_cache
+from utils.password_hashing import hash_password_async, verify_password_async, needs_rehash
 
 __all__ = [
     "safe_hash_password",
@@ -16,4 +18,9 @@ __all__ = [
     "create_access_token",
     "get_current_user",
     "Token",
+    "Principal",
+    "principal_cache",
+    "hash_password_async",
+    "verify_password_async",
+    "needs_rehash",
 ]
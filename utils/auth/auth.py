@@ -16,12 +16,13 @@ except ImportError as e:
     print(" Please install python-jose: pip install python-jose[cryptography]")
     raise ImportError("Missing required dependency: python-jose[cryptography]") from e
 from passlib.context import CryptContext
-from passlib.hash import bcrypt  # For explicit bcrypt operations
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from database.db import get_db
+from database.db import get_sync_db
 from database.models import Users
+from utils.principal_cache import Principal, principal_cache
+from utils.password_hashing import hash_password, verify_password as _verify_password_hash
 
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "my-super-secret-key-please-change-in-production")
@@ -53,25 +54,16 @@ def get_password_hash(password):
 def safe_hash_password(password: str) -> str:
     """
     Safely hash a password using bcrypt, truncating to 72 bytes to avoid backend errors.
-    Note: bcrypt ignores bytes beyond 72; truncation ensures consistent behavior across backends.
+    Blocking: from async code use `hash_password_async` (dedicated executor).
     """
-    password_bytes = password.encode("utf-8")[:72]
-    # Convert back to string for passlib bcrypt
-    truncated_password = password_bytes.decode("utf-8", errors="ignore")
-    return bcrypt.hash(truncated_password)
+    return hash_password(password)
 
 def safe_verify_password(password: str, hashed: str) -> bool:
     """
     Safely verify a password against a bcrypt hash, truncating to 72 bytes first.
-    Returns False on any verification error.
+    Returns False on any verification error. Blocking: from async code use `verify_password_async`.
     """
-    try:
-        password_bytes = password.encode("utf-8")[:72]
-        # Convert back to string for passlib bcrypt
-        truncated_password = password_bytes.decode("utf-8", errors="ignore")
-        return bcrypt.verify(truncated_password, hashed)
-    except Exception:
-        return False
+    return _verify_password_hash(password, hashed)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT token"""
@@ -82,8 +74,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current user from JWT token"""
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_sync_db)) -> Principal:
+    """Get the current user from JWT token (user row cached briefly, see utils.principal_cache)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -105,9 +97,15 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except ValueError:
         raise credentials_exception
     
+    principal = principal_cache.get(token_data.user_id)
+    if principal is not None:
+        return principal
+    
     # Fetch the user from database
     user = db.query(Users).filter(Users.id == token_data.user_id).first()
     if user is None:
         raise credentials_exception
-        
-    return user
+    
+    principal = Principal(id=user.id, email=user.email)
+    principal_cache.put(principal)
+    return principal
@@ -0,0 +1,196 @@
+"""
+Cached verification of Google ID tokens.
+
+`id_token.verify_oauth2_token` downloads Google's signing certificates on
+every call. Here the certificates are fetched through one pooled HTTP session,
+kept for as long as the response's Cache-Control max-age (minus Age, or
+Expires) allows, and refreshed by a background thread shortly before they
+expire. Verifying a token is then a local signature check. A token signed by
+an unknown key id forces one refresh, rate limited, to pick up key rotation
+early.
+"""
+
+import email.utils
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+from google.auth import jwt as google_jwt
+from requests.adapters import HTTPAdapter
+
+from config.api_config import api_config
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+# Minimum gap between forced refreshes triggered by unknown key ids
+_FORCED_REFRESH_INTERVAL_SECONDS = 30
+# Retry delay for the background refresher after a failed fetch
+_RETRY_SECONDS = 30
+# Minimum gap between background refreshes (lifetimes at or below the margin would otherwise spin)
+_MIN_REFRESH_INTERVAL_SECONDS = _RETRY_SECONDS
+
+
+def cache_lifetime(headers: Mapping[str, str], default: int) -> int:
+    """Seconds a certs response may be cached, from Cache-Control/Age or Expires."""
+    cache_control = headers.get("Cache-Control", "")
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    if match:
+        try:
+            age = int(headers.get("Age", "0"))
+        except ValueError:
+            age = 0
+        return max(0, int(match.group(1)) - age)
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return max(0, int(email.utils.parsedate_to_datetime(expires).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return 0
+    return default
+
+
+def create_pooled_session(pool_size: int = 4) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class GoogleCertCache:
+    """Google signing certificates (key id -> PEM) with HTTP-cache lifetime and background refresh."""
+
+    def __init__(
+        self,
+        certs_url: str = api_config.GOOGLE_CERTS_URL,
+        session: Optional[requests.Session] = None,
+        refresh_margin_seconds: int = api_config.GOOGLE_CERTS_REFRESH_MARGIN_SECONDS,
+        default_max_age_seconds: int = api_config.GOOGLE_CERTS_DEFAULT_MAX_AGE_SECONDS,
+        timeout_seconds: float = 5.0,
+        min_refresh_interval_seconds: float = _MIN_REFRESH_INTERVAL_SECONDS,
+    ) -> None:
+        self.certs_url = certs_url
+        self.session = session or create_pooled_session()
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.default_max_age_seconds = default_max_age_seconds
+        self.timeout_seconds = timeout_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self.fetches = 0
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_forced = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> Dict[str, str]:
+        """Fetch the certificates now (blocking); the background refresher picks up the new expiry."""
+        response = self.session.get(self.certs_url, timeout=self.timeout_seconds)
+        response.raise_for_status()
+        certs = response.json()
+        lifetime = cache_lifetime(response.headers, self.default_max_age_seconds)
+        with self._lock:
+            self._certs = certs
+            self._expires_at = time.monotonic() + lifetime
+            self.fetches += 1
+        logger.info(f"🔑 Google signing certs refreshed ({len(certs)} keys, cached {lifetime}s)")
+        return certs
+
+    def get_certs(self, key_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        Current certificates; fetched synchronously only when missing or expired,
+        or once (rate limited) when `key_id` is unknown.
+        """
+        with self._lock:
+            certs, fresh = self._certs, time.monotonic() < self._expires_at
+            unknown_key = bool(certs) and fresh and bool(key_id) and key_id not in certs
+            force = unknown_key and time.monotonic() - self._last_forced >= _FORCED_REFRESH_INTERVAL_SECONDS
+            if force:
+                self._last_forced = time.monotonic()
+        if certs and fresh and not force:
+            return certs
+        # Single flight: a cold cache under a login burst is fetched once
+        with self._refresh_lock:
+            with self._lock:
+                if self._certs is not certs and time.monotonic() < self._expires_at:
+                    return self._certs
+            return self.refresh()
+
+    def start(self) -> None:
+        """Start the background refresher (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="google-certs", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _seconds_until_refresh(self) -> float:
+        with self._lock:
+            if not self._certs:
+                return 0.0
+            return max(0.0, self._expires_at - self.refresh_margin_seconds - time.monotonic())
+
+    def _run(self) -> None:
+        last_refresh = None
+        while not self._stop.is_set():
+            delay = self._seconds_until_refresh()
+            if last_refresh is not None:
+                # Never faster than the floor, even for lifetimes at or below the margin
+                delay = max(delay, last_refresh + self.min_refresh_interval_seconds - time.monotonic())
+            if delay > 0:
+                self._wake.wait(delay)
+                continue
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Google cert refresh failed: {e}")
+                self._stop.wait(_RETRY_SECONDS)
+            last_refresh = time.monotonic()
+
+
+_cert_cache: Optional[GoogleCertCache] = None
+_cert_cache_lock = threading.Lock()
+
+
+def get_google_cert_cache() -> GoogleCertCache:
+    """Process-wide cert cache; its background refresher starts with it."""
+    global _cert_cache
+    with _cert_cache_lock:
+        if _cert_cache is None:
+            _cert_cache = GoogleCertCache()
+            _cert_cache.start()
+        return _cert_cache
+
+
+def verify_google_id_token(
+    token: str,
+    audience: Optional[str] = None,
+    cert_cache: Optional[GoogleCertCache] = None,
+    clock_skew_in_seconds: int = 0,
+) -> Dict[str, Any]:
+    """
+    Drop-in for `id_token.verify_oauth2_token` backed by the cert cache.
+
+    Raises:
+        ValueError: Bad signature, expired token, wrong audience or wrong issuer
+    """
+    cert_cache = cert_cache or get_google_cert_cache()
+    key_id = google_jwt.decode_header(token).get("kid")
+    certs = cert_cache.get_certs(key_id)
+    idinfo = google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=clock_skew_in_seconds)
+    if idinfo.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}")
+    return idinfo
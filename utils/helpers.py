@@ -26,27 +26,16 @@ else:
 
 
 
-def format_kb_qa_list(hits: List[Dict[str, Any]], max_items: int = 10, include_explanation: bool = True) -> str:
-    """Format multiple KB hits as a readable Q&A list for prompting.
+def format_kb_qa_items(hits: List[Dict[str, Any]], include_explanation: bool = True) -> List[str]:
+    """Format KB hits as one Q&A block per hit (hits without an answer are skipped).
 
-    Each entry is rendered as:
+    Each block is rendered as:
     Q: <question>
     A: <answer>
     [Optional] Giải thích: <explanation>
-
-    Entries are separated by a blank line. Only items with non-empty answers are included.
-
-    Args:
-        hits: List of KB retrieval results
-        max_items: Maximum number of items to format
-        include_explanation: Whether to include GIẢI THÍCH field if available
     """
-    if not hits:
-        return ""
-
-    lines: List[str] = []
-    added = 0
-    for item in hits:
+    items: List[str] = []
+    for item in hits or []:
         # Support both UPPERCASE (from Qdrant) and lowercase (legacy)
         answer = str(item.get("CAUTRALOI") or item.get("cau_tra_loi", "")).strip()
         question = str(item.get("CAUHOI") or item.get("cau_hoi", "")).strip()
@@ -54,22 +43,31 @@ def format_kb_qa_list(hits: List[Dict[str, Any]], max_items: int = 10, include_e
 
         if not answer:
             continue
-        if question:
-            lines.append(f"Q: {question}")
-        else:
-            lines.append("Q: (không có tiêu đề)")
-        lines.append(f"A: {answer}")
+        lines = [f"Q: {question}" if question else "Q: (không có tiêu đề)", f"A: {answer}"]
 
         # Add explanation if available and requested
         if include_explanation and explanation:
             lines.append(f"Giải thích: {explanation}")
+        items.append("\n".join(lines))
+    return items
 
-        lines.append("")  # separator
-        added += 1
-        if added >= max_items:
-            break
 
-    return "\n".join(lines).strip()
+def format_kb_qa_list(hits: List[Dict[str, Any]], max_items: int = 10, include_explanation: bool = True) -> str:
+    """Format multiple KB hits as a readable Q&A list for prompting.
+
+    Each entry is rendered as:
+    Q: <question>
+    A: <answer>
+    [Optional] Giải thích: <explanation>
+
+    Entries are separated by a blank line. Only items with non-empty answers are included.
+
+    Args:
+        hits: List of KB retrieval results
+        max_items: Maximum number of items to format
+        include_explanation: Whether to include GIẢI THÍCH field if available
+    """
+    return "\n\n".join(format_kb_qa_items(hits, include_explanation)[:max_items])
 
 
 
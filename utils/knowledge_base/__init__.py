@@ -14,6 +14,10 @@ from .kb_oqa import (
     preload_oqa_index,
     is_oqa_index_loaded,
 )
+from .kb_reload import (
+    reload_knowledge_bases,
+    get_reload_status,
+)
 
 from . import qdrant_retrieval
 __all__ = [
@@ -25,5 +29,7 @@ __all__ = [
     "ROLE_TO_CSV",
     "preload_oqa_index",
     "is_oqa_index_loaded",
+    "reload_knowledge_bases",
+    "get_reload_status",
     "qdrant_retrieval"
 ]
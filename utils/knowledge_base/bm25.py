@@ -0,0 +1,109 @@
+"""
+Sparse BM25 engine shared by the role knowledge base and the OQA index.
+
+Scores are identical to `rank_bm25.BM25Okapi` (same k1/b/epsilon and IDF floor),
+but the corpus is stored as a precomputed sparse doc x term weight matrix, so
+building is a handful of vectorized numpy/scipy ops and scoring only touches
+the columns of the query terms instead of looping over every document.
+"""
+
+import re
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from unidecode import unidecode
+
+_NON_ALNUM_PATTERN = r"[^a-z0-9\s]"
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize text for BM25 by normalizing Vietnamese and removing special chars."""
+    s = unidecode(str(text)).lower()
+    s = re.sub(_NON_ALNUM_PATTERN, " ", s)
+    return s.split()
+
+
+def tokenize_series(texts: pd.Series) -> List[List[str]]:
+    """Vectorized `tokenize` over a whole column of documents."""
+    return (
+        texts.fillna("")
+        .astype(str)
+        .map(unidecode)
+        .str.lower()
+        .str.replace(_NON_ALNUM_PATTERN, " ", regex=True)
+        .str.split()
+        .tolist()
+    )
+
+
+class SparseBM25:
+    """BM25Okapi over a scipy CSC matrix of per-(doc, term) weights."""
+
+    def __init__(self, corpus: Sequence[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25) -> None:
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.corpus_size = len(corpus)
+
+        doc_lens = np.fromiter((len(doc) for doc in corpus), dtype=np.int64, count=self.corpus_size)
+        flat_tokens = [tok for doc in corpus for tok in doc]
+        doc_ids = np.repeat(np.arange(self.corpus_size, dtype=np.int64), doc_lens)
+
+        term_ids, vocab = pd.factorize(pd.Series(flat_tokens, dtype=object), sort=False)
+        self.vocab = {term: i for i, term in enumerate(vocab.tolist())}
+        n_terms = len(self.vocab)
+
+        # Term frequencies (duplicates are summed by the COO -> CSC conversion)
+        tf = sparse.coo_matrix(
+            (np.ones(len(flat_tokens), dtype=np.float32), (doc_ids, term_ids)),
+            shape=(self.corpus_size, n_terms),
+        ).tocsc()
+
+        # IDF with BM25Okapi's floor for very common terms
+        doc_freq = np.diff(tf.indptr).astype(np.float64)
+        idf = np.log(self.corpus_size - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        if n_terms:
+            floor = self.epsilon * idf.mean()
+            idf = np.where(idf < 0, floor, idf)
+        self.idf = idf
+
+        avgdl = doc_lens.mean() if self.corpus_size and doc_lens.sum() else 1.0
+        norm = k1 * (1 - b + b * doc_lens / avgdl)
+
+        # weight = idf * tf * (k1 + 1) / (tf + norm[doc]) for every non-zero entry
+        rows = tf.indices
+        cols = np.repeat(np.arange(n_terms), np.diff(tf.indptr))
+        data = tf.data.astype(np.float64)
+        tf.data = (idf[cols] * data * (k1 + 1) / (data + norm[rows])).astype(np.float32)
+        self._weights = tf
+
+    def get_scores_batch(self, queries: Sequence[Iterable[str]]) -> np.ndarray:
+        """Score several queries in one sparse product; returns (n_queries, n_docs)."""
+        rows: List[int] = []
+        cols: List[int] = []
+        for qi, query_tokens in enumerate(queries):
+            for tok in query_tokens:
+                term_id = self.vocab.get(tok)
+                if term_id is not None:
+                    rows.append(term_id)
+                    cols.append(qi)
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.vocab), len(queries)),
+        )
+        return np.asarray((self._weights @ counts).T.todense(), dtype=np.float32)
+
+    def get_scores(self, query_tokens: Iterable[str]) -> np.ndarray:
+        """Score every document against the query (repeated tokens count repeatedly)."""
+        counts: dict = {}
+        for tok in query_tokens:
+            term_id = self.vocab.get(tok)
+            if term_id is not None:
+                counts[term_id] = counts.get(term_id, 0) + 1
+        if not counts:
+            return np.zeros(self.corpus_size, dtype=np.float32)
+        cols = np.fromiter(counts.keys(), dtype=np.int64)
+        mult = np.fromiter(counts.values(), dtype=np.float32)
+        return np.asarray(self._weights[:, cols] @ mult, dtype=np.float32).ravel()
@@ -0,0 +1,130 @@
+"""
+Fused KB retrieval: one embedding pass and batched Qdrant searches.
+
+The retrieval query is embedded with one batch per model (dense, sparse,
+ColBERT) and every KB search of the step reuses those embeddings. Searches
+are grouped per collection and sent with `query_batch_points` (Qdrant
+batches within a collection only), and the per-collection batches run
+concurrently.
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from qdrant_client import models
+
+from utils.knowledge_base.qdrant_retrieval import _get_embedding_models
+from utils.knowledge_base.qdrant_schema import run_with_collection
+
+logger = logging.getLogger(__name__)
+
+QDRANT_URL = os.getenv("QDRANT_URL")
+
+
+def embed_queries(texts: Sequence[str], use_late_interaction: bool = True) -> List[Dict[str, Any]]:
+    """
+    Embed query texts with one batch per model.
+
+    Returns:
+        One {dense, sparse, late} dict per text, in the shape
+        `retrieve_from_qdrant_with_cached_embeddings` accepts as `embeddings`
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    dense_model, sparse_model, late_interaction_model = _get_embedding_models()
+    dense = list(dense_model.query_embed(texts))
+    sparse = list(sparse_model.query_embed(texts))
+    late = list(late_interaction_model.query_embed(texts)) if use_late_interaction else [None] * len(texts)
+    return [{"dense": d, "sparse": s, "late": l} for d, s, l in zip(dense, sparse, late)]
+
+
+def _kb_request(embeddings: Dict[str, Any], top_k: int, demuc: Optional[str] = None) -> models.QueryRequest:
+    """Same hybrid query as `retrieve_from_qdrant_with_cached_embeddings`, as a batch entry."""
+    prefetch = [
+        models.Prefetch(query=embeddings["dense"], using="all-MiniLM-L6-v2", limit=top_k + 100),
+        models.Prefetch(
+            query=models.SparseVector(**embeddings["sparse"].as_object()),
+            using="bm25",
+            limit=top_k + 100,
+        ),
+    ]
+    query_filter = None
+    if demuc:
+        query_filter = models.Filter(
+            must=[models.FieldCondition(key="DEMUC", match=models.MatchValue(value=demuc))]
+        )
+    late = embeddings.get("late")
+    return models.QueryRequest(
+        prefetch=prefetch,
+        query=late if late is not None else embeddings["dense"],
+        using="colbertv2.0" if late is not None else "all-MiniLM-L6-v2",
+        filter=query_filter,
+        limit=top_k,
+        with_payload=True,
+    )
+
+
+def search_kb_batch(
+    searches: List[Dict[str, Any]],
+    embeddings: Dict[str, Any],
+    qdrant_url: str = QDRANT_URL,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run several KB searches for one query embedding.
+
+    Args:
+        searches: Dicts with `slot`, `collection`, `top_k` and optional `demuc`
+        embeddings: {dense, sparse, late} of the query
+
+    Returns:
+        slot -> results (dicts with id, score, collection and the payload); a
+        collection that fails yields empty results for its slots
+    """
+    by_collection: Dict[str, List[Dict[str, Any]]] = {}
+    for search in searches:
+        by_collection.setdefault(search["collection"], []).append(search)
+
+    def run(collection: str, group: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        requests = [_kb_request(embeddings, s["top_k"], s.get("demuc")) for s in group]
+        try:
+            responses = run_with_collection(
+                qdrant_url, collection,
+                lambda client: client.query_batch_points(collection_name=collection, requests=requests),
+            )
+        except Exception as e:
+            logger.error(f"[Qdrant] Batch search on '{collection}' failed: {e}")
+            return {s["slot"]: [] for s in group}
+        return {
+            s["slot"]: [
+                {"id": point.id, "score": point.score, "collection": collection, **point.payload}
+                for point in response.points
+            ]
+            for s, response in zip(group, responses)
+        }
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    if not by_collection:
+        return results
+    if executor is None and len(by_collection) == 1:
+        (collection, group), = by_collection.items()
+        return run(collection, group)
+
+    pool = executor or ThreadPoolExecutor(max_workers=len(by_collection))
+    try:
+        futures = [pool.submit(run, collection, group) for collection, group in by_collection.items()]
+        for future in futures:
+            results.update(future.result())
+    finally:
+        if executor is None:
+            pool.shutdown(wait=False)
+    return results
+
+
+def global_kb_searches(collections: Sequence[str], top_k: int) -> List[Dict[str, Any]]:
+    """Unfiltered search on every role collection (the "global context" half of KB retrieval)."""
+    return [{"slot": f"global:{c}", "collection": c, "top_k": top_k // 2} for c in collections]
+
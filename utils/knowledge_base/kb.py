@@ -1,11 +1,11 @@
 import os
 import random
-import re
+import threading
 from typing import List, Dict, Any, Tuple, Optional
 from functools import lru_cache
 import pandas as pd
 import numpy as np
-from rank_bm25 import BM25Okapi
+from .bm25 import SparseBM25, tokenize, tokenize_series
 from unidecode import unidecode
 from ..role_enum import RoleEnum,ROLE_TO_CSV
 
@@ -40,22 +40,19 @@ def _collapse_spaces(text: str) -> str:
     return " ".join(str(text).strip().split())
 
 
-def _tokenize(text: str) -> List[str]:
-    """Tokenize text for BM25 by normalizing Vietnamese and removing special chars."""
-    s = unidecode(str(text)).lower()
-    s = re.sub(r"[^a-z0-9\s]", " ", s)
-    return [t for t in s.split() if t]
+# Shared with the OQA index so both corpora tokenize identically
+_tokenize = tokenize
 
 
 class KnowledgeBaseIndex:
     def __init__(self, kb_dir: str = "medical_knowledge_base") -> None:
         self.kb_dir = kb_dir
         self.df: pd.DataFrame = pd.DataFrame()
-        self.bm25: BM25Okapi | None = None
+        self.bm25: SparseBM25 | None = None
         # Store individual CSV dataframes for role-based access
         self.role_dataframes: Dict[str, pd.DataFrame] = {}
         # Store role-specific BM25 indices
-        self.role_bm25s: Dict[str, BM25Okapi] = {}
+        self.role_bm25s: Dict[str, SparseBM25] = {}
         self._load()
 
     def _load(self) -> None:
@@ -149,10 +146,10 @@ class KnowledgeBaseIndex:
                 role_df["combined_norm"] = role_df["combined"].apply(_normalize_accents)
 
                 # Tokenize corpus for BM25
-                tokenized_corpus = [_tokenize(doc) for doc in role_df["combined_norm"]]
+                tokenized_corpus = tokenize_series(role_df["combined_norm"])
 
                 # Create BM25 index for this role
-                self.role_bm25s[role_key] = BM25Okapi(tokenized_corpus)
+                self.role_bm25s[role_key] = SparseBM25(tokenized_corpus)
             
             frames.append(df)
 
@@ -182,8 +179,8 @@ class KnowledgeBaseIndex:
         self.df = merged
 
         # Create general BM25 index for fallback search
-        tokenized_corpus_general = [_tokenize(doc) for doc in self.df["combined_norm"]]
-        self.bm25 = BM25Okapi(tokenized_corpus_general)
+        tokenized_corpus_general = tokenize_series(self.df["combined_norm"])
+        self.bm25 = SparseBM25(tokenized_corpus_general)
 
     def search(self, query: str, role: Optional[str] = None, top_k: int = 5) -> List[Dict[str, Any]]:
         if not query.strip():
@@ -287,17 +284,51 @@ class KnowledgeBaseIndex:
 
 
 _KB_INDEX: KnowledgeBaseIndex | None = None
+# Bumped on every swap so cache entries built from an older index never match again
+_KB_GENERATION: int = 0
+_KB_SWAP_LOCK = threading.Lock()
 
 def get_kb() -> KnowledgeBaseIndex:
     global _KB_INDEX
     if _KB_INDEX is None:
-        _KB_INDEX = KnowledgeBaseIndex()
+        with _KB_SWAP_LOCK:
+            if _KB_INDEX is None:
+                _KB_INDEX = KnowledgeBaseIndex()
     return _KB_INDEX
 
 
+def get_kb_generation() -> int:
+    """Return the generation number of the KB index currently being served."""
+    return _KB_GENERATION
+
+
+def swap_kb(new_index: KnowledgeBaseIndex) -> int:
+    """
+    Atomically replace the served KB index with a fully built one.
+
+    The caller builds `new_index` off to the side; readers keep whatever
+    reference they already hold, so no request ever sees a half-built index.
+    Dependent caches are invalidated after the swap.
+
+    Returns:
+        The new generation number
+    """
+    global _KB_INDEX, _KB_GENERATION
+    with _KB_SWAP_LOCK:
+        _KB_INDEX = new_index
+        _KB_GENERATION += 1
+        generation = _KB_GENERATION
+    _cached_search.cache_clear()
+    get_cached_metadata_for_role.cache_clear()
+    return generation
+
+
 @lru_cache(maxsize=4096)
-def _cached_search(query: str, role: Optional[str], top_k: int) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
-    """Cacheable wrapper for KB search returning a hashable structure."""
+def _cached_search(query: str, role: Optional[str], top_k: int, generation: int = 0) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+    """Cacheable wrapper for KB search returning a hashable structure.
+
+    `generation` is only part of the cache key so results from a replaced index are never served.
+    """
     kb = get_kb()
     results = kb.search(query, role=role, top_k=top_k)
     # Convert list[dict] to tuple of sorted tuples for hashing
@@ -306,7 +337,7 @@ def _cached_search(query: str, role: Optional[str], top_k: int) -> Tuple[Tuple[T
 
 def retrieve(query: str, role: Optional[str] = None, top_k: int = 5) -> Tuple[List[Dict[str, Any]], float]:
     # Use cached results to avoid recomputation for identical queries
-    cached = _cached_search(query, role, top_k)
+    cached = _cached_search(query, role, top_k, _KB_GENERATION)
     results: List[Dict[str, Any]] = [dict(items) for items in cached]
     score = results[0]["score"] if results else 0.0
     return results, score
@@ -373,12 +404,13 @@ def prepare_metadata_for_role(role: str) -> pd.DataFrame:
 
 
 @lru_cache(maxsize=128)
-def get_cached_metadata_for_role(role: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+def get_cached_metadata_for_role(role: str, generation: int = 0) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
     """
     Cached version of prepare_metadata_for_role that returns hashable structure.
 
     Args:
         role: Role enum value
+        generation: KB generation the entry belongs to (cache key only)
 
     Returns:
         Tuple representation of metadata DataFrame for caching
@@ -401,7 +433,7 @@ def get_df_metadata_for_role(role: str) -> pd.DataFrame:
     Returns:
         DataFrame with metadata
     """
-    cached = get_cached_metadata_for_role(role)
+    cached = get_cached_metadata_for_role(role, _KB_GENERATION)
 
     if not cached:
         return pd.DataFrame(columns=["DEMUC", "CHUDECON", "SOLUONGCAUHOI"])
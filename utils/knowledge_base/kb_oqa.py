@@ -1,23 +1,17 @@
+import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
 import ast
 
 import numpy as np
 import pandas as pd
-import re
-from unidecode import unidecode
-from rank_bm25 import BM25Okapi
 
-# Optional dependencies (kept for backward compatibility, not used in BM25 flow)
-try:
-    import faiss  # type: ignore
-except Exception:  # pragma: no cover
-    faiss = None  # type: ignore
+from config.kb_config import kb_config
+from .bm25 import SparseBM25, tokenize, tokenize_series
+from .oqa_dense import DenseEncoder, FastEmbedEncoder, OQADenseIndex, dense_index_path
 
-try:
-    from sentence_transformers import SentenceTransformer  # type: ignore
-except Exception:  # pragma: no cover
-    SentenceTransformer = None  # type: ignore
+logger = logging.getLogger(__name__)
 
 
 OQA_CSV_PATH = os.path.join("medical_knowledge_base", "oqa_v1_dataset.csv")
@@ -30,14 +24,30 @@ def _ensure_str(x: Any) -> str:
     return " ".join(s.replace("\n", " ").replace("\r", " ").split())
 
 
+def _ensure_str_series(col: pd.Series) -> pd.Series:
+    """Vectorized `_ensure_str` for a whole column (missing values become "")."""
+    return col.fillna("").astype(str).str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+# Fields returned by search/get_random (no answers/reference)
+_RESULT_COLUMNS = ["question", "context", "topic", "id"]
+
+
 class OQAVectorIndex:
     """In-memory BM25 index for OQA English dataset.
 
-    - Uses BM25Okapi over tokenized `question + context + topic`.
+    - Uses the shared sparse BM25 engine over tokenized `question + context + topic`.
+    - Optionally fuses in a memory-mapped dense index over `question + context`
+      (`OQA_DENSE_ENABLED`), so English paraphrases match without shared keywords.
     - Returns only fields: question, context, topic, id (no answers/reference).
     """
 
-    def __init__(self, csv_path: str = OQA_CSV_PATH) -> None:
+    def __init__(
+        self,
+        csv_path: str = OQA_CSV_PATH,
+        dense: Optional[bool] = None,
+        encoder: Optional[DenseEncoder] = None,
+    ) -> None:
         if not os.path.isfile(csv_path):
             raise FileNotFoundError(f"OQA dataset not found: {csv_path}")
 
@@ -68,98 +78,132 @@ class OQAVectorIndex:
 
         df = df[expected_cols].copy()
         for col in expected_cols:
-            df[col] = df[col].apply(_ensure_str)
-
-        # Build BM25 corpus from question + context + topic
-        def _tokenize(text: str) -> List[str]:
-            s = unidecode(_ensure_str(text)).lower()
-            s = re.sub(r"[^a-z0-9\s]", " ", s)
-            toks = [t for t in s.split() if t]
-            return toks
-
-        docs: List[str] = []
-        for _, row in df.iterrows():
-            q = row.get("question", "")
-            ctx = row.get("context", "")
-            topic = row.get("topic", "")
-            combined = f"{q}\n{ctx}\n{topic}"
-            docs.append(combined)
-
-        tokenized_corpus: List[List[str]] = [_tokenize(t) for t in docs]
-        self._bm25 = BM25Okapi(tokenized_corpus)
+            df[col] = _ensure_str_series(df[col])
+
+        # Build BM25 corpus from question + context + topic (column-wise, no row loop)
+        docs = df["question"] + "\n" + df["context"] + "\n" + df["topic"]
+        self._bm25 = SparseBM25(tokenize_series(docs))
+
+        # Optional dense index; any failure leaves the index BM25-only
+        self._dense: Optional[OQADenseIndex] = None
+        if kb_config.OQA_DENSE_ENABLED if dense is None else dense:
+            dense_texts = (df["question"] + "\n" + df["context"]).tolist()
+            try:
+                self._dense = OQADenseIndex.load_or_build(
+                    dense_texts, dense_index_path(csv_path), encoder or FastEmbedEncoder()
+                )
+            except Exception as e:
+                logger.warning(f" OQA dense index unavailable, using BM25 only: {e}")
 
         # Store rows for result mapping
         self._df = df.reset_index(drop=True)
 
-    def _tokenize_query(self, query: str) -> List[str]:
-        s = unidecode(_ensure_str(query)).lower()
-        s = re.sub(r"[^a-z0-9\s]", " ", s)
-        return [t for t in s.split() if t]
+        # id -> row offset (first occurrence wins) and references pre-parsed into
+        # (title, link) so compose never filters the DataFrame or runs literal_eval
+        self._id_to_pos: Dict[str, int] = {}
+        for pos, doc_id in enumerate(self._df["id"].tolist()):
+            if doc_id and doc_id not in self._id_to_pos:
+                self._id_to_pos[doc_id] = pos
+        self._references: List[Tuple[str, str]] = [
+            _preparse_reference(raw) for raw in self._df["reference"].tolist()
+        ]
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        if not query or len(self._df) == 0:
-            return []
-        q_tokens = self._tokenize_query(query)
-        scores = self._bm25.get_scores(q_tokens)
-        scores = np.array(scores, dtype=np.float32)
+    def _tokenize_query(self, query: str) -> List[str]:
+        return tokenize(_ensure_str(query))
+
+    @property
+    def has_dense(self) -> bool:
+        return self._dense is not None
+
+    def _score_matrix(self, queries: List[str], dense_weight: float) -> np.ndarray:
+        """Scores for several queries at once; (n_queries, n_docs).
+
+        Raw BM25 when no dense index is loaded (or `dense_weight` is 0). Otherwise
+        BM25 and dense cosine are blended into [0, 1]: BM25 is divided by its
+        per-query max (all-zero stays zero, so a query with no keyword overlap is
+        not inflated) and cosine is clipped at 0.
+        """
+        bm25 = self._bm25.get_scores_batch([self._tokenize_query(q) for q in queries])
+        if self._dense is None or dense_weight <= 0:
+            return bm25
+        dense_weight = min(float(dense_weight), 1.0)
+        top = bm25.max(axis=1, keepdims=True)
+        bm25_norm = np.divide(bm25, top, out=np.zeros_like(bm25), where=top > 0)
+        cosine = np.clip(self._dense.scores_batch(queries), 0.0, 1.0)
+        return ((1.0 - dense_weight) * bm25_norm + dense_weight * cosine).astype(np.float32)
+
+    def _top_k(self, scores: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
         k = int(min(top_k, scores.shape[0]))
         part = np.argpartition(scores, -k)[-k:]
         idxs = part[np.argsort(scores[part])[::-1]].tolist()
 
-        results: List[Dict[str, Any]] = []
-        for idx in idxs:
-            row = self._df.iloc[int(idx)]
-            sc = float(scores[int(idx)])
-            results.append(
-                {
-                    "score": sc,
-                    "question": _ensure_str(row.get("question", "")),
-                    "context": _ensure_str(row.get("context", "")),
-                    "topic": _ensure_str(row.get("topic", "")),
-                    "id": _ensure_str(row.get("id", "")),
-                }
-            )
-        return results
+        rows = self._df.iloc[idxs][_RESULT_COLUMNS].to_dict("records")
+        return [{"score": float(scores[idx]), **row} for row, idx in zip(rows, idxs)]
+
+    def search_many(
+        self, queries: List[str], top_k: int = 5, dense_weight: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Top-k documents for each query, scored as one batch (one sparse product,
+        one embedding call). Empty queries get an empty result list."""
+        out: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        live = [i for i, q in enumerate(queries) if q]
+        if not live or len(self._df) == 0:
+            return out
+        if dense_weight is None:
+            dense_weight = kb_config.OQA_DENSE_WEIGHT
+        matrix = self._score_matrix([queries[i] for i in live], dense_weight)
+        for row, i in enumerate(live):
+            out[i] = self._top_k(matrix[row], top_k)
+        return out
+
+    def search(self, query: str, top_k: int = 5, dense_weight: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Top-k documents for `query` (see `_score_matrix` for the score scale)."""
+        return self.search_many([query], top_k=top_k, dense_weight=dense_weight)[0]
+
+    def get_reference(self, doc_id: Any) -> Optional[Tuple[str, str]]:
+        """O(1) lookup of the pre-parsed (title, link) reference for a document ID."""
+        pos = self._id_to_pos.get(_ensure_str(doc_id))
+        if pos is None:
+            return None
+        return self._references[pos]
 
     def get_random(self, amount: int = 5) -> List[Dict[str, Any]]:
         if len(self._df) == 0:
             return []
         n = min(amount, len(self._df))
         sampled = self._df.sample(n=n, random_state=123)
-        out: List[Dict[str, Any]] = []
-        for _, row in sampled.iterrows():
-            out.append(
-                {
-                    "score": 1.0,
-                    "question": _ensure_str(row.get("question", "")),
-                    "context": _ensure_str(row.get("context", "")),
-                    "topic": _ensure_str(row.get("topic", "")),
-                    "id": _ensure_str(row.get("id", "")),
-                }
-            )
-        return out
+        return [{"score": 1.0, **row} for row in sampled[_RESULT_COLUMNS].to_dict("records")]
 
 
 _OQA_INDEX: Optional[OQAVectorIndex] = None
+_OQA_SWAP_LOCK = threading.Lock()
 
 
 def get_oqa_index() -> OQAVectorIndex:
     global _OQA_INDEX
     if _OQA_INDEX is None:
-        _OQA_INDEX = OQAVectorIndex()
+        with _OQA_SWAP_LOCK:
+            if _OQA_INDEX is None:
+                _OQA_INDEX = OQAVectorIndex()
     return _OQA_INDEX
 
 
+def swap_oqa_index(new_index: OQAVectorIndex) -> None:
+    """Atomically replace the served OQA index with a fully built one."""
+    global _OQA_INDEX
+    with _OQA_SWAP_LOCK:
+        _OQA_INDEX = new_index
+
+
 def preload_oqa_index() -> None:
     """Preload OQA index into memory during server startup."""
     global _OQA_INDEX
     if _OQA_INDEX is None:
-        import logging
-        logger = logging.getLogger(__name__)
         logger.info(" Loading OQA vector index into memory...")
         try:
             _OQA_INDEX = OQAVectorIndex()
-            logger.info(f" OQA index loaded successfully: {len(_OQA_INDEX._df)} items using BM25")
+            mode = "BM25 + dense" if _OQA_INDEX.has_dense else "BM25"
+            logger.info(f" OQA index loaded successfully: {len(_OQA_INDEX._df)} items using {mode}")
         except Exception as e:
             logger.error(f" Failed to load OQA index: {e}")
             raise
@@ -170,13 +214,25 @@ def is_oqa_index_loaded() -> bool:
     return _OQA_INDEX is not None
 
 
-def retrieve_oqa(query: str, top_k: int = 5) -> Tuple[List[Dict[str, Any]], float]:
+def retrieve_oqa(query: str, top_k: int = 5, dense_weight: Optional[float] = None) -> Tuple[List[Dict[str, Any]], float]:
+    """Hybrid BM25+dense retrieval when the dense index is loaded, BM25 otherwise."""
     idx = get_oqa_index()
-    res = idx.search(query, top_k=top_k)
+    res = idx.search(query, top_k=top_k, dense_weight=dense_weight)
     score = float(res[0]["score"]) if res else 0.0
     return res, score
 
 
+def retrieve_oqa_many(
+    queries: List[str], top_k: int = 5, dense_weight: Optional[float] = None
+) -> List[Tuple[List[Dict[str, Any]], float]]:
+    """Batched `retrieve_oqa`: one (results, best_score) pair per query."""
+    idx = get_oqa_index()
+    return [
+        (res, float(res[0]["score"]) if res else 0.0)
+        for res in idx.search_many(queries, top_k=top_k, dense_weight=dense_weight)
+    ]
+
+
 def retrieve_random_oqa(amount: int = 5) -> List[Dict[str, Any]]:
     idx = get_oqa_index()
     return idx.get_random(amount)
@@ -195,15 +251,34 @@ def get_references_by_ids(ids: List[str]) -> Dict[str, str]:
     result = {}
     
     for doc_id in ids:
-        # Find row with matching ID
-        matching_rows = idx._df[idx._df["id"] == doc_id]
-        if not matching_rows.empty:
-            row = matching_rows.iloc[0]
-            result[doc_id] = _ensure_str(row.get("reference", ""))
+        pos = idx._id_to_pos.get(_ensure_str(doc_id))
+        if pos is not None:
+            result[doc_id] = idx._df.at[pos, "reference"]
     
     return result
 
 
+def get_parsed_references_by_ids(ids: List[str]) -> Dict[str, Tuple[str, str]]:
+    """Get pre-parsed (title, link) references for given list of IDs.
+
+    Uses the id hash map built at index load time, so the cost is O(len(ids))
+    with no parsing on the request path.
+
+    Args:
+        ids: List of document IDs
+
+    Returns:
+        Dict mapping ID to (title, link); unknown IDs are omitted
+    """
+    idx = get_oqa_index()
+    result: Dict[str, Tuple[str, str]] = {}
+    for doc_id in ids:
+        ref = idx.get_reference(doc_id)
+        if ref is not None:
+            result[doc_id] = ref
+    return result
+
+
 
 def parse_reference_text(reference_text: str) -> Tuple[str, str]:
     """Parse a reference text (stored as a Python-dict-like string) to extract title and link.
@@ -267,15 +342,34 @@ def parse_reference_text(reference_text: str) -> Tuple[str, str]:
     return title, link
 
 
-def format_references_numbered(id_list: List[str], id_to_ref: Dict[str, str]) -> List[str]:
-    """Format references as [N] TITLE LINK from a list of reference IDs and their raw text.
+def _preparse_reference(raw: str) -> Tuple[str, str]:
+    """Parse a raw reference once at load time.
+
+    If nothing can be extracted the raw text is kept as the title, which renders
+    exactly like the raw-text fallback in `format_references_numbered`.
+    """
+    title, link = parse_reference_text(raw)
+    if not title and not link:
+        return raw, ""
+    return title, link
+
+
+def format_references_numbered(
+    id_list: List[str], id_to_ref: Dict[str, Union[str, Tuple[str, str]]]
+) -> List[str]:
+    """Format references as [N] TITLE LINK from a list of reference IDs.
 
+    `id_to_ref` values are either pre-parsed (title, link) pairs (see
+    `get_parsed_references_by_ids`) or raw reference text, which is parsed here.
     Any missing fields are skipped gracefully. If no link, omit it.
     """
     output: List[str] = []
     for i, ref_id in enumerate(id_list, start=1):
-        raw = id_to_ref.get(ref_id, "")
-        title, link = parse_reference_text(raw)
+        ref = id_to_ref.get(ref_id, "")
+        if isinstance(ref, tuple):
+            title, link = ref
+        else:
+            title, link = _preparse_reference(ref)
         parts: List[str] = []
         if title:
             parts.append(title)
@@ -283,9 +377,5 @@ def format_references_numbered(id_list: List[str], id_to_ref: Dict[str, str]) ->
             parts.append(link)
         if parts:
             output.append(f"[{i}] {' '.join(parts)}")
-        else:
-            # Fallback to raw if parsing failed
-            if raw:
-                output.append(f"[{i}] {raw}")
     return output
 
@@ -0,0 +1,215 @@
+"""
+Hot reload of the in-memory knowledge base indexes.
+
+Editors update `medical_knowledge_base/*.csv`; this module rebuilds the BM25 KB
+and the OQA index off to the side and swaps them in only once both are fully
+built, so no request ever sees a half-built index. Reloads are triggered either
+by the admin endpoint or by an optional polling file watcher.
+
+Indexes live in each worker process. The endpoint reloads the worker that
+served it and touches `RELOAD_MARKER` in the KB directory; the marker is part
+of the watched fingerprint, so every other worker (and replica sharing the
+directory) running a watcher reloads on its next poll.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config.kb_config import kb_config
+from utils.timezone_utils import get_vietnam_time
+from .kb import KnowledgeBaseIndex, swap_kb
+from .kb_oqa import OQA_CSV_PATH, OQAVectorIndex, swap_oqa_index
+
+logger = logging.getLogger(__name__)
+
+# Only one rebuild at a time; readers never take this lock
+_reload_lock = threading.Lock()
+
+# Touched by `request_reload`; watchers treat it like a CSV change
+RELOAD_MARKER = ".reload-requested"
+
+# Fingerprint of the files behind the indexes this process serves (set by each successful reload)
+_served_fingerprint: Optional[Tuple[Tuple[str, int, int], ...]] = None
+
+_reload_status: Dict[str, Any] = {
+    "state": "idle",
+    "generation": 0,
+    "started_at": None,
+    "finished_at": None,
+    "error": None,
+}
+
+
+def csv_fingerprint(kb_dir: str = kb_config.KB_DIR) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    Cheap change detector for the KB directory.
+
+    Returns:
+        Sorted tuple of (filename, mtime_ns, size) for every CSV in `kb_dir`
+        (and the reload marker, if any)
+    """
+    if not os.path.isdir(kb_dir):
+        return ()
+    entries = []
+    for name in sorted(os.listdir(kb_dir)):
+        if not name.lower().endswith(".csv") and name != RELOAD_MARKER:
+            continue
+        try:
+            st = os.stat(os.path.join(kb_dir, name))
+        except OSError:
+            continue
+        entries.append((name, st.st_mtime_ns, st.st_size))
+    return tuple(entries)
+
+
+def get_reload_status() -> Dict[str, Any]:
+    """Return a snapshot of the last/ongoing reload."""
+    return dict(_reload_status)
+
+
+def reload_knowledge_bases(kb_dir: str = kb_config.KB_DIR) -> Dict[str, Any]:
+    """
+    Rebuild the BM25 KB and the OQA index from disk and swap them in atomically.
+
+    Both indexes are built before either is swapped; if any build fails the
+    currently served indexes stay untouched. Concurrent calls are rejected
+    rather than queued.
+
+    Returns:
+        Reload status dict (see `get_reload_status`)
+    """
+    global _served_fingerprint
+    if not _reload_lock.acquire(blocking=False):
+        logger.info("[KBReload] Reload already in progress, skipping")
+        return get_reload_status()
+
+    try:
+        fingerprint = csv_fingerprint(kb_dir)
+        _reload_status.update({
+            "state": "running",
+            "started_at": get_vietnam_time().isoformat(),
+            "finished_at": None,
+            "error": None,
+        })
+        logger.info(f"[KBReload] Building new indexes from '{kb_dir}'...")
+
+        new_kb = KnowledgeBaseIndex(kb_dir=kb_dir)
+        new_oqa = OQAVectorIndex(csv_path=os.path.join(kb_dir, os.path.basename(OQA_CSV_PATH)))
+
+        generation = swap_kb(new_kb)
+        swap_oqa_index(new_oqa)
+        _served_fingerprint = fingerprint
+
+        _reload_status.update({
+            "state": "succeeded",
+            "generation": generation,
+            "finished_at": get_vietnam_time().isoformat(),
+        })
+        logger.info(f"[KBReload] ✅ Swapped in generation {generation}: {len(new_kb.df)} KB rows, {len(new_oqa._df)} OQA rows")
+
+    except Exception as e:
+        _reload_status.update({
+            "state": "failed",
+            "finished_at": get_vietnam_time().isoformat(),
+            "error": str(e),
+        })
+        logger.error(f"[KBReload] ❌ Reload failed, keeping current indexes: {e}")
+
+    finally:
+        _reload_lock.release()
+
+    return get_reload_status()
+
+
+def start_reload_in_background(kb_dir: str = kb_config.KB_DIR) -> bool:
+    """
+    Kick off `reload_knowledge_bases` on a daemon thread.
+
+    Returns:
+        False if a reload is already running, True otherwise
+    """
+    if _reload_lock.locked():
+        return False
+    thread = threading.Thread(
+        target=reload_knowledge_bases,
+        kwargs={"kb_dir": kb_dir},
+        name="kb-reload",
+        daemon=True,
+    )
+    thread.start()
+    return True
+
+
+def request_reload(kb_dir: str = kb_config.KB_DIR) -> bool:
+    """
+    Reload this process now and signal the other workers' watchers.
+
+    Returns:
+        False if a reload is already running here, True otherwise
+    """
+    try:
+        with open(os.path.join(kb_dir, RELOAD_MARKER), "w", encoding="utf-8") as f:
+            f.write(get_vietnam_time().isoformat())
+    except OSError as e:
+        logger.warning(f"[KBReload] Could not signal other workers ({e}); reloading this worker only")
+    return start_reload_in_background(kb_dir)
+
+
+class KBFileWatcher:
+    """Polls the KB directory and triggers a reload when any CSV changes."""
+
+    def __init__(self, kb_dir: str = kb_config.KB_DIR, interval_seconds: int = kb_config.KB_WATCH_INTERVAL_SECONDS):
+        self.kb_dir = kb_dir
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fingerprint = csv_fingerprint(kb_dir)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"[KBReload] Watching '{self.kb_dir}' every {self.interval_seconds}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def check_once(self) -> bool:
+        """Reload if the CSV fingerprint changed since the last check. Returns True if reloaded."""
+        current = csv_fingerprint(self.kb_dir)
+        if current == self._fingerprint:
+            return False
+        if current == _served_fingerprint:
+            # Already reloaded in this process (e.g. by the endpoint that touched the marker)
+            self._fingerprint = current
+            return False
+        logger.info("[KBReload] CSV change detected, reloading knowledge bases")
+        status = reload_knowledge_bases(self.kb_dir)
+        # Only remember the new fingerprint once it has actually been served
+        if status.get("state") == "succeeded":
+            self._fingerprint = current
+            return True
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"[KBReload] Watcher error: {e}")
+
+
+_watcher: Optional[KBFileWatcher] = None
+
+
+def start_kb_watcher(interval_seconds: int = kb_config.KB_WATCH_INTERVAL_SECONDS) -> Optional[KBFileWatcher]:
+    """Start the process-wide CSV watcher if `interval_seconds` > 0."""
+    global _watcher
+    if interval_seconds <= 0 or _watcher is not None:
+        return _watcher
+    _watcher = KBFileWatcher(interval_seconds=interval_seconds)
+    _watcher.start()
+    return _watcher
@@ -0,0 +1,361 @@
+"""
+In-process per-user hot cache for the user memory collection.
+
+Each cached user holds their memory ids, texts, timestamps and L2-normalised
+dense vectors. Users with a small memory set are answered with a local
+vectorised cosine search instead of the three-stage Qdrant query. The memory
+writers keep cached users coherent (write-through); entries also expire after
+a TTL so other worker processes' writes are picked up. A load that overlaps a
+write for the same user is returned but not cached (per-user versions), and a
+user that grows past MEMORY_CACHE_SMALL_SET goes back to Qdrant search. The
+cache is bounded by an LRU over both user count and total bytes.
+
+`UserMemoryCounts` is a much cheaper companion: just the number of memories per
+user, so callers can skip retrieval work entirely for users with none.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.memory_config import memory_config
+
+logger = logging.getLogger(__name__)
+
+# Rough per-row bookkeeping overhead (ids, list slots, floats) for byte accounting
+_ROW_OVERHEAD_BYTES = 96
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class CachedUserMemories:
+    """All (or, if `complete` is False, only some) memories of one user."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        texts: List[str],
+        timestamps: List[float],
+        vectors: np.ndarray,
+        complete: bool,
+    ) -> None:
+        self.ids = list(ids)
+        self.texts = list(texts)
+        self.timestamps = list(timestamps)
+        self.vectors = _normalize(vectors) if len(ids) else np.zeros((0, 0), dtype=np.float32)
+        self.complete = complete
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        text_bytes = sum(len(t.encode("utf-8")) for t in self.texts)
+        return int(self.vectors.nbytes) + text_bytes + _ROW_OVERHEAD_BYTES * len(self.ids)
+
+    def upsert(self, ids: Sequence[str], texts: Sequence[str], vectors: np.ndarray, timestamp: float) -> None:
+        vectors = _normalize(vectors)
+        pos = {pid: i for i, pid in enumerate(self.ids)}
+        new_rows: List[int] = []
+        for row, (pid, text) in enumerate(zip(ids, texts)):
+            i = pos.get(pid)
+            if i is None:
+                new_rows.append(row)
+                continue
+            self.texts[i] = text
+            self.timestamps[i] = timestamp
+            self.vectors[i] = vectors[row]
+        if new_rows:
+            self.ids.extend(ids[r] for r in new_rows)
+            self.texts.extend(texts[r] for r in new_rows)
+            self.timestamps.extend(timestamp for _ in new_rows)
+            added = vectors[new_rows]
+            self.vectors = added if self.vectors.size == 0 else np.vstack([self.vectors, added])
+
+    def remove(self, ids: Sequence[str]) -> int:
+        drop = set(ids)
+        keep = [i for i, pid in enumerate(self.ids) if pid not in drop]
+        removed = len(self.ids) - len(keep)
+        if removed:
+            self.ids = [self.ids[i] for i in keep]
+            self.texts = [self.texts[i] for i in keep]
+            self.timestamps = [self.timestamps[i] for i in keep]
+            self.vectors = self.vectors[keep] if keep else np.zeros((0, 0), dtype=np.float32)
+        return removed
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Cosine top-k in the same shape as `retrieve_user_memory` results."""
+        if not self.ids:
+            return []
+        scores = self.vectors @ _normalize(query_vector)[0]
+        k = min(top_k, len(self.ids))
+        part = np.argpartition(scores, -k)[-k:]
+        order = part[np.argsort(scores[part])[::-1]]
+        return [
+            {"id": self.ids[i], "query": self.texts[i], "timestamp": self.timestamps[i], "score": float(scores[i])}
+            for i in order
+        ]
+
+
+CacheKey = Tuple[str, str]  # (collection_name, user_id)
+
+
+class UserMemoryCache:
+    """LRU of `CachedUserMemories`, bounded by user count and total bytes."""
+
+    def __init__(
+        self,
+        max_users: int = memory_config.MEMORY_CACHE_MAX_USERS,
+        max_bytes: int = memory_config.MEMORY_CACHE_MAX_BYTES,
+        ttl_seconds: int = memory_config.MEMORY_CACHE_TTL_SECONDS,
+        small_set: Optional[int] = None,
+    ) -> None:
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._small_set = small_set
+        self._entries: "OrderedDict[CacheKey, CachedUserMemories]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Users with a load in progress -> (loads in flight, write version)
+        self._loading: Dict[CacheKey, List[int]] = {}
+
+    @property
+    def small_set(self) -> int:
+        """Largest memory set kept for local search (read from config unless given)."""
+        return self._small_set if self._small_set is not None else memory_config.MEMORY_CACHE_SMALL_SET
+
+    @property
+    def total_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, collection_name: str, user_id: str) -> Optional[CachedUserMemories]:
+        key = (collection_name, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl_seconds > 0 and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def get_or_load(
+        self,
+        collection_name: str,
+        user_id: str,
+        loader: Callable[[], Optional[CachedUserMemories]],
+    ) -> Optional[CachedUserMemories]:
+        """
+        Return the cached entry, loading it with `loader` on a miss (None = load failed).
+
+        If the user's memories are written while the loader runs, the loaded
+        snapshot may predate the write: it is returned but not cached.
+        """
+        entry = self.get(collection_name, user_id)
+        if entry is not None:
+            return entry
+        key = (collection_name, user_id)
+        with self._lock:
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            version = loading[1]
+        try:
+            entry = loader()
+        finally:
+            with self._lock:
+                loading = self._loading[key]
+                stale = loading[1] != version
+                loading[0] -= 1
+                if loading[0] == 0:
+                    del self._loading[key]
+                if entry is not None and not stale:
+                    self._put(key, entry)
+        if stale:
+            logger.info(f"[MemoryCache] Memories of user {user_id} changed during load, not caching it")
+        return entry
+
+    def put(self, collection_name: str, user_id: str, entry: CachedUserMemories) -> None:
+        with self._lock:
+            self._put((collection_name, user_id), entry)
+
+    def _put(self, key: CacheKey, entry: CachedUserMemories) -> None:
+        self._pop(key)
+        if entry.nbytes > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        self._evict()
+
+    def _mark_written(self, key: CacheKey) -> None:
+        """Invalidate loads of `key` that are in flight (caller holds the lock)."""
+        loading = self._loading.get(key)
+        if loading is not None:
+            loading[1] += 1
+
+    def write_through(
+        self,
+        collection_name: str,
+        user_id: str,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        vectors: np.ndarray,
+        timestamp: float,
+    ) -> None:
+        """
+        Apply an upsert to a cached user; users not in the cache are left alone.
+
+        A user pushed past `small_set` becomes an empty, incomplete entry, so
+        retrieval goes back to the Qdrant hybrid query.
+        """
+        key = (collection_name, user_id)
+        with self._lock:
+            self._mark_written(key)
+            entry = self._entries.get(key)
+            if entry is None or not entry.complete:
+                return
+            self._bytes -= entry.nbytes
+            entry.upsert(ids, texts, vectors, timestamp)
+            if len(entry) > self.small_set:
+                entry = CachedUserMemories([], [], [], np.zeros((0, 0), np.float32), complete=False)
+                self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def remove_points(self, collection_name: str, ids: Sequence[str]) -> List[str]:
+        """Drop deleted point ids from whichever cached users hold them; returns those users."""
+        affected: List[str] = []
+        with self._lock:
+            # Owners are unknown: loads in flight for this collection may already be stale
+            for key in self._loading:
+                if key[0] == collection_name:
+                    self._mark_written(key)
+            for key, entry in self._entries.items():
+                if key[0] != collection_name:
+                    continue
+                before = entry.nbytes
+                if entry.remove(ids):
+                    self._bytes += entry.nbytes - before
+                    affected.append(key[1])
+        return affected
+
+    def invalidate(self, collection_name: str, user_id: str) -> None:
+        with self._lock:
+            self._mark_written((collection_name, user_id))
+            self._pop((collection_name, user_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._loading:
+                self._mark_written(key)
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_users or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+
+
+class UserMemoryCounts:
+    """
+    LRU of per-user memory counts, adjusted by the memory writers.
+
+    A zero count lets retrieval skip the user entirely, so it expires after
+    the shorter `zero_ttl_seconds`: writes from other workers do not adjust
+    this process's counts.
+    """
+
+    def __init__(
+        self,
+        max_users: int = memory_config.MEMORY_COUNT_MAX_USERS,
+        ttl_seconds: int = memory_config.MEMORY_CACHE_TTL_SECONDS,
+        zero_ttl_seconds: int = memory_config.MEMORY_COUNT_ZERO_TTL_SECONDS,
+    ) -> None:
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.zero_ttl_seconds = zero_ttl_seconds
+        self._counts: "OrderedDict[CacheKey, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def get(self, collection_name: str, user_id: str) -> Optional[int]:
+        key = (collection_name, user_id)
+        with self._lock:
+            item = self._counts.get(key)
+            if item is None:
+                return None
+            count, loaded_at = item
+            ttl = self.zero_ttl_seconds if count == 0 and self.zero_ttl_seconds > 0 else self.ttl_seconds
+            if ttl > 0 and time.monotonic() - loaded_at > ttl:
+                del self._counts[key]
+                return None
+            self._counts.move_to_end(key)
+            return count
+
+    def get_or_load(
+        self,
+        collection_name: str,
+        user_id: str,
+        loader: Callable[[], Optional[int]],
+    ) -> Optional[int]:
+        """Return the cached count, loading it with `loader` on a miss (None = load failed)."""
+        count = self.get(collection_name, user_id)
+        if count is not None:
+            return count
+        count = loader()
+        if count is not None:
+            self.set(collection_name, user_id, count)
+        return count
+
+    def set(self, collection_name: str, user_id: str, count: int) -> None:
+        key = (collection_name, user_id)
+        with self._lock:
+            self._counts[key] = (max(0, int(count)), time.monotonic())
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_users:
+                self._counts.popitem(last=False)
+
+    def adjust(self, collection_name: str, user_id: str, delta: int) -> None:
+        """Add `delta` to a known count; unknown users are loaded on their next read."""
+        key = (collection_name, user_id)
+        with self._lock:
+            item = self._counts.get(key)
+            if item is not None:
+                self._counts[key] = (max(0, item[0] + delta), item[1])
+
+    def invalidate(self, collection_name: str, user_id: str) -> None:
+        with self._lock:
+            self._counts.pop((collection_name, user_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+memory_cache = UserMemoryCache()
+memory_counts = UserMemoryCounts()
@@ -0,0 +1,375 @@
+"""
+Background compaction of the `user_memory` collection.
+
+Each pass first purges memories past the retention TTL (one filter-based
+delete), then deduplicates what is left. The purge also runs on its own,
+cheaper schedule (`MEMORY_PURGE_INTERVAL_SECONDS`).
+
+MemoryManager only ever sees the top-k retrieved memories, so paraphrased
+duplicates ("user has diabetes type 2" / "user is a T2 diabetic") accumulate
+and every ColBERT rerank pays for them. This job walks each user's memories,
+greedily clusters them by dense cosine similarity (newest first, so the most
+recent phrasing of a fact survives), deletes the redundant members, and then
+enforces a per-user cap by dropping the oldest survivors. Deletes go through
+`delete_user_memory` so the in-process caches stay coherent.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from qdrant_client import models
+
+from config.memory_config import memory_config
+from utils.timezone_utils import get_vietnam_time
+from .memory_retrieval import (
+    MEMORY_COLLECTION_NAME,
+    QDRANT_URL,
+    _create_memory_collection,
+    delete_user_memory,
+    purge_expired_memories,
+)
+from .qdrant_schema import run_with_collection
+
+logger = logging.getLogger(__name__)
+
+DENSE_VECTOR_NAME = "all-MiniLM-L6-v2"
+_SCROLL_PAGE_SIZE = 256
+
+# Only one compaction pass at a time in this process (see `cluster_lock` across processes)
+_compaction_lock = threading.Lock()
+
+_compaction_status: Dict[str, Any] = {
+    "state": "idle",
+    "runs": 0,
+    "started_at": None,
+    "finished_at": None,
+    "expired_removed": 0,
+    "users_scanned": 0,
+    "duplicates_removed": 0,
+    "over_cap_removed": 0,
+    "bytes_reclaimed": 0,
+    "error": None,
+}
+
+
+def get_compaction_status() -> Dict[str, Any]:
+    """Return a snapshot of the last/ongoing compaction pass."""
+    return dict(_compaction_status)
+
+
+def _scroll(qdrant_url: str, collection_name: str, **kwargs) -> Iterator[models.Record]:
+    offset = None
+    while True:
+        points, offset = run_with_collection(qdrant_url, collection_name, lambda client: client.scroll(
+            collection_name=collection_name,
+            limit=_SCROLL_PAGE_SIZE,
+            offset=offset,
+            **kwargs,
+        ), _create_memory_collection)
+        yield from points
+        if offset is None:
+            return
+
+
+def _point_nbytes(point: models.Record) -> int:
+    """Approximate storage of one memory point: all vectors plus the payload text."""
+    size = 0
+    for vector in (point.vector or {}).values():
+        if isinstance(vector, models.SparseVector):
+            size += 8 * len(vector.indices)
+        else:
+            size += 4 * int(np.asarray(vector, dtype=np.float32).size)
+    payload = point.payload or {}
+    size += len(str(payload.get("query", "")).encode("utf-8"))
+    user_id = payload.get("user_id")
+    size += len(user_id.encode("utf-8")) if isinstance(user_id, str) else 8  # users.id is an int
+    return size
+
+
+def list_memory_users(qdrant_url: str = QDRANT_URL, collection_name: str = MEMORY_COLLECTION_NAME) -> List[int]:
+    """
+    Distinct user ids that own at least one memory.
+
+    Ids keep their payload type (users.id, an int): the per-user filters
+    match on the exact value, and "7" does not match 7.
+    """
+    users: Set[int] = set()
+    for point in _scroll(qdrant_url, collection_name, with_payload=["user_id"], with_vectors=False):
+        user_id = (point.payload or {}).get("user_id")
+        if user_id is not None:
+            users.add(user_id)
+    return sorted(users)
+
+
+def select_redundant_memories(
+    vectors: np.ndarray,
+    timestamps: List[float],
+    similarity_threshold: float,
+    max_per_user: int,
+) -> Dict[str, List[int]]:
+    """
+    Decide which memories to drop for one user.
+
+    Memories are visited newest first; each either joins the cluster of an
+    already-kept memory with cosine >= `similarity_threshold` (and is dropped)
+    or becomes a new kept representative. Kept memories beyond `max_per_user`
+    are dropped oldest first.
+
+    Returns:
+        {"duplicates": [row, ...], "over_cap": [row, ...]} (row indices into `vectors`)
+    """
+    n = len(timestamps)
+    if n == 0:
+        return {"duplicates": [], "over_cap": []}
+
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(n, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    unit = vectors / norms
+    similarity = unit @ unit.T
+
+    order = sorted(range(n), key=lambda i: timestamps[i], reverse=True)
+    kept: List[int] = []
+    duplicates: List[int] = []
+    for i in order:
+        if kept and similarity[i, kept].max() >= similarity_threshold:
+            duplicates.append(i)
+        else:
+            kept.append(i)
+
+    over_cap = kept[max_per_user:] if max_per_user > 0 else []
+    return {"duplicates": duplicates, "over_cap": over_cap}
+
+
+def compact_user_memories(
+    user_id: int,
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME,
+    similarity_threshold: float = memory_config.MEMORY_DEDUP_SIMILARITY,
+    max_per_user: int = memory_config.MEMORY_MAX_PER_USER,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Deduplicate and cap one user's memories.
+
+    Returns:
+        Stats dict with scanned / duplicates_removed / over_cap_removed / bytes_reclaimed
+    """
+    points = list(_scroll(
+        qdrant_url,
+        collection_name,
+        scroll_filter=models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="user_id",
+                    match=models.MatchValue(value=user_id)
+                )
+            ]
+        ),
+        with_payload=True,
+        with_vectors=True,
+    ))
+    stats = {"user_id": user_id, "scanned": len(points), "duplicates_removed": 0, "over_cap_removed": 0, "bytes_reclaimed": 0}
+    if not points:
+        return stats
+
+    vectors = np.array([p.vector[DENSE_VECTOR_NAME] for p in points], dtype=np.float32)
+    timestamps = [float((p.payload or {}).get("timestamp", 0) or 0) for p in points]
+    selection = select_redundant_memories(vectors, timestamps, similarity_threshold, max_per_user)
+
+    drop = selection["duplicates"] + selection["over_cap"]
+    if not drop:
+        return stats
+
+    reclaimed = sum(_point_nbytes(points[i]) for i in drop)
+    if not dry_run:
+        deleted = delete_user_memory(
+            [str(points[i].id) for i in drop], qdrant_url, collection_name, user_id=user_id
+        )
+        if not deleted:
+            raise RuntimeError(f"Failed to delete {len(drop)} memories for user {user_id}")
+
+    stats.update({
+        "duplicates_removed": len(selection["duplicates"]),
+        "over_cap_removed": len(selection["over_cap"]),
+        "bytes_reclaimed": reclaimed,
+    })
+    logger.info(
+        f"[MemoryCompaction] User {user_id}: {len(points)} memories, "
+        f"-{stats['duplicates_removed']} duplicates, -{stats['over_cap_removed']} over cap, "
+        f"{reclaimed} bytes reclaimed{' (dry run)' if dry_run else ''}"
+    )
+    return stats
+
+
+def run_memory_compaction(
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME,
+    user_ids: Optional[List[int]] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Compact every user's memories (or only `user_ids`). A failure for one user
+    is logged and does not stop the pass. Concurrent calls are rejected.
+
+    Returns:
+        Compaction status dict (see `get_compaction_status`)
+    """
+    if not _compaction_lock.acquire(blocking=False):
+        logger.info("[MemoryCompaction] Compaction already in progress, skipping")
+        return get_compaction_status()
+
+    try:
+        _compaction_status.update({
+            "state": "running",
+            "started_at": get_vietnam_time().isoformat(),
+            "finished_at": None,
+            "expired_removed": 0,
+            "users_scanned": 0,
+            "duplicates_removed": 0,
+            "over_cap_removed": 0,
+            "bytes_reclaimed": 0,
+            "error": None,
+        })
+
+        if not dry_run:
+            _compaction_status["expired_removed"] = purge_expired_memories(qdrant_url, collection_name)
+
+        users = user_ids if user_ids is not None else list_memory_users(qdrant_url, collection_name)
+        failures = 0
+        for user_id in users:
+            try:
+                stats = compact_user_memories(user_id, qdrant_url, collection_name, dry_run=dry_run)
+            except Exception as e:
+                failures += 1
+                logger.error(f"[MemoryCompaction] User {user_id} failed: {e}")
+                continue
+            _compaction_status["users_scanned"] += 1
+            for key in ("duplicates_removed", "over_cap_removed", "bytes_reclaimed"):
+                _compaction_status[key] += stats[key]
+
+        _compaction_status.update({
+            "state": "succeeded",
+            "runs": _compaction_status["runs"] + 1,
+            "finished_at": get_vietnam_time().isoformat(),
+            "error": f"{failures} user(s) failed" if failures else None,
+        })
+        logger.info(
+            f"[MemoryCompaction] ✅ -{_compaction_status['expired_removed']} expired, "
+            f"{_compaction_status['users_scanned']} users, "
+            f"-{_compaction_status['duplicates_removed']} duplicates, "
+            f"-{_compaction_status['over_cap_removed']} over cap, "
+            f"{_compaction_status['bytes_reclaimed']} bytes reclaimed"
+        )
+
+    except Exception as e:
+        _compaction_status.update({
+            "state": "failed",
+            "finished_at": get_vietnam_time().isoformat(),
+            "error": str(e),
+        })
+        logger.error(f"[MemoryCompaction] ❌ Compaction failed: {e}")
+
+    finally:
+        _compaction_lock.release()
+
+    return get_compaction_status()
+
+
+@contextmanager
+def cluster_lock(name: str) -> Iterator[bool]:
+    """
+    Postgres advisory lock `name`, shared by every worker process and replica.
+
+    Yields False when another process already holds it, so each scheduled
+    pass runs in one process only.
+    """
+    from database.advisory_lock import advisory_lock
+    from database.db import engine
+    with advisory_lock(engine, name, blocking=False) as acquired:
+        yield acquired
+
+
+class MemoryMaintenanceWorker:
+    """
+    Runs `job` every `interval_seconds` on a daemon thread.
+
+    Every uvicorn worker starts one, so each pass first takes `lock(name)`
+    (default: the cluster-wide advisory lock) and is skipped where it is held.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], Any],
+        interval_seconds: int,
+        lock: Callable[[str], ContextManager[bool]] = cluster_lock,
+    ):
+        self.name = name
+        self.job = job
+        self.interval_seconds = interval_seconds
+        self._lock = lock
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self.name.replace("_", "-"), daemon=True)
+        self._thread.start()
+        logger.info(f"[MemoryMaintenance] Running '{self.name}' every {self.interval_seconds}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> bool:
+        """Run one pass if no other process is running it; returns whether it ran."""
+        with self._lock(self.name) as acquired:
+            if not acquired:
+                logger.info(f"[MemoryMaintenance] Another process is running '{self.name}', skipping this pass")
+                return False
+            self.job()
+            return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"[MemoryMaintenance] '{self.name}' worker error: {e}")
+
+
+_workers: Dict[str, MemoryMaintenanceWorker] = {}
+
+
+def _start_worker(name: str, job: Callable[[], Any], interval_seconds: int) -> Optional[MemoryMaintenanceWorker]:
+    if interval_seconds <= 0:
+        return None
+    if name not in _workers:
+        _workers[name] = MemoryMaintenanceWorker(name, job, interval_seconds)
+        _workers[name].start()
+    return _workers[name]
+
+
+def start_memory_compaction_worker(
+    interval_seconds: int = memory_config.MEMORY_COMPACTION_INTERVAL_SECONDS,
+) -> Optional[MemoryMaintenanceWorker]:
+    """Start the process-wide compaction worker if `interval_seconds` > 0."""
+    return _start_worker("memory_compaction", lambda: run_memory_compaction(), interval_seconds)
+
+
+def start_memory_purge_worker(
+    interval_seconds: int = memory_config.MEMORY_PURGE_INTERVAL_SECONDS,
+) -> Optional[MemoryMaintenanceWorker]:
+    """
+    Start the TTL purge worker if a TTL is configured and `interval_seconds` > 0.
+
+    Expired memories are already hidden from retrieval; this reclaims their
+    storage independently of (the much heavier) compaction.
+    """
+    if memory_config.MEMORY_TTL_DAYS <= 0:
+        return None
+    return _start_worker("memory_purge", lambda: purge_expired_memories(), interval_seconds)
@@ -5,13 +5,17 @@ Utility function for User Memory retrieval and storage in Qdrant.
 import logging
 import uuid
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from qdrant_client import QdrantClient, models
 import os
 from dotenv import load_dotenv
 
 # Import the existing embedding model loader to reuse models
 from utils.knowledge_base.qdrant_retrieval import _get_embedding_models
+from utils.knowledge_base.qdrant_schema import get_qdrant_client, on_collection_reset, run_with_collection, schema_registry
+from utils.knowledge_base.memory_cache import CachedUserMemories, memory_cache, memory_counts
+from config.memory_config import memory_config
+import numpy as np
 
 logger = logging.getLogger(__name__)
 load_dotenv(override=False)
@@ -24,6 +28,198 @@ DENSE_VECTOR_SIZE = 384  # all-MiniLM-L6-v2
 LATE_INTERACTION_VECTOR_SIZE = 128  # colbertv2.0
 
 
+def _create_memory_collection(client: QdrantClient, collection_name: str) -> None:
+    """Create the user memory collection with the hybrid search config."""
+    lite = memory_config.MEMORY_VECTOR_PROFILE == "lite"
+    logger.info(f"[Memory] Creating collection '{collection_name}' with hybrid search config ({'lite' if lite else 'full'} profile)")
+
+    vectors_config = {
+        "all-MiniLM-L6-v2": models.VectorParams(
+            size=DENSE_VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+        ),
+    }
+    if not lite:
+        vectors_config["colbertv2.0"] = models.VectorParams(
+            size=LATE_INTERACTION_VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+            multivector_config=models.MultiVectorConfig(
+                comparator=models.MultiVectorComparator.MAX_SIM,
+            ),
+            hnsw_config=models.HnswConfigDiff(m=0)  # Disable HNSW for reranking
+        )
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config,
+        sparse_vectors_config={
+            "bm25": models.SparseVectorParams(
+                modifier=models.Modifier.IDF
+            )
+        }
+    )
+
+    ensure_memory_payload_indexes(client, collection_name)
+
+    logger.info(f"[Memory] Collection '{collection_name}' created successfully")
+
+
+# Payload indexes memory queries rely on: field -> schema
+MEMORY_PAYLOAD_INDEXES = {
+    "user_id": models.PayloadSchemaType.INTEGER,  # users.id
+    "timestamp": models.PayloadSchemaType.FLOAT,
+}
+
+
+def ensure_memory_payload_indexes(client: QdrantClient, collection_name: str = MEMORY_COLLECTION_NAME) -> None:
+    """
+    Create the payload indexes memory queries rely on (idempotent).
+
+    `user_id` backs every per-user filter/count; `timestamp` backs the TTL
+    filter and the filter-based purge of expired memories. An index with the
+    wrong type (collections created with the earlier KEYWORD `user_id` index,
+    which does not cover integer ids) is dropped and recreated.
+    """
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field_name, field_schema in MEMORY_PAYLOAD_INDEXES.items():
+        info = existing.get(field_name)
+        if info is not None:
+            if info.data_type == field_schema:
+                continue
+            logger.warning(
+                f"[Memory] Payload index '{field_name}' on '{collection_name}' is {info.data_type}, "
+                f"recreating it as {field_schema}"
+            )
+            client.delete_payload_index(collection_name=collection_name, field_name=field_name)
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=field_schema,
+        )
+
+
+def memory_expiry_cutoff(now: Optional[float] = None) -> Optional[float]:
+    """Oldest timestamp still within the retention TTL, or None if memories never expire."""
+    if memory_config.MEMORY_TTL_DAYS <= 0:
+        return None
+    return (now if now is not None else time.time()) - memory_config.MEMORY_TTL_DAYS * 86400
+
+
+def _user_filter(user_id: str, now: Optional[float] = None) -> models.Filter:
+    """Filter for one user's memories that are still within the retention TTL."""
+    must = [
+        models.FieldCondition(
+            key="user_id",
+            match=models.MatchValue(value=user_id)
+        )
+    ]
+    cutoff = memory_expiry_cutoff(now)
+    if cutoff is not None:
+        must.append(models.FieldCondition(key="timestamp", range=models.Range(gte=cutoff)))
+    return models.Filter(must=must)
+
+
+def recency_weight(timestamp: float, now: Optional[float] = None) -> float:
+    """Multiplier in [1 - w, 1] that decays with memory age (half-life in days)."""
+    weight = memory_config.MEMORY_RECENCY_WEIGHT
+    half_life = memory_config.MEMORY_RECENCY_HALF_LIFE_DAYS
+    if weight <= 0 or half_life <= 0:
+        return 1.0
+    now = now if now is not None else time.time()
+    age_days = max(0.0, now - float(timestamp or 0)) / 86400
+    return (1 - weight) + weight * 0.5 ** (age_days / half_life)
+
+
+def apply_retention(memories: List[Dict[str, Any]], top_k: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Drop expired memories, recency-weight the scores and return the new top-k."""
+    now = now if now is not None else time.time()
+    cutoff = memory_expiry_cutoff(now)
+    kept = []
+    for memory in memories:
+        if cutoff is not None and float(memory.get("timestamp") or 0) < cutoff:
+            continue
+        memory["score"] = memory["score"] * recency_weight(memory.get("timestamp", 0), now)
+        kept.append(memory)
+    kept.sort(key=lambda m: m["score"], reverse=True)
+    return kept[:top_k]
+
+
+schema_registry.register(MEMORY_COLLECTION_NAME, _create_memory_collection)
+
+# (qdrant_url, collection_name) -> whether the collection stores ColBERT vectors
+_late_interaction_collections: Dict[Tuple[Optional[str], str], bool] = {}
+
+# A recreated collection may have the other profile
+on_collection_reset(lambda qdrant_url, name: _late_interaction_collections.pop((qdrant_url, name), None))
+
+
+def uses_late_interaction(qdrant_url: str = QDRANT_URL, collection_name: str = MEMORY_COLLECTION_NAME) -> bool:
+    """
+    Whether a memory collection was created with the "full" (ColBERT) profile.
+
+    Read from the collection schema once per process (and again after the
+    collection is invalidated or recreated), so a deployment keeps working
+    with whatever profile its collection already has.
+    """
+    key = (qdrant_url, collection_name)
+    if key not in _late_interaction_collections:
+        info = run_with_collection(
+            qdrant_url, collection_name,
+            lambda client: client.get_collection(collection_name),
+            _create_memory_collection,
+        )
+        vectors = info.config.params.vectors
+        _late_interaction_collections[key] = isinstance(vectors, dict) and "colbertv2.0" in vectors
+    return _late_interaction_collections[key]
+
+
+def _maxsim(query_tokens: np.ndarray, doc_tokens: np.ndarray) -> float:
+    """ColBERT late-interaction score: sum over query tokens of the best doc-token cosine."""
+    q = np.asarray(query_tokens, dtype=np.float32)
+    d = np.asarray(doc_tokens, dtype=np.float32)
+    q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+    d = d / np.maximum(np.linalg.norm(d, axis=1, keepdims=True), 1e-12)
+    return float((q @ d.T).max(axis=1).sum())
+
+
+def rerank_candidates(
+    points: List[Any],
+    query_dense: np.ndarray,
+    current_query: str,
+    late_interaction_model: Any = None
+) -> List[Dict[str, Any]]:
+    """
+    Client-side rerank of lite-profile candidates.
+
+    Uses ColBERT MaxSim over on-the-fly embeddings when MEMORY_LITE_RERANK is
+    "colbert" (and a model is given), else cosine against the stored dense vectors.
+    """
+    if not points:
+        return []
+    texts = [p.payload.get("query", "") for p in points]
+    if memory_config.MEMORY_LITE_RERANK == "colbert" and late_interaction_model is not None:
+        query_tokens = next(late_interaction_model.query_embed(current_query))
+        doc_tokens = list(late_interaction_model.embed(texts))
+        scores = [_maxsim(query_tokens, d) for d in doc_tokens]
+    else:
+        vectors = np.array([p.vector["all-MiniLM-L6-v2"] for p in points], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        q = np.asarray(query_dense, dtype=np.float32)
+        scores = (vectors @ (q / max(float(np.linalg.norm(q)), 1e-12))).tolist()
+
+    memories = [
+        {
+            "id": point.id,
+            "query": text,
+            "timestamp": point.payload.get("timestamp", 0),
+            "score": float(score)
+        }
+        for point, text, score in zip(points, texts, scores)
+    ]
+    memories.sort(key=lambda m: m["score"], reverse=True)
+    return memories
+
+
 def ensure_memory_collection_exists(
     qdrant_url: str = QDRANT_URL,
     collection_name: str = MEMORY_COLLECTION_NAME
@@ -31,6 +227,8 @@ def ensure_memory_collection_exists(
     """
     Ensure the user memory collection exists with the correct configuration.
 
+    Checked once per process via the schema registry; later calls are free.
+
     Args:
         qdrant_url: Qdrant server URL
         collection_name: Name of the collection
@@ -39,47 +237,89 @@ def ensure_memory_collection_exists(
         True if collection exists or was created, False on error
     """
     try:
-        client = QdrantClient(url=qdrant_url)
+        return schema_registry.ensure(qdrant_url, collection_name, _create_memory_collection)
+    except Exception as e:
+        logger.error(f"[Memory] Error creating collection '{collection_name}': {e}")
+        return False
 
-        # Check if collection exists
-        collections = client.get_collections().collections
-        exists = any(col.name == collection_name for col in collections)
 
-        if exists:
-            # logger.info(f"[Memory] Collection '{collection_name}' already exists")
-            return True
+def save_user_memories(
+    user_id: str,
+    entries: List[Dict[str, Any]],
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME
+) -> Optional[List[str]]:
+    """
+    Bulk insert/update memories: one embedding batch per model and one upsert.
 
-        logger.info(f"[Memory] Creating collection '{collection_name}' with hybrid search config")
+    Args:
+        user_id: The user's ID
+        entries: Dicts with `query` (text) and optional `point_id` (update when set)
+        qdrant_url: Qdrant server URL
+        collection_name: Memory collection name
 
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config={
-                "all-MiniLM-L6-v2": models.VectorParams(
-                    size=DENSE_VECTOR_SIZE,
-                    distance=models.Distance.COSINE,
-                ),
-                "colbertv2.0": models.VectorParams(
-                    size=LATE_INTERACTION_VECTOR_SIZE,
-                    distance=models.Distance.COSINE,
-                    multivector_config=models.MultiVectorConfig(
-                        comparator=models.MultiVectorComparator.MAX_SIM,
-                    ),
-                    hnsw_config=models.HnswConfigDiff(m=0)  # Disable HNSW for reranking
-                ),
-            },
-            sparse_vectors_config={
-                "bm25": models.SparseVectorParams(
-                    modifier=models.Modifier.IDF
-                )
-            }
+    Returns:
+        Point IDs written (same order as `entries`), or None if the write failed
+    """
+    entries = [e for e in entries if e.get("query") and str(e["query"]).strip()]
+    if not entries:
+        logger.warning("[Memory] No non-empty memories to save")
+        return []
+
+    try:
+        # Get embedding models
+        dense_model, sparse_model, late_interaction_model = _get_embedding_models()
+
+        # Embed all texts in one batch per model
+        texts = [e["query"] for e in entries]
+        dense_vectors = list(dense_model.embed(texts))
+        sparse_vectors = list(sparse_model.embed(texts))
+        late = uses_late_interaction(qdrant_url, collection_name)
+        late_vectors = list(late_interaction_model.embed(texts)) if late else [None] * len(texts)
+
+        # New points get a fresh ID; existing IDs are overwritten (timestamp refreshed)
+        timestamp = time.time()
+        point_ids = [e.get("point_id") or str(uuid.uuid4()) for e in entries]
+        points = [
+            models.PointStruct(
+                id=point_id,
+                vector={
+                    "all-MiniLM-L6-v2": dense,
+                    "bm25": sparse.as_object(),
+                    **({"colbertv2.0": late_vector} if late else {}),
+                },
+                payload={
+                    "user_id": user_id,
+                    "query": text,
+                    "timestamp": timestamp
+                }
+            )
+            for point_id, text, dense, sparse, late_vector in zip(point_ids, texts, dense_vectors, sparse_vectors, late_vectors)
+        ]
+
+        def upsert(client: QdrantClient):
+            # A collection re-created by the retry may have the lite profile (no ColBERT vectors)
+            if late and not uses_late_interaction(qdrant_url, collection_name):
+                for point in points:
+                    point.vector.pop("colbertv2.0", None)
+            return client.upsert(collection_name=collection_name, points=points)
+
+        # Single upsert (collection verified once per process, re-created if it disappears)
+        run_with_collection(qdrant_url, collection_name, upsert, _create_memory_collection)
+
+        # Keep this user's hot-cache entry coherent
+        memory_cache.write_through(
+            collection_name, user_id, point_ids, texts, np.vstack(dense_vectors), timestamp
         )
 
-        logger.info(f"[Memory] Collection '{collection_name}' created successfully")
-        return True
+        updated = sum(1 for e in entries if e.get("point_id"))
+        memory_counts.adjust(collection_name, user_id, len(points) - updated)
+        logger.info(f"[Memory] Bulk saved {len(points)} memories for user {user_id} ({len(points) - updated} new, {updated} updated)")
+        return point_ids
 
     except Exception as e:
-        logger.error(f"[Memory] Error creating collection '{collection_name}': {e}")
-        return False
+        logger.error(f"[Memory] Error saving memories: {e}")
+        return None
 
 
 def save_user_memory(
@@ -106,60 +346,17 @@ def save_user_memory(
         logger.warning("[Memory] Empty query, skipping save")
         return False
 
-    try:
-        # Ensure collection exists
-        ensure_memory_collection_exists(qdrant_url, collection_name)
-
-        # Get embedding models
-        dense_model, sparse_model, late_interaction_model = _get_embedding_models()
-
-        # Embed query
-        dense_vectors = next(dense_model.embed([query]))
-        sparse_vectors = next(sparse_model.embed([query]))
-        late_vectors = next(late_interaction_model.embed([query]))
-
-        # Create or update Point
-        if point_id is None:
-            point_id = str(uuid.uuid4())
-            timestamp = time.time()
-            action = "Saved new"
-        else:
-            timestamp = time.time()  # Update timestamp on modification
-            action = "Updated"
-
-        point = models.PointStruct(
-            id=point_id,
-            vector={
-                "all-MiniLM-L6-v2": dense_vectors,
-                "bm25": sparse_vectors.as_object(),
-                "colbertv2.0": late_vectors,
-            },
-            payload={
-                "user_id": user_id,
-                "query": query,
-                "timestamp": timestamp
-            }
-        )
-
-        # Upsert
-        client = QdrantClient(url=qdrant_url)
-        client.upsert(
-            collection_name=collection_name,
-            points=[point]
-        )
-
-        logger.info(f"[Memory] {action} memory for user {user_id}: '{query[:50]}...'")
-        return True
-
-    except Exception as e:
-        logger.error(f"[Memory] Error saving memory: {e}")
-        return False
+    point_ids = save_user_memories(
+        user_id, [{"query": query, "point_id": point_id}], qdrant_url, collection_name
+    )
+    return bool(point_ids)
 
 
 def delete_user_memory(
     point_ids: List[str],
     qdrant_url: str = QDRANT_URL,
-    collection_name: str = MEMORY_COLLECTION_NAME
+    collection_name: str = MEMORY_COLLECTION_NAME,
+    user_id: Optional[str] = None
 ) -> bool:
     """
     Delete user memories by point IDs.
@@ -168,6 +365,7 @@ def delete_user_memory(
         point_ids: List of point IDs to delete
         qdrant_url: Qdrant server URL
         collection_name: Memory collection name
+        user_id: Owner of the points, if known (refreshes their cached count)
 
     Returns:
         True if deleted successfully, False otherwise
@@ -177,7 +375,7 @@ def delete_user_memory(
         return False
 
     try:
-        client = QdrantClient(url=qdrant_url)
+        client = get_qdrant_client(qdrant_url)
         client.delete(
             collection_name=collection_name,
             points_selector=models.PointIdsList(
@@ -185,6 +383,13 @@ def delete_user_memory(
             )
         )
 
+        # Counts only shrink here, so a user we cannot attribute is at worst over-counted
+        affected = set(memory_cache.remove_points(collection_name, point_ids))
+        if user_id:
+            affected.add(user_id)
+        for owner in affected:
+            memory_counts.invalidate(collection_name, owner)
+
         logger.info(f"[Memory] Deleted {len(point_ids)} memory points")
         return True
 
@@ -193,6 +398,149 @@ def delete_user_memory(
         return False
 
 
+def delete_all_user_memories(
+    user_id: Any,
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME
+) -> int:
+    """
+    Delete every memory of a user with one filter-based delete (account purge).
+
+    Returns:
+        Number of memories deleted
+    """
+    user_filter = models.Filter(
+        must=[
+            models.FieldCondition(
+                key="user_id",
+                match=models.MatchValue(value=user_id)
+            )
+        ]
+    )
+
+    def purge(client: QdrantClient) -> int:
+        owned = client.count(collection_name=collection_name, count_filter=user_filter, exact=True).count
+        if owned:
+            client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=user_filter),
+            )
+        return owned
+
+    deleted = run_with_collection(qdrant_url, collection_name, purge, _create_memory_collection)
+    memory_cache.invalidate(collection_name, user_id)
+    memory_counts.set(collection_name, user_id, 0)
+    logger.info(f"[Memory] Deleted all {deleted} memories of user {user_id}")
+    return deleted
+
+
+def purge_expired_memories(
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME,
+    now: Optional[float] = None
+) -> int:
+    """
+    Delete every memory older than the retention TTL with one filter-based delete.
+
+    Returns:
+        Number of memories purged (0 when no TTL is configured)
+    """
+    cutoff = memory_expiry_cutoff(now)
+    if cutoff is None:
+        return 0
+
+    expired_filter = models.Filter(
+        must=[models.FieldCondition(key="timestamp", range=models.Range(lt=cutoff))]
+    )
+
+    def purge(client: QdrantClient) -> int:
+        expired = client.count(collection_name=collection_name, count_filter=expired_filter, exact=True).count
+        if expired:
+            client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(filter=expired_filter),
+            )
+        return expired
+
+    expired = run_with_collection(qdrant_url, collection_name, purge, _create_memory_collection)
+    if expired:
+        # Owners are unknown here; cheap to reload on demand
+        memory_cache.clear()
+        memory_counts.clear()
+        logger.info(f"[Memory] Purged {expired} memories older than {memory_config.MEMORY_TTL_DAYS} days")
+    return expired
+
+
+def get_user_memory_count(
+    user_id: str,
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME
+) -> Optional[int]:
+    """
+    Number of memories stored for a user, served from the in-process count cache.
+
+    On a miss the count comes from a complete hot-cache entry if there is one,
+    otherwise from an exact Qdrant count over the `user_id` payload index.
+
+    Returns:
+        Memory count, or None if it could not be determined
+    """
+    def load() -> Optional[int]:
+        cached = memory_cache.get(collection_name, user_id)
+        if cached is not None and cached.complete:
+            return len(cached)
+        try:
+            return run_with_collection(qdrant_url, collection_name, lambda client: client.count(
+                collection_name=collection_name,
+                count_filter=_user_filter(user_id),
+                exact=True,
+            ).count, _create_memory_collection)
+        except Exception as e:
+            logger.error(f"[Memory] Error counting memories for user {user_id}: {e}")
+            return None
+
+    return memory_counts.get_or_load(collection_name, user_id, load)
+
+
+def _load_user_memories(
+    user_id: str,
+    qdrant_url: str = QDRANT_URL,
+    collection_name: str = MEMORY_COLLECTION_NAME
+) -> Optional[CachedUserMemories]:
+    """
+    Load a user's memories (texts + dense vectors) for the hot cache.
+
+    Users with more than MEMORY_CACHE_SMALL_SET memories are cached as an empty,
+    incomplete entry so they keep using the Qdrant hybrid query.
+
+    Returns:
+        Cache entry, or None if Qdrant could not be reached
+    """
+    limit = memory_config.MEMORY_CACHE_SMALL_SET
+    try:
+        points, _ = run_with_collection(qdrant_url, collection_name, lambda client: client.scroll(
+            collection_name=collection_name,
+            scroll_filter=_user_filter(user_id),
+            limit=limit + 1,
+            with_payload=True,
+            with_vectors=["all-MiniLM-L6-v2"],
+        ), _create_memory_collection)
+    except Exception as e:
+        logger.error(f"[Memory] Error loading memories for cache: {e}")
+        return None
+
+    if len(points) > limit:
+        return CachedUserMemories([], [], [], np.zeros((0, DENSE_VECTOR_SIZE), np.float32), complete=False)
+
+    return CachedUserMemories(
+        ids=[str(p.id) for p in points],
+        texts=[p.payload.get("query", "") for p in points],
+        timestamps=[p.payload.get("timestamp", 0) for p in points],
+        vectors=np.array([p.vector["all-MiniLM-L6-v2"] for p in points], dtype=np.float32).reshape(len(points), DENSE_VECTOR_SIZE),
+        complete=True,
+    )
+
+
 def retrieve_user_memory(
     user_id: str,
     current_query: str,
@@ -211,21 +559,35 @@ def retrieve_user_memory(
         collection_name: Memory collection name
 
     Returns:
-        List of memory dictionaries containing {id, query, timestamp, score}
+        List of memory dictionaries containing {id, query, timestamp, score}.
+        Memories past the retention TTL are excluded and scores are recency-weighted.
     """
+    now = time.time()
     try:
-        # Ensure collection exists (just in case it's the first time)
-        ensure_memory_collection_exists(qdrant_url, collection_name)
-
         # Get embedding models
         dense_model, sparse_model, late_interaction_model = _get_embedding_models()
 
+        # Small memory sets are answered from the hot cache with local cosine scoring
+        if memory_config.MEMORY_CACHE_ENABLED:
+            cached = memory_cache.get_or_load(
+                collection_name, user_id,
+                lambda: _load_user_memories(user_id, qdrant_url, collection_name),
+            )
+            if cached is not None and cached.complete:
+                memory_counts.set(collection_name, user_id, len(cached))
+                if not cached:
+                    logger.info(f"[Memory] User {user_id} has no memories (cache)")
+                    return []
+                query_vector = next(dense_model.query_embed(current_query))
+                memories = apply_retention(cached.search(query_vector, len(cached)), top_k, now)
+                logger.info(f"[Memory] Retrieved {len(memories)} memories for user {user_id} (local cache, {len(cached)} stored)")
+                return memories
+
         # Embed current query
         dense_vectors = next(dense_model.query_embed(current_query))
         sparse_vectors = next(sparse_model.query_embed(current_query))
-        late_vectors = next(late_interaction_model.query_embed(current_query))
 
-        client = QdrantClient(url=qdrant_url)
+        user_filter = _user_filter(user_id, now)
 
         # Build prefetch for hybrid search
         prefetch = [
@@ -233,48 +595,48 @@ def retrieve_user_memory(
                 query=dense_vectors,
                 using="all-MiniLM-L6-v2",
                 limit=top_k + 20, # Fetch a bit more for reranking
-                filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        )
-                    ]
-                )
+                filter=user_filter
             ),
             models.Prefetch(
                 query=models.SparseVector(**sparse_vectors.as_object()),
                 using="bm25",
                 limit=top_k + 20,
-                filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="user_id",
-                            match=models.MatchValue(value=user_id)
-                        )
-                    ]
-                )
+                filter=user_filter
             ),
         ]
 
+        if not uses_late_interaction(qdrant_url, collection_name):
+            # Lite profile: fuse dense+sparse candidates in Qdrant, rerank the small pool here
+            results = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
+                collection_name=collection_name,
+                prefetch=prefetch,
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                with_payload=True,
+                with_vectors=["all-MiniLM-L6-v2"],
+                limit=top_k + 20,
+                query_filter=user_filter
+            ), _create_memory_collection)
+            memories = rerank_candidates(results.points, dense_vectors, current_query, late_interaction_model)
+            memories = apply_retention(memories, top_k, now)
+            logger.info(f"[Memory] Retrieved {len(memories)} memories for user {user_id} (client-side rerank)")
+            return memories
+
+        late_vectors = next(late_interaction_model.query_embed(current_query))
+
+        # With recency weighting the final order can differ, so rerank the whole candidate pool
+        limit = top_k + 20 if memory_config.MEMORY_RECENCY_WEIGHT > 0 else top_k
+
         # Execute hybrid search with Late Interaction (ColBERT) reranking
-        results = client.query_points(
+        results = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
             collection_name=collection_name,
             prefetch=prefetch,
             query=late_vectors,
             using="colbertv2.0",
             with_payload=True,
-            limit=top_k,
+            limit=limit,
             # Also apply filter at the root level just to be safe
-            query_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="user_id",
-                        match=models.MatchValue(value=user_id)
-                    )
-                ]
-            )
-        )
+            query_filter=user_filter
+        ), _create_memory_collection)
 
         memories = []
         for point in results.points:
@@ -284,6 +646,7 @@ def retrieve_user_memory(
                 "timestamp": point.payload.get("timestamp", 0),
                 "score": point.score
             })
+        memories = apply_retention(memories, top_k, now)
 
         logger.info(f"[Memory] Retrieved {len(memories)} memories for user {user_id}")
         return memories
@@ -0,0 +1,139 @@
+"""
+Optional dense (embedding) index for the OQA orthodontist dataset.
+
+Embeddings of `question + context` are computed once with the same fastembed
+MiniLM model used for Qdrant, L2-normalised and stored as a float32 `.npy`
+file next to the CSV. At startup the file is memory-mapped, so cosine search
+is a single matrix product over the mapped matrix and no Qdrant collection is needed.
+A small JSON sidecar records the model and a fingerprint of the embedded text;
+if the CSV changes the index is rebuilt on the next load.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Protocol
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DENSE_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class DenseEncoder(Protocol):
+    """Minimal encoder interface used by `OQADenseIndex`."""
+
+    name: str
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray: ...
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray: ...
+
+
+class FastEmbedEncoder:
+    """Encoder backed by the shared fastembed MiniLM model (see qdrant_retrieval)."""
+
+    name = DENSE_MODEL_NAME
+
+    def _model(self):
+        # Lazy import: only pull in fastembed/qdrant when the dense index is enabled
+        from .qdrant_retrieval import _get_embedding_models
+
+        dense_model, _, _ = _get_embedding_models()
+        return dense_model
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.vstack(list(self._model().embed(texts, batch_size=64))).astype(np.float32)
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        return np.vstack(list(self._model().query_embed(texts))).astype(np.float32)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def corpus_fingerprint(texts: List[str]) -> str:
+    """Stable hash of the embedded texts, used to detect a stale on-disk index."""
+    h = hashlib.sha1()
+    for t in texts:
+        h.update(t.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def dense_index_path(csv_path: str) -> str:
+    """`.../oqa_v1_dataset.csv` -> `.../oqa_v1_dataset.dense.npy`"""
+    return os.path.splitext(csv_path)[0] + ".dense.npy"
+
+
+class OQADenseIndex:
+    """Memory-mapped matrix of normalised document embeddings (row i == OQA row i)."""
+
+    def __init__(self, vectors: np.ndarray, encoder: DenseEncoder) -> None:
+        self.vectors = vectors
+        self.encoder = encoder
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def scores(self, query: str) -> np.ndarray:
+        """Cosine similarity of `query` against every document."""
+        return self.scores_batch([query])[0]
+
+    def scores_batch(self, queries: List[str]) -> np.ndarray:
+        """Cosine similarities for several queries embedded in one batch; (n_queries, n_docs)."""
+        q = _normalize_rows(np.atleast_2d(self.encoder.embed_queries(list(queries))))
+        return np.asarray(q @ self.vectors.T, dtype=np.float32)
+
+    @classmethod
+    def build(cls, texts: List[str], path: str, encoder: DenseEncoder) -> "OQADenseIndex":
+        """Embed `texts`, write the `.npy` + sidecar to `path`, and return the mapped index."""
+        vectors = _normalize_rows(encoder.embed_documents(texts)) if texts else np.zeros((0, 0), np.float32)
+        meta: Dict[str, Any] = {
+            "model": encoder.name,
+            "rows": len(texts),
+            "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "fingerprint": corpus_fingerprint(texts),
+        }
+        # Write to temp files then rename, so a concurrent loader never maps a partial file
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, vectors)
+        with open(path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+        os.replace(path + ".json.tmp", path + ".json")
+        logger.info(f"[OQADense] Built dense index: {meta['rows']} rows x {meta['dim']} dims -> {path}")
+        return cls(np.load(path, mmap_mode="r"), encoder)
+
+    @classmethod
+    def load(cls, texts: List[str], path: str, encoder: DenseEncoder) -> Optional["OQADenseIndex"]:
+        """Memory-map an existing index if it matches `texts` and the encoder, else None."""
+        meta_path = path + ".json"
+        if not (os.path.isfile(path) and os.path.isfile(meta_path)):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception as e:
+            logger.warning(f"[OQADense] Unreadable sidecar {meta_path}: {e}")
+            return None
+        if meta.get("model") != encoder.name or meta.get("fingerprint") != corpus_fingerprint(texts):
+            logger.info("[OQADense] On-disk index is stale (dataset or model changed)")
+            return None
+        vectors = np.load(path, mmap_mode="r")
+        if vectors.shape[0] != len(texts):
+            return None
+        return cls(vectors, encoder)
+
+    @classmethod
+    def load_or_build(cls, texts: List[str], path: str, encoder: DenseEncoder) -> "OQADenseIndex":
+        index = cls.load(texts, path, encoder)
+        if index is not None:
+            logger.info(f"[OQADense] Memory-mapped dense index: {len(index)} rows from {path}")
+            return index
+        return cls.build(texts, path, encoder)
@@ -7,15 +7,23 @@ According to PocketFlow best practices, this should be independent and easily te
 
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from qdrant_client import QdrantClient, models
+from qdrant_client import models
 from fastembed import TextEmbedding, LateInteractionTextEmbedding, SparseTextEmbedding
 import os 
 from dotenv import load_dotenv
 logger = logging.getLogger(__name__)
 import shutil
+from utils.role_enum import ROLE_TO_CSV
+from utils.knowledge_base.qdrant_schema import run_with_collection, schema_registry
 
 load_dotenv(override=False)
 
+# Role KB collections are populated by loadvector_qdrant.py, so they are only
+# verified (never created) by the schema registry
+KB_COLLECTIONS = tuple(os.path.splitext(csv_name)[0] for csv_name in ROLE_TO_CSV.values())
+for _collection in KB_COLLECTIONS:
+    schema_registry.register(_collection)
+
 # Cache directory for embedding models
 FASTEMBED_CACHE = os.getenv("FASTEMBED_CACHE_PATH", "./models")
 
@@ -148,9 +156,6 @@ def retrieve_from_qdrant(
 
         logger.info(f"[retrieve_from_qdrant] Query embeddings generated (LI={use_late_interaction})")
 
-        # Create Qdrant client
-        client = QdrantClient(url=qdrant_url)
-
         # Build prefetch for hybrid search
         prefetch = [
             models.Prefetch(
@@ -189,7 +194,7 @@ def retrieve_from_qdrant(
         # Execute hybrid search
         if use_late_interaction and late_vectors is not None:
             # Case 1: Late Interaction (ColBERT) as root query
-            results = client.query_points(
+            results = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
                 collection_name,
                 prefetch=prefetch,
                 query=late_vectors,
@@ -197,17 +202,17 @@ def retrieve_from_qdrant(
                 with_payload=True,
                 limit=top_k,
                 query_filter=query_filter
-            )
+            ))
         else:
             # Case 2: No Late Interaction -> Use Fusion (RRF) of prefetch results
-            results = client.query_points(
+            results = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
                 collection_name,
                 prefetch=prefetch,
                 query=models.FusionQuery(fusion=models.Fusion.RRF),
                 with_payload=True,
                 limit=top_k,
                 query_filter=query_filter
-            )
+            ))
 
         logger.info(f"[retrieve_from_qdrant] Retrieved {len(results.points)} results")
 
@@ -259,14 +264,12 @@ def get_full_qa_by_ids(
     try:
         logger.info(f"[get_full_qa_by_ids] Retrieving {len(ids)} documents by IDs")
 
-        client = QdrantClient(url=qdrant_url)
-
-        records = client.retrieve(
+        records = run_with_collection(qdrant_url, collection_name, lambda client: client.retrieve(
             collection_name=collection_name,
             ids=ids,
             with_payload=True,
             with_vectors=False
-        )
+        ))
 
         results = []
         for record in records:
@@ -381,9 +384,6 @@ def retrieve_from_qdrant_with_cached_embeddings(
             if use_late_interaction:
                 late_vectors = next(late_interaction_model.query_embed(query))
 
-        # Create Qdrant client
-        client = QdrantClient(url=qdrant_url)
-
         # Build prefetch for hybrid search
         prefetch = [
             models.Prefetch(
@@ -420,24 +420,24 @@ def retrieve_from_qdrant_with_cached_embeddings(
 
         # Execute hybrid search with optional late interaction reranking
         if use_late_interaction and late_vectors is not None:
-            search_result = client.query_points(
+            search_result = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
                 collection_name=collection_name,
                 prefetch=prefetch,
                 query=late_vectors,
                 using="colbertv2.0",
                 limit=top_k,
                 query_filter=query_filter,
-            )
+            ))
         else:
             # Fallback: search without late interaction
-            search_result = client.query_points(
+            search_result = run_with_collection(qdrant_url, collection_name, lambda client: client.query_points(
                 collection_name=collection_name,
                 prefetch=prefetch,
                 query=dense_vectors,
                 using="all-MiniLM-L6-v2",
                 limit=top_k,
                 query_filter=query_filter,
-            )
+            ))
 
         # Format results
         results = []
@@ -0,0 +1,184 @@
+"""
+Process-level Qdrant client cache and collection schema registry.
+
+Collections are verified (or created, when a creator is registered) once per
+process and remembered, so the hot path makes no `get_collections` RPCs. The
+cached state is dropped only when an operation fails with "collection not
+found" (e.g. the collection was deleted behind our back); the collection is then
+re-verified/re-created and the operation retried once. A verify-only
+collection found missing is remembered for a short TTL, so requests that hit
+it fail fast instead of each paying a `collection_exists` RPC. Modules that cache
+facts about a collection's schema subscribe with `on_collection_reset` and are
+told whenever it is invalidated or (re-)created.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from config.kb_config import kb_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+CollectionCreator = Callable[[QdrantClient, str], None]
+
+_clients: Dict[Optional[str], QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+CollectionResetListener = Callable[[Optional[str], str], None]
+_reset_listeners: List[CollectionResetListener] = []
+
+
+def on_collection_reset(listener: CollectionResetListener) -> None:
+    """Call `listener(qdrant_url, collection_name)` when a collection is invalidated or (re-)created."""
+    _reset_listeners.append(listener)
+
+
+def _notify_reset(qdrant_url: Optional[str], collection_name: str) -> None:
+    for listener in _reset_listeners:
+        try:
+            listener(qdrant_url, collection_name)
+        except Exception as e:
+            logger.error(f"[QdrantSchema] Reset listener failed for '{collection_name}': {e}")
+
+
+def get_qdrant_client(qdrant_url: Optional[str]) -> QdrantClient:
+    """Shared client per URL (QdrantClient keeps its own connection pool)."""
+    client = _clients.get(qdrant_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(qdrant_url)
+            if client is None:
+                client = QdrantClient(url=qdrant_url)
+                _clients[qdrant_url] = client
+    return client
+
+
+def is_collection_not_found(exc: BaseException) -> bool:
+    """True for the remote 404 and the local-mode ValueError raised for a missing collection."""
+    if isinstance(exc, UnexpectedResponse) and exc.status_code == 404:
+        return True
+    msg = str(exc).lower()
+    return "collection" in msg and ("not found" in msg or "doesn't exist" in msg or "does not exist" in msg)
+
+
+class CollectionRegistry:
+    """Remembers which (url, collection) pairs are known to exist (and, briefly, which are missing)."""
+
+    def __init__(
+        self,
+        missing_ttl_seconds: float = kb_config.QDRANT_MISSING_COLLECTION_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._lock = threading.Lock()
+        self._ready: Set[Tuple[Optional[str], str]] = set()
+        self._missing: Dict[Tuple[Optional[str], str], float] = {}
+        self._creators: Dict[str, Optional[CollectionCreator]] = {}
+        self.missing_ttl_seconds = missing_ttl_seconds
+        self._clock = clock
+
+    def register(self, collection_name: str, create_fn: Optional[CollectionCreator] = None) -> None:
+        """Declare a collection; `create_fn` (if any) builds it when missing."""
+        with self._lock:
+            if create_fn is not None or collection_name not in self._creators:
+                self._creators[collection_name] = create_fn
+
+    @property
+    def registered(self) -> Tuple[str, ...]:
+        return tuple(self._creators)
+
+    def is_ready(self, qdrant_url: Optional[str], collection_name: str) -> bool:
+        return (qdrant_url, collection_name) in self._ready
+
+    def ensure(
+        self,
+        qdrant_url: Optional[str],
+        collection_name: str,
+        create_fn: Optional[CollectionCreator] = None,
+    ) -> bool:
+        """
+        Verify (and create if possible) a collection, at most once per process.
+
+        A missing collection without a creator is re-checked at most once per
+        `missing_ttl_seconds`.
+
+        Returns:
+            True if the collection exists, False if it is missing and cannot be created
+        """
+        key = (qdrant_url, collection_name)
+        if key in self._ready:
+            return True
+        with self._lock:
+            if key in self._ready:
+                return True
+            creator = create_fn or self._creators.get(collection_name)
+            missing_since = self._missing.get(key)
+            if creator is None and missing_since is not None:
+                if self._clock() - missing_since < self.missing_ttl_seconds:
+                    return False
+                del self._missing[key]
+            client = get_qdrant_client(qdrant_url)
+            if not client.collection_exists(collection_name):
+                if creator is None:
+                    logger.warning(f"[QdrantSchema] Collection '{collection_name}' does not exist")
+                    if self.missing_ttl_seconds > 0:
+                        self._missing[key] = self._clock()
+                    return False
+                logger.info(f"[QdrantSchema] Creating collection '{collection_name}'")
+                creator(client, collection_name)
+                _notify_reset(qdrant_url, collection_name)
+            self._missing.pop(key, None)
+            self._ready.add(key)
+            return True
+
+    def invalidate(self, qdrant_url: Optional[str], collection_name: str) -> None:
+        with self._lock:
+            self._ready.discard((qdrant_url, collection_name))
+            self._missing.pop((qdrant_url, collection_name), None)
+        _notify_reset(qdrant_url, collection_name)
+
+    def verify_all(self, qdrant_url: Optional[str], collection_names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Ensure every registered (or given) collection; used at startup."""
+        status: Dict[str, bool] = {}
+        for name in collection_names or self.registered:
+            try:
+                status[name] = self.ensure(qdrant_url, name)
+            except Exception as e:
+                logger.error(f"[QdrantSchema] Could not verify '{name}': {e}")
+                status[name] = False
+        return status
+
+
+schema_registry = CollectionRegistry()
+
+
+def run_with_collection(
+    qdrant_url: Optional[str],
+    collection_name: str,
+    op: Callable[[QdrantClient], T],
+    create_fn: Optional[CollectionCreator] = None,
+) -> T:
+    """
+    Run `op(client)` against a verified collection.
+
+    A "collection not found" failure invalidates the cached state, re-verifies
+    (re-creating if a creator is known) and retries `op` once.
+    """
+    if not schema_registry.ensure(qdrant_url, collection_name, create_fn):
+        raise RuntimeError(f"Qdrant collection '{collection_name}' is unavailable")
+    client = get_qdrant_client(qdrant_url)
+    try:
+        return op(client)
+    except Exception as e:
+        if not is_collection_not_found(e):
+            raise
+        logger.warning(f"[QdrantSchema] Collection '{collection_name}' disappeared, re-verifying")
+        schema_registry.invalidate(qdrant_url, collection_name)
+        if not schema_registry.ensure(qdrant_url, collection_name, create_fn):
+            raise
+        return op(client)
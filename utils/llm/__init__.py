@@ -2,7 +2,22 @@
 LLM utilities - API calls and prompts
 """
 
-from .call_llm import call_llm
+from .call_llm import (
+    call_llm,
+    call_llm_async,
+    call_llm_with_prefix,
+    call_llm_with_prefix_async,
+    estimate_tokens,
+)
+from .prompt_builder import (
+    PromptBuilder,
+    BuiltPrompt,
+    dedupe_kb_hits,
+    PRIORITY_QUERY,
+    PRIORITY_KB,
+    PRIORITY_MEMORY,
+    PRIORITY_HISTORY,
+)
 from .prompts import (
     PROMPT_OQA_CLASSIFY_EN,
     PROMPT_OQA_COMPOSE_VI_WITH_SOURCES,
@@ -11,6 +26,17 @@ from .prompts import (
 
 __all__ = [
     "call_llm",
+    "call_llm_async",
+    "call_llm_with_prefix",
+    "call_llm_with_prefix_async",
+    "estimate_tokens",
+    "PromptBuilder",
+    "BuiltPrompt",
+    "dedupe_kb_hits",
+    "PRIORITY_QUERY",
+    "PRIORITY_KB",
+    "PRIORITY_MEMORY",
+    "PRIORITY_HISTORY",
     "PROMPT_OQA_CLASSIFY_EN",
     "PROMPT_OQA_COMPOSE_VI_WITH_SOURCES",
     "PROMPT_OQA_CHITCHAT",
@@ -5,6 +5,7 @@ import random
 import time
 from dotenv import load_dotenv
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
 
 load_dotenv()
@@ -36,5 +37,74 @@ def call_llm(prompt: str, fast_mode: bool = False, max_retry_time: int = None) -
     response = client.models.generate_content(model=model_id, contents=prompt, config=config)
     return response.text or "Xin lỗi, không thể tạo response."
 
+async def call_llm_async(prompt: str, fast_mode: bool = False, max_retry_time: int = None) -> str:
+    """Non-blocking `call_llm` using the google-genai async client (for AsyncNode.exec_async)"""
+    model_id = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return "Xin lỗi, hệ thống chưa cấu hình API key."
+
+    client = genai.Client(api_key=api_key)
+    config = types.GenerateContentConfig(thinking_config=types.ThinkingConfig(thinking_budget=0)) if "thinking" in model_id and not fast_mode else None
+    response = await client.aio.models.generate_content(model=model_id, contents=prompt, config=config)
+    return response.text or "Xin lỗi, không thể tạo response."
+
+def _cached_content_config(model_id: str, fast_mode: bool, cached_content: str):
+    thinking = types.ThinkingConfig(thinking_budget=0) if "thinking" in model_id and not fast_mode else None
+    return types.GenerateContentConfig(cached_content=cached_content, thinking_config=thinking)
+
+def _is_stale_cache_error(e: genai_errors.ClientError) -> bool:
+    """The cached prefix is gone (expired, deleted) or unusable for this request; 429s and the rest are real failures"""
+    return e.code in (400, 404) or e.status in ("INVALID_ARGUMENT", "NOT_FOUND")
+
+def call_llm_with_prefix(cache_key: str, prefix: str, prompt: str, fast_mode: bool = False, max_retry_time: int = None) -> str:
+    """`call_llm(prefix + prompt)`, with the static `prefix` served from the provider's context cache when possible"""
+    from utils.llm.prompt_cache import get_prompt_prefix_cache
+
+    model_id = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    api_key = os.getenv("GEMINI_API_KEY")
+    cache = get_prompt_prefix_cache()
+    cached_content = cache.lookup(cache_key, prefix, model_id) if api_key else None
+    if cached_content is None:
+        return call_llm(prefix + prompt, fast_mode, max_retry_time)
+
+    client = genai.Client(api_key=api_key)
+    try:
+        response = client.models.generate_content(
+            model=model_id, contents=prompt, config=_cached_content_config(model_id, fast_mode, cached_content)
+        )
+    except genai_errors.ClientError as e:
+        if not _is_stale_cache_error(e):
+            raise
+        logger.warning(f"Cached prefix '{cache_key}' rejected, resending it inline: {e}")
+        cache.invalidate(cache_key)
+        return call_llm(prefix + prompt, fast_mode, max_retry_time)
+    return response.text or "Xin lỗi, không thể tạo response."
+
+async def call_llm_with_prefix_async(cache_key: str, prefix: str, prompt: str, fast_mode: bool = False, max_retry_time: int = None) -> str:
+    """Non-blocking `call_llm_with_prefix` (cache registration runs in a worker thread)"""
+    import asyncio
+    from utils.llm.prompt_cache import get_prompt_prefix_cache
+
+    model_id = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    api_key = os.getenv("GEMINI_API_KEY")
+    cache = get_prompt_prefix_cache()
+    cached_content = await asyncio.to_thread(cache.lookup, cache_key, prefix, model_id) if api_key else None
+    if cached_content is None:
+        return await call_llm_async(prefix + prompt, fast_mode, max_retry_time)
+
+    client = genai.Client(api_key=api_key)
+    try:
+        response = await client.aio.models.generate_content(
+            model=model_id, contents=prompt, config=_cached_content_config(model_id, fast_mode, cached_content)
+        )
+    except genai_errors.ClientError as e:
+        if not _is_stale_cache_error(e):
+            raise
+        logger.warning(f"Cached prefix '{cache_key}' rejected, resending it inline: {e}")
+        cache.invalidate(cache_key)
+        return await call_llm_async(prefix + prompt, fast_mode, max_retry_time)
+    return response.text or "Xin lỗi, không thể tạo response."
+
 if __name__ == "__main__": 
     print(call_llm("Hello, how are you?", fast_mode=True))
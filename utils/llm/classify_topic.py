@@ -10,7 +10,7 @@ According to PocketFlow best practices, these should be independent and easily t
 
 import logging
 from typing import Dict, Any , List
-from utils.llm import call_llm
+from utils.llm import call_llm, call_llm_with_prefix
 from utils.parsing import parse_yaml_with_schema
 from utils.llm.call_llm import APIOverloadException
 from config.timeout_config import timeout_config
@@ -37,16 +37,15 @@ def classify_demuc_with_llm(
     Necessity: Used by TopicClassifyAgent for STEP 1 - finding DEMUC
     """
     try:
-        prompt = f"""
+        # The instructions and the role's DEMUC catalog are the same for every query of a role:
+        # they form the cacheable prefix, only the question is sent per call
+        prefix = f"""
 Bạn là trợ lý y khoa chuyên phân loại chủ đề câu hỏi.
 
-Câu hỏi của người dùng: "{query}"
-Role: {role}
-
 Danh sách DEMUC (đề mục) có sẵn:
 {demuc_list_str}
 
-NHIỆM VỤ: Chọn DEMUC phù hợp nhất từ danh sách trên.
+NHIỆM VỤ: Chọn DEMUC phù hợp nhất từ danh sách trên cho câu hỏi của người dùng bên dưới.
 
 YÊU CẦU:
 - demuc: chọn CHÍNH XÁC một DEMUC từ danh sách (viết đúng y hệt)
@@ -70,11 +69,17 @@ demuc: "TÊN ĐỀ MỤC"
 confidence: "high"
 reason: "Lý do"
 ```
+"""
+        prompt = f"""
+Câu hỏi của người dùng: "{query}"
+Role: {role}
 """
 
         logger.info(f"[classify_demuc_with_llm] Calling LLM to classify DEMUC")
 
-        resp = call_llm(prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT)
+        resp = call_llm_with_prefix(
+            f"classify_demuc:{role}", prefix, prompt, fast_mode=True, max_retry_time=timeout_config.LLM_RETRY_TIMEOUT
+        )
         logger.info(f"[classify_demuc_with_llm] LLM response received")
 
         result = parse_yaml_with_schema(
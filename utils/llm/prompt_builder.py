@@ -0,0 +1,209 @@
+"""
+Token-budgeted prompt assembly shared by the LLM nodes.
+
+A node declares its prompt as a `str.format` template plus named sections.
+`PromptBuilder.build` keeps the template text and required sections as-is and
+fills the remaining token budget in priority order: query > KB > memory >
+history. List sections (Q&As, memories, history lines) drop whole items from
+the low-ranked end (history drops the oldest lines). Text sections are cut to
+whatever is left. Token counts use `estimate_tokens`, and every build logs the
+prompt size against the node's budget (`ChatConfig.get_prompt_budget`).
+
+An optional static `prefix` (persona, instructions, topic catalog) is placed
+before the template unchanged, so it can be served from the provider's
+context cache (see `utils.llm.prompt_cache`); it counts against the budget.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config.chat_config import chat_config
+from utils.llm.call_llm import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Lower value = filled first
+PRIORITY_QUERY = 0
+PRIORITY_KB = 1
+PRIORITY_MEMORY = 2
+PRIORITY_HISTORY = 3
+
+TRUNCATION_MARK = "…"
+
+
+@dataclass
+class _Section:
+    name: str
+    items: List[str]
+    priority: int
+    separator: str = "\n"
+    header: str = ""
+    empty: str = ""
+    required: bool = False
+    keep_newest: bool = False
+    is_text: bool = False
+
+
+@dataclass
+class BuiltPrompt:
+    """A rendered prompt and its estimated size."""
+    text: str
+    tokens: int
+    budget: int
+    trimmed: Dict[str, int] = field(default_factory=dict)  # section -> items dropped (or -1 if cut)
+    prefix: str = ""
+
+    @property
+    def suffix(self) -> str:
+        """The per-call part after the static prefix."""
+        return self.text[len(self.prefix):]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """Cut `text` to about `max_tokens` (keeping its end when `keep_tail`)."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    chars = len(text) * max_tokens // max(estimate_tokens(text), 1)
+    while chars > 0:
+        cut = TRUNCATION_MARK + text[-chars:] if keep_tail else text[:chars] + TRUNCATION_MARK
+        if estimate_tokens(cut) <= max_tokens:
+            return cut
+        chars = int(chars * 0.9)
+    return ""
+
+
+def _normalize_question(text: str) -> str:
+    return re.sub(r"[\s\W_]+", " ", text.lower()).strip()
+
+
+def dedupe_kb_hits(hits: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop repeated Q&As, keeping the first (best-ranked) copy.
+
+    Hits are the same Q&A when they share an id or their questions match
+    after lowercasing and stripping punctuation/whitespace (the same question
+    often comes back from several collections or retrieval rounds).
+    """
+    unique: List[Dict[str, Any]] = []
+    seen_ids, seen_questions = set(), set()
+    for hit in hits:
+        hit_id = hit.get("id")
+        question = _normalize_question(str(hit.get("CAUHOI") or hit.get("cau_hoi") or hit.get("question") or ""))
+        if (hit_id is not None and hit_id in seen_ids) or (question and question in seen_questions):
+            continue
+        if hit_id is not None:
+            seen_ids.add(hit_id)
+        if question:
+            seen_questions.add(question)
+        unique.append(hit)
+    return unique
+
+
+def dedupe_texts(texts: Iterable[str]) -> List[str]:
+    """Drop repeated strings (same normalization as `dedupe_kb_hits`), keeping order."""
+    unique, seen = [], set()
+    for text in texts:
+        key = _normalize_question(text)
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(text)
+    return unique
+
+
+class PromptBuilder:
+    """Fills a prompt template within a node's token budget."""
+
+    def __init__(self, node: str, template: str, budget: Optional[int] = None, prefix: str = "") -> None:
+        self.node = node
+        self.template = template
+        self.prefix = prefix
+        self.budget = budget if budget is not None else chat_config.get_prompt_budget(node)
+        self._sections: List[_Section] = []
+
+    def add(
+        self,
+        name: str,
+        text: Optional[str],
+        priority: int = PRIORITY_QUERY,
+        required: bool = False,
+        keep_tail: bool = False,
+    ) -> "PromptBuilder":
+        """Text section; `required` sections are never cut."""
+        self._sections.append(_Section(
+            name, [text or ""], priority, required=required, keep_newest=keep_tail, is_text=True
+        ))
+        return self
+
+    def add_items(
+        self,
+        name: str,
+        items: Sequence[str],
+        priority: int,
+        separator: str = "\n",
+        header: str = "",
+        empty: str = "",
+        keep_newest: bool = False,
+    ) -> "PromptBuilder":
+        """
+        List section rendered as `header + separator.join(items)` (or `empty`).
+
+        Items are ranked best first and dropped from the end; with
+        `keep_newest` they are chronological and dropped from the start.
+        """
+        self._sections.append(_Section(
+            name, [item for item in items if item], priority, separator, header, empty, keep_newest=keep_newest
+        ))
+        return self
+
+    def build(self) -> BuiltPrompt:
+        placeholders = {section.name: "" for section in self._sections}
+        remaining = self.budget - estimate_tokens(self.prefix + self.template.format_map(placeholders))
+        rendered: Dict[str, str] = {}
+        trimmed: Dict[str, int] = {}
+
+        for section in sorted(self._sections, key=lambda s: (not s.required, s.priority)):
+            if section.is_text:
+                text = section.items[0]
+                if not section.required:
+                    cut = truncate_to_tokens(text, remaining, keep_tail=section.keep_newest)
+                    if cut != text:
+                        trimmed[section.name] = -1
+                    text = cut
+                rendered[section.name] = text
+                remaining -= estimate_tokens(text)
+                continue
+
+            ordered = list(reversed(section.items)) if section.keep_newest else section.items
+            kept: List[str] = []
+            used = estimate_tokens(section.header)
+            for item in ordered:
+                cost = estimate_tokens(item + section.separator)
+                if used + cost > remaining:
+                    break
+                kept.append(item)
+                used += cost
+            if section.keep_newest:
+                kept.reverse()
+            if len(kept) < len(section.items):
+                trimmed[section.name] = len(section.items) - len(kept)
+            if kept:
+                rendered[section.name] = section.header + section.separator.join(kept)
+                remaining -= used
+            else:
+                rendered[section.name] = section.empty
+                remaining -= estimate_tokens(section.empty)
+
+        text = self.prefix + self.template.format_map(rendered)
+        built = BuiltPrompt(
+            text=text, tokens=estimate_tokens(text), budget=self.budget, trimmed=trimmed, prefix=self.prefix
+        )
+        if trimmed:
+            logger.info(f"📏 [{self.node}] Prompt ~{built.tokens}/{built.budget} tokens, trimmed: {trimmed}")
+        else:
+            logger.info(f"📏 [{self.node}] Prompt ~{built.tokens}/{built.budget} tokens")
+        return built
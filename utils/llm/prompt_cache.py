@@ -0,0 +1,160 @@
+"""
+Provider-side caching of static prompt prefixes (Gemini context caching).
+
+Nodes split their prompts into a static prefix (persona, instructions, output
+format, topic catalog), which is identical for every call with the same role,
+and a per-call suffix. `PromptPrefixCache.lookup` registers each prefix once
+with `client.caches.create` and returns the cached-content name, so
+`call_llm_with_prefix` only sends the suffix.
+
+Entries are keyed by a caller-chosen name (e.g. "compose_answer:patient_dental")
+and checked against a local SHA-256 fingerprint of model + prefix. When the
+prefix changes (persona edit, DEMUC list reloaded), the stale remote cache is
+deleted and a new one created. Prefixes below `PROMPT_CACHE_MIN_TOKENS` (the
+provider's minimum) are not registered; they are sent inline and, being
+byte-identical per role, still benefit from the model's implicit prefix caching.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from config.chat_config import chat_config
+from utils.llm.call_llm import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Recreate a cache this long before it expires; back off this long after a failed create
+_EXPIRY_MARGIN_SECONDS = 60
+_FAILURE_COOLDOWN_SECONDS = 300
+
+
+def _default_client():
+    from google import genai
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+def prefix_fingerprint(model: str, prefix: str) -> str:
+    """Stable fingerprint of a prefix as registered for `model`."""
+    return hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _CachedPrefix:
+    fingerprint: str
+    name: str
+    expires_at: float
+
+
+class PromptPrefixCache:
+    """Registered cached contents per prefix key, refreshed when the prefix or TTL changes."""
+
+    def __init__(
+        self,
+        client_factory: Callable = _default_client,
+        enabled: bool = chat_config.PROMPT_CACHE_ENABLED,
+        ttl_seconds: int = chat_config.PROMPT_CACHE_TTL_SECONDS,
+        min_tokens: int = chat_config.PROMPT_CACHE_MIN_TOKENS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._client_factory = client_factory
+        self._client = None
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._clock = clock
+        self._entries: Dict[str, _CachedPrefix] = {}
+        self._failed_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = self._client_factory()
+        return self._client
+
+    def lookup(self, key: str, prefix: str, model: str) -> Optional[str]:
+        """
+        Cached-content name for `prefix`, registering it if needed.
+
+        Returns None when the prefix should be sent inline (disabled, too
+        short, or the provider refused it recently).
+        """
+        if not self.enabled or not prefix or estimate_tokens(prefix) < self.min_tokens:
+            return None
+        fingerprint = prefix_fingerprint(model, prefix)
+
+        with self._lock:
+            name = self._fresh_name(key, fingerprint)
+            if name is not None:
+                return name
+            if self._failed_until.get(fingerprint, 0) > self._clock():
+                return None
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One registration per key at a time; others wait and reuse it
+        with key_lock:
+            with self._lock:
+                name = self._fresh_name(key, fingerprint)
+                if name is not None:
+                    return name
+                stale = self._entries.pop(key, None)
+            if stale is not None and stale.fingerprint != fingerprint:
+                logger.info(f"🔄 [PromptCache] Prefix '{key}' changed, replacing its cached content")
+                self._delete(stale.name)
+            return self._create(key, prefix, model, fingerprint)
+
+    def invalidate(self, key: str) -> None:
+        """Forget `key` (e.g. the provider no longer knows its cached content)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _fresh_name(self, key: str, fingerprint: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint == fingerprint and entry.expires_at - _EXPIRY_MARGIN_SECONDS > self._clock():
+            return entry.name
+        return None
+
+    def _create(self, key: str, prefix: str, model: str, fingerprint: str) -> Optional[str]:
+        from google.genai import types
+        try:
+            cached = self._get_client().caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    contents=[prefix],
+                    display_name=key,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [PromptCache] Could not cache prefix '{key}', sending it inline: {e}")
+            with self._lock:
+                self._failed_until[fingerprint] = self._clock() + _FAILURE_COOLDOWN_SECONDS
+            return None
+        with self._lock:
+            self._entries[key] = _CachedPrefix(fingerprint, cached.name, self._clock() + self.ttl_seconds)
+        logger.info(f"✅ [PromptCache] Cached prefix '{key}' (~{estimate_tokens(prefix)} tokens) as {cached.name}")
+        return cached.name
+
+    def _delete(self, name: str) -> None:
+        try:
+            self._get_client().caches.delete(name=name)
+        except Exception as e:
+            logger.warning(f"⚠️ [PromptCache] Could not delete cached content {name}: {e}")
+
+
+_prefix_cache: Optional[PromptPrefixCache] = None
+_prefix_cache_lock = threading.Lock()
+
+
+def get_prompt_prefix_cache() -> PromptPrefixCache:
+    """Process-wide prefix cache."""
+    global _prefix_cache
+    with _prefix_cache_lock:
+        if _prefix_cache is None:
+            _prefix_cache = PromptPrefixCache()
+        return _prefix_cache
@@ -0,0 +1,72 @@
+"""
+bcrypt hashing on a dedicated, size-limited executor.
+
+A bcrypt verify costs tens to hundreds of milliseconds of CPU. Running it on
+the event loop stalls every request, and running it on FastAPI's shared
+threadpool lets a login storm starve the sync handlers. The async helpers here
+queue the work on a small pool of its own instead, so excess logins wait
+behind each other and nothing else does.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from passlib.hash import bcrypt
+
+from config.api_config import api_config
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _truncate(password: str) -> str:
+    # bcrypt ignores bytes beyond 72; truncation ensures consistent behavior across backends
+    return password.encode("utf-8")[:72].decode("utf-8", errors="ignore")
+
+
+def _hasher(rounds: Optional[int] = None):
+    return bcrypt.using(rounds=rounds or api_config.BCRYPT_ROUNDS)
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password with the configured work factor (blocking)."""
+    return _hasher(rounds).hash(_truncate(password))
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verify a password against a bcrypt hash (blocking); False on any error."""
+    try:
+        return bcrypt.verify(_truncate(password), hashed)
+    except Exception:
+        return False
+
+
+def needs_rehash(hashed: str, rounds: Optional[int] = None) -> bool:
+    """Whether a stored hash uses a different work factor than the configured one."""
+    try:
+        return _hasher(rounds).needs_update(hashed)
+    except Exception:
+        return False
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, api_config.PASSWORD_HASH_WORKERS),
+                thread_name_prefix="password-hash",
+            )
+        return _executor
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_executor(), verify_password, password, hashed)
@@ -0,0 +1,73 @@
+"""
+Short-TTL cache of authenticated users.
+
+`get_current_user` verifies the JWT on every request but only reads the user
+row on a miss. Entries are immutable `Principal` snapshots (never ORM objects,
+so nothing is shared across sessions/threads), keyed by user id and dropped
+when the user is deleted. Invalidation is per process; the TTL bounds how
+long another worker can keep serving a deleted user.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from config.api_config import api_config
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by request handlers."""
+    id: int
+    email: str
+
+
+class PrincipalCache:
+    """LRU of user id -> Principal with a TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = api_config.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = api_config.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[Principal, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            item = self._entries.get(user_id)
+            if item is None:
+                return None
+            principal, loaded_at = item
+            if time.monotonic() - loaded_at > self.ttl_seconds:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic())
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()